@@ -1,23 +1,50 @@
 import streamlit as st
 import pandas as pd
 import os
-from datetime import date
+import tempfile
+from datetime import date, timedelta
+from registration_store import RegistrationStore, COLUMNS, PAGE_SIZE
 
 # --- CONFIGURATION ---
 ORGANIZER_USER = "admin"
 ORGANIZER_PASS = "password123"
 CSV_FILE = "registrations.csv"
 
-# --- INITIALIZE SESSION STATE ---
-if "registrations" not in st.session_state:
-    if os.path.exists(CSV_FILE):
-        st.session_state.registrations = pd.read_csv(CSV_FILE).to_dict("records")
-    else:
-        st.session_state.registrations = []
+# Allowed date range
+start_date = date(2025, 9, 22)
+end_date = date(2025, 9, 26)
+MAX_CAPACITY = 24
+
+EVENTS = ["Keynote", "Workshop A", "Workshop B", "Networking"]
+
+# All time slots with boundaries
+slot_options = {
+    "08:00–10:00": (8, 10),
+    "10:00–12:00": (10, 12),
+    "12:00–14:00": (12, 14),
+    "14:00–16:00": (14, 16),
+    "16:00–18:00": (16, 18)
+}
+
+# --- SHARED STORE ---
+# One store for every session, so seat counts are never a stale per-session copy
+@st.cache_resource
+def get_store():
+    return RegistrationStore(csv_file=CSV_FILE)
+
+store = get_store()
 
+# --- INITIALIZE SESSION STATE ---
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 
+# Dashboard page cursors: dashboard_cursors[i] is where page i starts
+if "dashboard_cursors" not in st.session_state:
+    st.session_state.dashboard_cursors = [None]
+
+def reset_dashboard_pages():
+    st.session_state.dashboard_cursors = [None]
+
 # --- HEADER MODE SELECTION ---
 mode = st.radio("Select Mode", ["Visitor", "Organizer"], horizontal=True)
 
@@ -37,43 +64,85 @@ if mode == "Organizer":
     else:
         # Display dashboard when logged in
         st.title("📋 Registration Dashboard")
-        df = pd.DataFrame(st.session_state.registrations)
-        st.markdown(f"**Total Registrations:** {len(df)}")
-        st.dataframe(df)
-        csv_bytes = df.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            label="📥 Download CSV",
-            data=csv_bytes,
-            file_name=CSV_FILE,
-            mime="text/csv"
-        )
+        st.markdown(f"**Total Registrations:** {store.count()}")
+
+        # Filters are applied by the store; changing one goes back to the first page
+        col_event, col_date, col_slot, col_email = st.columns(4)
+        filter_event = col_event.selectbox("Event", ["All"] + EVENTS, on_change=reset_dashboard_pages)
+        days = [(start_date + timedelta(days=i)).isoformat() for i in range((end_date - start_date).days + 1)]
+        filter_date = col_date.selectbox("Date", ["All"] + days, on_change=reset_dashboard_pages)
+        filter_slot = col_slot.selectbox("Time Slot", ["All"] + list(slot_options), on_change=reset_dashboard_pages)
+        filter_email = col_email.text_input("Email starts with", on_change=reset_dashboard_pages)
+        filters = {
+            "event": filter_event if filter_event != "All" else None,
+            "date": filter_date if filter_date != "All" else None,
+            "slot": filter_slot if filter_slot != "All" else None,
+        }
+
+        # Seats per slot, from the store's counters
+        occupancy = store.occupancy(**filters)
+        if occupancy:
+            st.subheader("🪑 Occupancy")
+            st.dataframe(pd.DataFrame(
+                [(event, day, slot, taken, MAX_CAPACITY - taken) for event, day, slot, taken in occupancy],
+                columns=["Event", "Date", "Time Slot", "Taken", "Left"]
+            ), use_container_width=True)
+
+        # One page of registrations at a time
+        cursors = st.session_state.dashboard_cursors
+        page = len(cursors) - 1
+        rows, next_cursor = store.query(**filters, email_prefix=filter_email.strip() or None, after=cursors[-1])
+        st.dataframe(pd.DataFrame(rows, columns=["id"] + COLUMNS).drop(columns="id"), use_container_width=True)
+        if rows:
+            shown = f"Showing {page * PAGE_SIZE + 1:,}–{page * PAGE_SIZE + len(rows):,}"
+            # Counts come from the slot counters, which know nothing about emails
+            st.caption(shown if filter_email.strip() else f"{shown} of {store.count(**filters):,} registrations")
+        else:
+            st.caption("No registrations match these filters.")
+
+        col_prev, col_next = st.columns(2)
+        if col_prev.button("⬅️ Previous", disabled=page == 0):
+            cursors.pop()
+            st.rerun()
+        if col_next.button("Next ➡️", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+
+        # The CSV is only built when asked for, a chunk at a time, into a temporary file
+        if st.button("Prepare CSV Export"):
+            previous = st.session_state.get("registration_export")
+            if previous and os.path.exists(previous["path"]):
+                os.remove(previous["path"])
+            fd, out_path = tempfile.mkstemp(suffix=".csv")
+            with st.spinner("Exporting..."):
+                with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+                    exported = store.export_csv(f, **filters, email_prefix=filter_email.strip() or None)
+            st.session_state.registration_export = {"path": out_path, "rows": exported}
+
+        registration_export = st.session_state.get("registration_export")
+        if registration_export and os.path.exists(registration_export["path"]):
+            st.caption(f"{registration_export['rows']:,} registrations exported")
+            with open(registration_export["path"], "rb") as f:
+                st.download_button(
+                    label="📥 Download CSV",
+                    data=f,
+                    file_name=CSV_FILE,
+                    mime="text/csv"
+                )
 
         # Admin cancellation
         cancel_email = st.text_input("Enter email to cancel as an Admin")
         if cancel_email:
-            df = pd.DataFrame(st.session_state.registrations)
-            matches = df[df["Email"] == cancel_email]
+            matches = store.by_email(cancel_email)
 
-            if matches.empty:
+            if not matches:
                 st.warning("No registrations found for this email.")
             else:
-                cancel_choice = st.selectbox(
-                    "Select a registration to cancel",
-                    matches.apply(lambda row: f"{row['Event']} on {row['Date']} at {row['Time Slot']}", axis=1)
-                )
+                # Options are registration IDs, so identical-looking registrations stay distinct
+                labels = {row["id"]: f"{row['Event']} on {row['Date']} at {row['Time Slot']}" for row in matches}
+                cancel_choice = st.selectbox("Select a registration to cancel", list(labels), format_func=labels.get)
                 if st.button("Confirm Cancellation"):
-                    # Identify index to remove
-                    idx_to_remove = matches.index[matches.apply(
-                        lambda row: f"{row['Event']} on {row['Date']} at {row['Time Slot']}" == cancel_choice,
-                        axis=1
-                    )][0]
-
-                    # Remove from session_state
-                    del st.session_state.registrations[idx_to_remove]
-
-                    # Rewrite CSV
-                    updated_df = pd.DataFrame(st.session_state.registrations)
-                    updated_df.to_csv(CSV_FILE, index=False)
+                    store.cancel(cancel_choice)
 
                     st.success("Registration cancelled successfully!")
                     st.rerun()
@@ -85,27 +154,10 @@ if mode == "Organizer":
 
 # --- VISITOR MODE ---
 else:
-    # Allowed date range
-    start_date = date(2025, 9, 22)
-    end_date = date(2025, 9, 26)
-    MAX_CAPACITY = 24
-
-    # All time slots with boundaries
-    slot_options = {
-        "08:00–10:00": (8, 10),
-        "10:00–12:00": (10, 12),
-        "12:00–14:00": (12, 14),
-        "14:00–16:00": (14, 16),
-        "16:00–18:00": (16, 18)
-    }
-
     st.title("🎟️ Event Registration")
 
     # Event selection outside form for dynamic filtering
-    event_choice = st.selectbox(
-        "Event Choice",
-        ["Keynote", "Workshop A", "Workshop B", "Networking"]
-    )
+    event_choice = st.selectbox("Event Choice", EVENTS)
 
     # Filter slots based on event logic
     if event_choice == "Keynote":
@@ -121,14 +173,8 @@ else:
     # Slot selection
     slot = st.selectbox("Time Slot", valid_slots)
 
-    # Count current registrations for selected event/date/slot
-    df = pd.DataFrame(st.session_state.registrations)
-    filtered = df[
-        (df["Event"] == event_choice) &
-        (df["Date"] == reg_date.isoformat()) &
-        (df["Time Slot"] == slot)
-    ]
-    current_count = len(filtered)
+    # Seats taken for selected event/date/slot, from the shared counter
+    current_count = store.seats_taken(event_choice, reg_date.isoformat(), slot)
     remaining = MAX_CAPACITY - current_count
 
     # Show availability
@@ -148,56 +194,32 @@ else:
                 st.error("Name and Email are required.")
             elif remaining <= 0:
                 st.error("This slot is full. Please choose another.")
+            # The seat is checked again and taken atomically, in case
+            # another visitor took the last one since this page was drawn
+            elif store.register(name, email, event_choice, reg_date.isoformat(), slot, MAX_CAPACITY) is None:
+                st.error("This slot is full. Please choose another.")
             else:
-                entry = {
-                    "Name": name,
-                    "Email": email,
-                    "Event": event_choice,
-                    "Date": reg_date.isoformat(),
-                    "Time Slot": slot
-                }
-                st.session_state.registrations.append(entry)
-
-                df_new = pd.DataFrame([entry])
-                if os.path.exists(CSV_FILE):
-                    df_new.to_csv(CSV_FILE, mode="a", header=False, index=False)
-                else:
-                    df_new.to_csv(CSV_FILE, mode="w", header=True, index=False)
-
                 st.success("Registration successful!")
                 st.rerun()
 
     # Live total count
-    total = len(st.session_state.registrations)
+    total = store.count()
     st.info(f"🎉 Total registrations so far: **{total}**")
     st.markdown("---")
     st.subheader("❌ Cancel Your Registration")
 
     cancel_email = st.text_input("Enter your registered email to cancel")
     if cancel_email:
-        df = pd.DataFrame(st.session_state.registrations)
-        matches = df[df["Email"] == cancel_email]
+        matches = store.by_email(cancel_email)
 
-        if matches.empty:
+        if not matches:
             st.warning("No registrations found for this email.")
         else:
-            cancel_choice = st.selectbox(
-                "Select a registration to cancel",
-                matches.apply(lambda row: f"{row['Event']} on {row['Date']} at {row['Time Slot']}", axis=1)
-            )
+            # Options are registration IDs, so identical-looking registrations stay distinct
+            labels = {row["id"]: f"{row['Event']} on {row['Date']} at {row['Time Slot']}" for row in matches}
+            cancel_choice = st.selectbox("Select a registration to cancel", list(labels), format_func=labels.get)
             if st.button("Confirm Cancellation"):
-                # Identify index to remove
-                idx_to_remove = matches.index[matches.apply(
-                    lambda row: f"{row['Event']} on {row['Date']} at {row['Time Slot']}" == cancel_choice,
-                    axis=1
-                )][0]
-
-                # Remove from session_state
-                del st.session_state.registrations[idx_to_remove]
-
-                # Rewrite CSV
-                updated_df = pd.DataFrame(st.session_state.registrations)
-                updated_df.to_csv(CSV_FILE, index=False)
+                store.cancel(cancel_choice)
 
                 st.success("Registration cancelled successfully!")
                 st.rerun()
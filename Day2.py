@@ -10,6 +10,13 @@
 # App calculates how much each person should pay or get back.
 import streamlit as st
 import pandas as pd
+from io import BytesIO
+from contributions import (
+    BALANCE_COL, blank_contributions, normalise_contributions, read_contributions, refresh_balances
+)
+from settlement import settle, EXACT_MAX_PEOPLE
+import expense_ledger
+from sqlite_connections import ConnectionPool
 
 st.title("💸 Fair Expense Splitter")
 
@@ -20,8 +27,22 @@ if "reset" not in st.session_state:
 def clear_inputs():
     st.session_state.reset = True
 
+@st.cache_data
+def load_uploaded_contributions(data, file_name):
+    return read_contributions(BytesIO(data), file_name)
+
+# Shared by every session; a run borrows a connection while it uses the ledger
+@st.cache_resource
+def get_ledger():
+    return ConnectionPool(expense_ledger.connect)
+
+entry_mode = st.radio("Entry mode", ["One by one", "Bulk (grid or file)", "Expense ledger"], horizontal=True)
+
 # Inputs
-if st.session_state.reset:
+if entry_mode == "Expense ledger":
+    total_amount = 0.0
+    num_people = 1
+elif st.session_state.reset:
     total_amount = 0.0
     num_people = 1
     st.session_state.reset = False
@@ -29,53 +50,109 @@ else:
     total_amount = st.number_input("Enter total amount spent", min_value=0.0, format="%.2f")
     num_people = st.number_input("Number of people", min_value=1, step=1)
 
-st.subheader("Optional: Enter individual contributions")
-names = []
-contributions = []
-
-for i in range(int(num_people)):
-    col1, col2 = st.columns(2)
-    with col1:
-        name = st.text_input(f"Person {i+1} Name", key=f"name_{i}")
-    with col2:
-        contribution = st.number_input(f"{name or 'Person'}'s Contribution", min_value=0.0, format="%.2f", key=f"contrib_{i}")
-    names.append(name if name else f"Person {i+1}")
-    contributions.append(contribution)
+if entry_mode != "Expense ledger":
+    st.subheader("Optional: Enter individual contributions")
+
+if entry_mode == "Expense ledger":
+    # Each expense updates the running balances as it is saved
+    with get_ledger().connection() as ledger:
+        known_people = expense_ledger.get_people(ledger)
+
+        with st.form("expense_form", clear_on_submit=True):
+            st.subheader("➕ Add an Expense")
+            description = st.text_input("What was it for?")
+            col1, col2 = st.columns(2)
+            with col1:
+                payer = st.text_input("Paid by")
+            with col2:
+                amount = st.number_input("Amount", min_value=0.0, format="%.2f")
+            sharers = st.multiselect("Shared by", known_people)
+            new_sharers = st.text_input("New people sharing it (comma separated)")
+            if st.form_submit_button("Add Expense"):
+                try:
+                    expense_ledger.add_expense(ledger, payer, amount, sharers + new_sharers.split(","), description)
+                    st.success("Expense added!")
+                except ValueError as e:
+                    st.error(str(e))
+
+        recent = expense_ledger.recent_expenses(ledger)
+        if recent:
+            st.markdown(f"**Recent expenses** ({expense_ledger.expense_count(ledger)} in total)")
+            st.dataframe(pd.DataFrame(recent, columns=["When", "Paid by", "Amount", "Description", "People sharing"]))
+
+        ledger_df = pd.DataFrame(expense_ledger.get_balances(ledger), columns=["Name", "Paid", BALANCE_COL])
+elif entry_mode == "One by one":
+    names = []
+    contributions = []
+
+    for i in range(int(num_people)):
+        col1, col2 = st.columns(2)
+        with col1:
+            name = st.text_input(f"Person {i+1} Name", key=f"name_{i}")
+        with col2:
+            contribution = st.number_input(f"{name or 'Person'}'s Contribution", min_value=0.0, format="%.2f", key=f"contrib_{i}")
+        names.append(name if name else f"Person {i+1}")
+        contributions.append(contribution)
+
+    contributions_df = pd.DataFrame({"Name": names, "Paid": contributions})
+else:
+    uploaded = st.file_uploader("Upload contributions (CSV or Parquet with Name and Paid columns)", type=["csv", "parquet"])
+    if uploaded is not None:
+        try:
+            base_df = load_uploaded_contributions(uploaded.getvalue(), uploaded.name)
+        except ValueError as e:
+            st.error(str(e))
+            base_df = blank_contributions(int(num_people))
+    else:
+        base_df = blank_contributions(int(num_people))
+
+    # One grid widget for the whole group instead of two widgets per person
+    edited_df = st.data_editor(
+        base_df,
+        num_rows="dynamic",
+        use_container_width=True,
+        key="bulk_editor",
+        column_config={"Paid": st.column_config.NumberColumn("Paid", min_value=0.0, format="%.2f")}
+    )
+    contributions_df = normalise_contributions(edited_df)
+    num_people = max(len(contributions_df), 1)
+    st.caption(f"{len(contributions_df)} people")
+
+minimise_transfers = st.checkbox(
+    "Minimise number of transfers",
+    help=f"Finds the fewest possible transfers. Only used for groups of up to {EXACT_MAX_PEOPLE} people."
+)
 
 # Calculate button
 if st.button("Calculate Settlement"):
-    fair_share = total_amount / num_people
-    balances = [round(p - fair_share, 2) for p in contributions]
+    if entry_mode == "Expense ledger":
+        df = ledger_df
+    else:
+        fair_share = total_amount / num_people
 
-    df = pd.DataFrame({
-        "Name": names,
-        "Paid": contributions,
-        "Balance to Pay(-) and Get(+)": balances
-    })
+        # Reuse the last result so only edited rows are recomputed on rerun
+        df = refresh_balances(st.session_state.get("balances_df"), contributions_df, fair_share)
+        st.session_state.balances_df = df
+    names = df["Name"].tolist()
+    balances = df[BALANCE_COL].tolist()
 
     st.subheader("💰 Settlement Summary")
     st.dataframe(df)
 
     # Bar chart
     st.subheader("📊 Balance Chart")
-    st.bar_chart(df.set_index("Name")["Balance to Pay(-) and Get(+)"])
+    st.bar_chart(df.set_index("Name")[BALANCE_COL])
 
     # Settle up logic
     st.subheader("🔄 Settle Up Suggestions")
-    debtors = df[df["Balance to Pay(-) and Get(+)"] < 0].copy()
-    creditors = df[df["Balance to Pay(-) and Get(+)"] > 0].copy()
-
-    debtors["Balance to Pay(-) and Get(+)"] = debtors["Balance to Pay(-) and Get(+)"].abs()
-    for i, debtor in debtors.iterrows():
-        for j, creditor in creditors.iterrows():
-            if debtor["Balance to Pay(-) and Get(+)"] == 0:
-                break
-            if creditor["Balance to Pay(-) and Get(+)"] == 0:
-                continue
-            amount = min(debtor["Balance to Pay(-) and Get(+)"], creditor["Balance to Pay(-) and Get(+)"])
-            st.write(f"{debtor['Name']} pays ₹{amount} to {creditor['Name']}")
-            debtor["Balance to Pay(-) and Get(+)"] -= amount
-            creditors.at[j, "Balance to Pay(-) and Get(+)"] -= amount
+    transfers = settle(names, balances, exact=minimise_transfers)
+    if len(transfers) > 50:
+        st.dataframe(pd.DataFrame(transfers, columns=["From", "To", "Amount (₹)"]))
+    elif transfers:
+        for payer, payee, amount in transfers:
+            st.write(f"{payer} pays ₹{amount:.2f} to {payee}")
+    else:
+        st.write("No transfers needed.")
 
     # Export CSV
     st.subheader("📁 Export Results")
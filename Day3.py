@@ -1,4 +1,10 @@
 import streamlit as st
+import os
+import tempfile
+import numpy as np
+import pyarrow as pa
+from batch_calc import OPERATIONS, numeric_columns, process_file
+from expression_engine import ExpressionError, evaluate, parse_variables, process_expression_file
 
 st.title("Simple Calculator with 2 numbers")
 
@@ -58,4 +64,83 @@ with col7:
 
 # Display result with operation label
 if result is not None:
-    st.success(f"{operation_used} Result: {result}")
\ No newline at end of file
+    st.success(f"{operation_used} Result: {result}")
+
+# --- Expression Mode ---
+st.write("### 🧮 Expression Mode")
+st.caption("Use `a` and `b` for the two numbers above plus any variables you define. Supports + - * / % // and ^ (or **).")
+expression_text = st.text_input("Expression", value="(a + b) * 2")
+variables_text = st.text_area("Variables (one per line, e.g. rate = 0.18)", height=80)
+
+if st.button("Evaluate"):
+    try:
+        variables = {"a": num1, "b": num2, **parse_variables(variables_text)}
+        value = evaluate(expression_text, **variables)
+        if np.ma.is_masked(value):
+            st.error("Error: Result is undefined (division by zero, overflow or an exponent over 1000)")
+        else:
+            st.success(f"{expression_text} = {float(value)}")
+    except ExpressionError as e:
+        st.error(f"Error: {e}")
+
+# --- Batch Mode ---
+st.write("### 📂 Batch Mode (CSV / Parquet)")
+uploaded = st.file_uploader("Upload a file with numeric columns", type=["csv", "parquet"])
+
+if uploaded is not None:
+    columns = numeric_columns(uploaded, uploaded.name)
+    if len(columns) == 0:
+        st.warning("No numeric columns found in this file.")
+    else:
+        col_a, col_b, col_op = st.columns(3)
+        with col_a:
+            first_col = st.selectbox("First column", columns)
+        with col_b:
+            second_col = st.selectbox("Second column", columns, index=min(1, len(columns) - 1))
+        with col_op:
+            symbol = st.selectbox(
+                "Operation",
+                list(OPERATIONS.keys()) + ["Expression"],
+                format_func=lambda s: f"{s} {OPERATIONS[s][0]}" if s in OPERATIONS else "🧮 Expression"
+            )
+        if symbol == "Expression":
+            st.caption(f"Uses the expression above. Column names become variables: {', '.join(c for c in columns if c.isidentifier())}")
+
+        if st.button("Run Batch"):
+            # Results go to a temp file chunk by chunk instead of being held in memory
+            previous = st.session_state.get("batch_result")
+            if previous and os.path.exists(previous["path"]):
+                os.remove(previous["path"])
+            extension = os.path.splitext(uploaded.name)[1].lower()
+            fd, out_path = tempfile.mkstemp(suffix=extension)
+            os.close(fd)
+            uploaded.seek(0)
+            try:
+                with st.spinner("Processing..."):
+                    if symbol == "Expression":
+                        rows, masked = process_expression_file(
+                            uploaded, uploaded.name, expression_text, out_path, parse_variables(variables_text)
+                        )
+                    else:
+                        rows, masked = process_file(uploaded, uploaded.name, first_col, second_col, symbol, out_path)
+                st.session_state.batch_result = {
+                    "path": out_path,
+                    "file_name": f"result{extension}",
+                    "rows": rows,
+                    "masked": masked,
+                }
+            except ExpressionError as e:
+                os.remove(out_path)
+                st.error(f"Error: {e}")
+            except pa.ArrowException as e:
+                # e.g. a text value in a column that looked numeric in the sample
+                os.remove(out_path)
+                st.error(f"Could not read {uploaded.name}: {e}")
+
+        batch_result = st.session_state.get("batch_result")
+        if batch_result and os.path.exists(batch_result["path"]):
+            st.success(f"Processed {batch_result['rows']:,} rows")
+            if batch_result["masked"]:
+                st.warning(f"{batch_result['masked']:,} rows had no valid result (e.g. division by zero) and were left empty.")
+            with open(batch_result["path"], "rb") as f:
+                st.download_button("📥 Download Result", data=f, file_name=batch_result["file_name"])
@@ -1,46 +1,54 @@
 import streamlit as st
 import pandas as pd
+import os
+import tempfile
+from bmi_scoring import calculate_bmi, get_category_and_tip, score_file
+import bmi_history
+from sqlite_connections import ConnectionPool
+from bmi_indicator import render_range_bar, render_cohort_report
 
 # --- Page Config ---
 st.set_page_config(page_title="BMI Calculator", page_icon="⚖️", layout="wide")
 
-# --- Session State for History ---
-if "bmi_history" not in st.session_state:
-    st.session_state.bmi_history = []
+# --- History Store (shared by all sessions, survives restarts) ---
+# A run borrows a connection while it reads or writes the history
+@st.cache_resource
+def get_history_store():
+    return ConnectionPool(bmi_history.connect)
+
+latest = None
 
 # --- Sidebar: History + Vertical Range ---
 with st.sidebar:
     st.markdown("## 🚀 Your Health Journey")
     st.write("Each entry is a step forward. Track your progress, celebrate your wins, and keep moving toward your goals!")
 
-    if st.session_state.bmi_history:
-        history_df = pd.DataFrame(
-            st.session_state.bmi_history,
-            columns=["Name", "Age", "Height (cm)", "Weight (kg)", "BMI", "Category"]
-        )
-        st.dataframe(history_df, use_container_width=True)
-        st.markdown("### 📊 BMI Trend")
-        st.bar_chart(history_df["BMI"])
-    else:
-        st.info("No BMI records yet. Calculate to begin tracking.")
+    with get_history_store().connection() as history_store:
+        people = bmi_history.get_people(history_store)
+        if people:
+            person = st.selectbox("Person", people)
+            # The range bar shows the selected person's latest BMI
+            latest = next(iter(bmi_history.recent_measurements(history_store, person, limit=1)), None)
+            history_df = pd.DataFrame(
+                bmi_history.recent_measurements(history_store, person),
+                columns=["Time", "Age", "Height (cm)", "Weight (kg)", "BMI", "Category"]
+            )
+            st.dataframe(history_df, use_container_width=True)
+            st.markdown("### 📊 BMI Trend")
+            granularity = st.radio("Average per", list(bmi_history.ROLLUP_TABLES.keys()), horizontal=True)
+            trend_df = pd.DataFrame(
+                bmi_history.get_trend(history_store, person, granularity),
+                columns=["Date", "BMI"]
+            )
+            trend_df["Date"] = pd.to_datetime(trend_df["Date"])
+            st.line_chart(trend_df.set_index("Date")["BMI"])
+        else:
+            st.info("No BMI records yet. Calculate to begin tracking.")
 
     # --- Vertical BMI Range Bar ---
     st.markdown("### 📍 BMI Range Indicator")
-    def render_range_bar(bmi_val):
-        bar = ""
-        for i in range(35, 9, -1):
-            if i == int(bmi_val):
-                bar += f"<div style='background-color:#4B8BBE;color:white;padding:2px;'>⬅️ {i}</div>"
-            elif i < 18.5:
-                bar += f"<div style='background-color:#FFD1DC;padding:2px;'>{i}</div>"
-            elif i < 25:
-                bar += f"<div style='background-color:#C1F0C1;padding:2px;'>{i}</div>"
-            else:
-                bar += f"<div style='background-color:#FFDD99;padding:2px;'>{i}</div>"
-        return bar
-
-    if st.session_state.bmi_history:
-        latest_bmi = st.session_state.bmi_history[-1][4]
+    if latest:
+        latest_bmi = latest[4]
         st.markdown(render_range_bar(latest_bmi), unsafe_allow_html=True)
 
 # --- Main Title ---
@@ -56,21 +64,6 @@ with col2:
     height = st.number_input("Height (cm)", min_value=0.0, format="%.2f")
     weight = st.number_input("Weight (kg)", min_value=0.0, format="%.2f")
 
-# --- BMI Logic ---
-def calculate_bmi(h_cm, w_kg):
-    h_m = h_cm / 100
-    if h_m <= 0:
-        return None
-    return round(w_kg / (h_m ** 2), 1)
-
-def get_category_and_tip(bmi):
-    if bmi < 18.5:
-        return "Underweight", "🌱 You're in the Underweight range. Time to nourish your body with a nutrient-rich diet and expert guidance. You’ve got this! 🍲"
-    elif 18.5 <= bmi < 25:
-        return "Normal", "🎯 You're in the Normal range—awesome job! Keep up the balanced diet and regular movement. Your consistency is your superpower 👍"
-    else:
-        return "Overweight", "🔥 You're in the Overweight range. No worries—this is your moment to rise! Embrace physical activity and smart eating habits. Every step counts 🏃‍♂"
-
 # --- Calculate Button ---
 if st.button("Calculate BMI"):
     if name and age and height > 0 and weight > 0:
@@ -84,10 +77,59 @@ if st.button("Calculate BMI"):
         st.info(f"**Recommendation:** {tip}")
 
         # Save to history
-        st.session_state.bmi_history.append([name, age, height, weight, bmi, category])
+        with get_history_store().connection() as history_store:
+            bmi_history.add_measurement(history_store, name, age, height, weight, bmi, category)
     else:
         st.warning("Please enter your name, age, height, and weight to calculate your BMI.")
 
+# --- Cohort Scoring ---
+MAX_REPORT_PEOPLE = 50_000
+
+st.markdown("---")
+st.markdown("### 🏥 Cohort Scoring")
+st.write("Upload a CSV or Parquet file with `Height (cm)` and `Weight (kg)` columns (plus optional `Name` and `Age`) to score a whole group at once.")
+cohort_file = st.file_uploader("Upload cohort file", type=["csv", "parquet"])
+
+if cohort_file is not None and st.button("Score Cohort"):
+    previous = st.session_state.get("cohort_result")
+    if previous and os.path.exists(previous["path"]):
+        os.remove(previous["path"])
+    fd, out_path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        with st.spinner("Scoring..."):
+            summary, rows = score_file(cohort_file, cohort_file.name, out_path)
+        st.session_state.cohort_result = {
+            "path": out_path,
+            "rows": rows,
+            "invalid": summary.invalid,
+            "summary": summary.to_frame(),
+        }
+    except ValueError as e:
+        os.remove(out_path)
+        st.error(str(e))
+
+cohort_result = st.session_state.get("cohort_result")
+if cohort_result and os.path.exists(cohort_result["path"]):
+    st.success(f"Scored {cohort_result['rows']:,} records")
+    if cohort_result["invalid"]:
+        st.warning(f"{cohort_result['invalid']:,} records had a missing or zero height and were not categorised.")
+    st.dataframe(cohort_result["summary"], use_container_width=True, hide_index=True)
+    st.bar_chart(cohort_result["summary"].set_index("Category")["People"])
+    with open(cohort_result["path"], "rb") as f:
+        st.download_button("📥 Download Scored Cohort", data=f, file_name="bmi_cohort_scored.csv", mime="text/csv")
+
+    # The HTML report is only built when asked for
+    if cohort_result["rows"] == 0:
+        st.info("The cohort file has no records, so there is no range report to build.")
+    elif cohort_result["rows"] > MAX_REPORT_PEOPLE:
+        st.caption(f"HTML range reports are available for cohorts of up to {MAX_REPORT_PEOPLE:,} people.")
+    elif st.button("Build HTML Range Report"):
+        scored = pd.read_csv(cohort_result["path"], usecols=lambda c: c in ("Name", "BMI"))
+        report_names = scored["Name"] if "Name" in scored else [f"Person {i+1}" for i in range(len(scored))]
+        report = render_cohort_report(report_names, scored["BMI"].tolist())
+        st.download_button("📥 Download HTML Report", data=report, file_name="bmi_range_report.html", mime="text/html")
+
 # --- Footer ---
 st.markdown("---")
 st.caption("This tool is your launchpad—not a diagnosis. For personalized medical advice, always consult a healthcare professional.")
\ No newline at end of file
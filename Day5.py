@@ -1,7 +1,15 @@
 import streamlit as st
-import requests
 from dotenv import load_dotenv
 import os
+from datetime import datetime
+import tempfile
+import uuid
+import pyarrow as pa
+from rate_provider import RateProvider, RatesUnavailable, DEFAULT_URL
+from conversion_engine import MATRICES, currency_matrix, convert_file
+from batch_calc import numeric_columns
+from conversion_history import ConversionHistory, format_record, connect as connect_history
+from sqlite_connections import ConnectionPool
 
 # Load environment variables
 load_dotenv()
@@ -11,9 +19,32 @@ api_key = os.getenv("API_KEY")
 st.set_page_config(page_title="Unit Converter", layout="wide")
 st.title("🔄 Universal Unit Converter")
 
-# Initialize history
-if "history" not in st.session_state:
-    st.session_state.history = []
+# One provider per server process: pooled connections and rates cached across reruns and sessions
+@st.cache_resource
+def get_rate_provider():
+    return RateProvider(
+        api_key=api_key,
+        base_url=os.getenv("EXCHANGE_API_URL", DEFAULT_URL),
+        ttl=int(os.getenv("EXCHANGE_RATE_TTL", "3600"))
+    )
+
+rate_provider = get_rate_provider()
+
+# Optional on-disk copy of every session's history, shared by the whole process;
+# each write borrows a connection from the pool
+@st.cache_resource
+def get_history_db(path):
+    return ConnectionPool(connect_history, path)
+
+# Initialize history: a bounded ring buffer per session
+if "conversion_history" not in st.session_state:
+    history_db = os.getenv("CONVERSION_HISTORY_DB")
+    st.session_state.conversion_history = ConversionHistory(
+        capacity=int(os.getenv("CONVERSION_HISTORY_SIZE", "100")),
+        pool=get_history_db(history_db) if history_db else None,
+        session_id=uuid.uuid4().hex
+    )
+history = st.session_state.conversion_history
 
 # Conversion type and input
 category = st.selectbox("Choose conversion type", ["Currency", "Temperature", "Length", "Weight"])
@@ -26,76 +57,79 @@ def filtered_select(label, options, exclude):
 # Layout: Left for input, Right for result
 left, right = st.columns(2)
 
+matrix = None
+
 with left:
     if category == "Currency":
-        currencies = ["USD", "INR", "EUR", "GBP", "JPY"]
-        from_curr = st.selectbox("From Currency", currencies)
-        to_curr = filtered_select("To Currency", currencies, from_curr)
-
-        url = f"https://api.apilayer.com/exchangerates_data/latest?base={from_curr}&symbols={to_curr}"
-        headers = {"apikey": api_key}
+        currencies = rate_provider.currencies
+        from_unit = st.selectbox("From Currency", currencies)
+        to_unit = filtered_select("To Currency", currencies, from_unit)
 
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-
-            if "rates" in data and to_curr in data["rates"]:
-                rate = data["rates"][to_curr]
-                converted = value * rate
-                result_text = f"{value} {from_curr} → {converted:.2f} {to_curr}"
-                st.session_state.history.append(result_text)
-
-                with right:
-                    st.metric(label=f"{from_curr} → {to_curr}", value=f"{converted:.2f} {to_curr}")
-            else:
-                st.error(f"No rate found for {to_curr}. Full response: {data}")
-        except Exception as e:
+            snapshot = rate_provider.get_rates(from_unit)
+            # Built once per rate snapshot, then every pair is a lookup
+            matrix = currency_matrix(snapshot.rates)
+            if to_unit not in matrix.index:
+                raise RatesUnavailable(f"No rate found for {to_unit}")
+        except RatesUnavailable as e:
+            matrix = None
             st.error(f"Currency conversion failed: {e}")
+    else:
+        matrix = MATRICES[category]
+        from_unit = st.selectbox("From", matrix.units)
+        to_unit = filtered_select("To", matrix.units, from_unit)
 
-    elif category == "Temperature":
-        units = ["Celsius", "Fahrenheit", "Kelvin"]
-        from_temp = st.selectbox("From", units)
-        to_temp = filtered_select("To", units, from_temp)
-
-        def convert_temp(val, from_u, to_u):
-            if from_u == "Celsius":
-                return val * 9/5 + 32 if to_u == "Fahrenheit" else val + 273.15
-            if from_u == "Fahrenheit":
-                return (val - 32) * 5/9 if to_u == "Celsius" else (val - 32) * 5/9 + 273.15
-            if from_u == "Kelvin":
-                return val - 273.15 if to_u == "Celsius" else (val - 273.15) * 9/5 + 32
-
-        result = convert_temp(value, from_temp, to_temp)
-        result_text = f"{value} {from_temp} → {result:.2f} {to_temp}"
-        st.session_state.history.append(result_text)
-
-        with right:
-            st.metric(label=f"{from_temp} → {to_temp}", value=f"{result:.2f} {to_temp}")
-
-    elif category == "Length":
-        units = {"Meters": 1, "Kilometers": 1000, "Miles": 1609.34, "Feet": 0.3048}
-        from_len = st.selectbox("From", list(units.keys()))
-        to_len = filtered_select("To", list(units.keys()), from_len)
-        result = value * units[from_len] / units[to_len]
-        result_text = f"{value} {from_len} → {result:.2f} {to_len}"
-        st.session_state.history.append(result_text)
-
-        with right:
-            st.metric(label=f"{from_len} → {to_len}", value=f"{result:.2f} {to_len}")
-
-    elif category == "Weight":
-        units = {"Kilograms": 1, "Grams": 0.001, "Pounds": 0.453592, "Ounces": 0.0283495}
-        from_wt = st.selectbox("From", list(units.keys()))
-        to_wt = filtered_select("To", list(units.keys()), from_wt)
-        result = value * units[from_wt] / units[to_wt]
-        result_text = f"{value} {from_wt} → {result:.2f} {to_wt}"
-        st.session_state.history.append(result_text)
+    if matrix is not None:
+        result = matrix.convert(value, from_unit, to_unit)
+        # Reruns repeat the same conversion; only a changed one is recorded
+        history.add(category, from_unit, to_unit, value, result)
 
         with right:
-            st.metric(label=f"{from_wt} → {to_wt}", value=f"{result:.2f} {to_wt}")
+            st.metric(label=f"{from_unit} → {to_unit}", value=f"{result:.2f} {to_unit}")
+            if category == "Currency" and snapshot.source in ("stale", "offline"):
+                fetched = datetime.fromtimestamp(snapshot.fetched_at).strftime("%d %b %Y %H:%M")
+                st.caption(f"Using saved rates from {fetched} ({snapshot.source}).")
 
 # 📜 Show conversion history
 st.subheader("🕘 Conversion History")
-for entry in reversed(st.session_state.history[-10:]):
-    st.write(entry)
+for record in history.recent(10):
+    st.write(format_record(record))
+usage = history.usage()
+st.caption(
+    f"{usage['records']} of {usage['capacity']} entries kept, "
+    f"{usage['bytes_used'] / 1024:.1f} KB of {usage['max_bytes'] / 1024:.0f} KB"
+    + (f", {usage['evicted']} older entries dropped" if usage["evicted"] else "")
+)
+
+# 📂 Convert a whole column from a file
+st.subheader("📂 Convert a File Column")
+uploaded = st.file_uploader("Upload a CSV or Parquet file", type=["csv", "parquet"])
+if uploaded is not None and matrix is not None:
+    columns = numeric_columns(uploaded, uploaded.name)
+    if not columns:
+        st.warning("No numeric columns found in this file.")
+    else:
+        column = st.selectbox("Column to convert", columns)
+        st.caption(f"Values are converted from {from_unit} to {to_unit} using the selection above.")
+        if st.button("Convert File"):
+            previous = st.session_state.get("converted_file")
+            if previous and os.path.exists(previous["path"]):
+                os.remove(previous["path"])
+            extension = os.path.splitext(uploaded.name)[1].lower()
+            fd, out_path = tempfile.mkstemp(suffix=extension)
+            os.close(fd)
+            uploaded.seek(0)
+            try:
+                with st.spinner("Converting..."):
+                    rows, _ = convert_file(uploaded, uploaded.name, column, matrix, from_unit, to_unit, out_path)
+                st.session_state.converted_file = {"path": out_path, "file_name": f"converted{extension}", "rows": rows}
+            except (pa.ArrowException, ValueError) as e:
+                # e.g. a text value further down a column that looked numeric in the sample
+                os.remove(out_path)
+                st.error(f"Could not convert {uploaded.name}: {e}")
+
+        converted_file = st.session_state.get("converted_file")
+        if converted_file and os.path.exists(converted_file["path"]):
+            st.success(f"Converted {converted_file['rows']:,} rows")
+            with open(converted_file["path"], "rb") as f:
+                st.download_button("📥 Download Converted File", data=f, file_name=converted_file["file_name"])
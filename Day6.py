@@ -1,7 +1,8 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
+import uuid
+from water_storage import WaterStore, DB_FILE
 
 # --- Simulated Date State ---
 if "current_date" not in st.session_state:
@@ -11,45 +12,24 @@ def advance_day():
     st.session_state.current_date += timedelta(days=1)
 
 # --- DB Setup ---
-conn = sqlite3.connect("water_tracker.db", check_same_thread=False)
-cursor = conn.cursor()
-cursor.execute("""
-    CREATE TABLE IF NOT EXISTS intake (
-        date TEXT,
-        amount REAL
-    )
-""")
-conn.commit()
+# One store per server process: a single WAL-mode connection shared by all sessions
+@st.cache_resource
+def get_store():
+    return WaterStore(DB_FILE)
 
 # --- Helper Functions ---
 def log_intake(amount_ml):
-    amount_l = amount_ml / 1000.0
-    date_str = st.session_state.current_date.strftime("%Y-%m-%d")
-    cursor.execute("INSERT INTO intake (date, amount) VALUES (?, ?)", (date_str, amount_l))
-    conn.commit()
+    store.log_intake(user_id, st.session_state.current_date, amount_ml / 1000.0)
 
 def get_today_total():
-    date_str = st.session_state.current_date.strftime("%Y-%m-%d")
-    cursor.execute("SELECT SUM(amount) FROM intake WHERE date = ?", (date_str,))
-    result = cursor.fetchone()[0]
-    return result if result else 0
+    return store.day_total(user_id, st.session_state.current_date)
 
 def clear_today_entries():
-    date_str = st.session_state.current_date.strftime("%Y-%m-%d")
-    cursor.execute("DELETE FROM intake WHERE date = ?", (date_str,))
-    conn.commit()
+    store.clear_day(user_id, st.session_state.current_date)
 
 def get_weekly_data():
     start_date = st.session_state.current_date - timedelta(days=6)
-    start_str = start_date.strftime("%Y-%m-%d")
-    cursor.execute("""
-        SELECT date, SUM(amount) as total
-        FROM intake
-        WHERE date >= ?
-        GROUP BY date
-        ORDER BY date ASC
-    """, (start_str,))
-    rows = cursor.fetchall()
+    rows = store.daily_totals(user_id, start_date, st.session_state.current_date)
     df = pd.DataFrame(rows, columns=["Date", "Total"])
     df["Date"] = pd.to_datetime(df["Date"]).dt.strftime("%d %b")
     return df
@@ -58,6 +38,17 @@ def get_weekly_data():
 st.set_page_config(page_title="Hydration Tracker", layout="centered")
 st.title("💧 Water Intake Tracker")
 
+store = get_store()
+store.maybe_maintain()
+
+# --- User ---
+# Each visitor gets their own log, keyed in the page link so a bookmark brings it back
+if "user" not in st.query_params:
+    st.query_params["user"] = uuid.uuid4().hex[:8]
+user_id = st.sidebar.text_input("👤 Your tracker key", st.query_params["user"]).strip() or st.query_params["user"]
+st.query_params["user"] = user_id
+st.sidebar.caption("Bookmark this page to come back to your log, or enter a key to open another one.")
+
 daily_goal = 3.0  # Liters
 
 # --- Date Control ---
@@ -147,3 +138,16 @@ if not weekly_df.empty:
 else:
     st.write("No data yet. Start logging your intake!")
 
+
+# Long-Range Chart (served from the monthly and yearly rollups)
+st.subheader("📈 Long-Range Hydration")
+period = st.radio("Group by", ["Month", "Year"], horizontal=True)
+if period == "Month":
+    year_ago = st.session_state.current_date.replace(day=1) - timedelta(days=365)
+    long_rows = store.monthly_totals(user_id, year_ago, st.session_state.current_date)
+else:
+    long_rows = store.yearly_totals(user_id)
+if long_rows:
+    st.bar_chart(pd.DataFrame(long_rows, columns=[period, "Total"]).set_index(period))
+else:
+    st.write("No data yet. Start logging your intake!")
@@ -1,15 +1,22 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
 from datetime import datetime
+import os
+import sqlite3
+import tempfile
+from gym_storage import (connect, log_set, history_page, weekly_volume, workout_count, personal_record,
+                         e1rm_trend, E1RM_FORMULAS, PAGE_SIZE, export_workouts, import_workouts)
+from sqlite_connections import ConnectionPool
 
 # --- DB Setup ---
-conn = sqlite3.connect("gym_log.db", check_same_thread=False)
-c = conn.cursor()
-c.execute('''CREATE TABLE IF NOT EXISTS workouts (
-    date TEXT, exercise TEXT, sets INTEGER, reps INTEGER, weight REAL
-)''')
-conn.commit()
+# Shared by every session; a run borrows a connection for each block of queries
+@st.cache_resource
+def get_connections():
+    return ConnectionPool(connect)
+
+# History page cursors: history_cursors[i] is where page i starts
+if "history_cursors" not in st.session_state:
+    st.session_state.history_cursors = [None]
 
 # --- Common Exercises ---
 common_exercises = [
@@ -26,22 +33,95 @@ with st.form("log_form"):
     weight = st.number_input("Weight (kg)", min_value=0.0, step=0.5)
     submitted = st.form_submit_button("Log Workout")
     if submitted:
-        c.execute("INSERT INTO workouts VALUES (?, ?, ?, ?, ?)",
-                  (datetime.today().strftime('%Y-%m-%d'), exercise, sets, reps, weight))
-        conn.commit()
-        st.success("Workout logged!")
+        try:
+            with get_connections().connection() as conn:
+                log_set(conn, datetime.today().date(), exercise, sets, reps, weight)
+            st.session_state.history_cursors = [None]
+            st.success("Workout logged!")
+        except sqlite3.OperationalError:
+            st.error("The log is busy with an import, please try again in a moment.")
 
 # --- History Table ---
 st.subheader("📋 Workout History")
-df = pd.read_sql_query("SELECT * FROM workouts", conn)
-st.dataframe(df)
+cursors = st.session_state.history_cursors
+page = len(cursors) - 1
+with get_connections().connection() as conn:
+    rows, next_cursor = history_page(conn, cursors[-1])
+    total = workout_count(conn)
+st.dataframe(pd.DataFrame(rows, columns=["date", "exercise", "sets", "reps", "weight"]))
+if rows:
+    st.caption(f"Showing {page * PAGE_SIZE + 1:,}–{page * PAGE_SIZE + len(rows):,} of {total:,} entries")
+
+col_newer, col_older = st.columns(2)
+if col_newer.button("⬅️ Newer", disabled=page == 0):
+    cursors.pop()
+    st.rerun()
+if col_older.button("Older ➡️", disabled=next_cursor is None):
+    cursors.append(next_cursor)
+    st.rerun()
 
 # --- Weekly Progress Graph ---
 st.subheader("📈 Weekly Progress")
-if not df.empty:
-    df['volume'] = df['sets'] * df['reps'] * df['weight']
-    df['week'] = pd.to_datetime(df['date']).dt.to_period('W').astype(str)
-    weekly = df.groupby('week')['volume'].sum().reset_index()
+with get_connections().connection() as conn:
+    weekly = pd.DataFrame(weekly_volume(conn), columns=["week", "volume"])
+if not weekly.empty:
     st.bar_chart(weekly.set_index('week'))
 else:
-    st.info("No data yet. Log a workout to see progress.")
\ No newline at end of file
+    st.info("No data yet. Log a workout to see progress.")
+
+# --- Personal Records ---
+st.subheader("🏆 Personal Records")
+pr_exercise = st.selectbox("Exercise", options=common_exercises, key="pr_exercise")
+with get_connections().connection() as conn:
+    record = personal_record(conn, pr_exercise)
+if record:
+    col1, col2, col3, col4 = st.columns(4)
+    for col, label, (value, day), unit in [
+        (col1, "Heaviest Weight", record["max_weight"], "kg"),
+        (col2, "Best e1RM (Epley)", record["best_epley"], "kg"),
+        (col3, "Best e1RM (Brzycki)", record["best_brzycki"], "kg"),
+        (col4, "Best Session Volume", record["best_session_volume"], ""),
+    ]:
+        if value is not None:
+            col.metric(label, f"{value:,.1f} {unit}".strip())
+            col.caption(day)
+
+    formula = st.radio("Estimated 1RM formula", list(E1RM_FORMULAS), horizontal=True)
+    with get_connections().connection() as conn:
+        trend_dates, trend = e1rm_trend(conn, pr_exercise, formula)
+    st.line_chart(pd.DataFrame({"date": trend_dates, "e1RM (kg)": trend}).set_index("date"))
+else:
+    st.info(f"No {pr_exercise} logged yet.")
+
+# --- Backup & Restore ---
+st.subheader("💾 Backup & Restore")
+col_export, col_import = st.columns(2)
+with col_export:
+    export_format = st.selectbox("Export format", ["Parquet", "CSV"])
+    if st.button("Prepare Export"):
+        previous = st.session_state.get("workout_export")
+        if previous and os.path.exists(previous["path"]):
+            os.remove(previous["path"])
+        extension = ".parquet" if export_format == "Parquet" else ".csv"
+        fd, out_path = tempfile.mkstemp(suffix=extension)
+        os.close(fd)
+        with st.spinner("Exporting..."), get_connections().connection() as conn:
+            rows = export_workouts(conn, out_path)
+        st.session_state.workout_export = {"path": out_path, "file_name": f"gym_log{extension}", "rows": rows}
+
+    workout_export = st.session_state.get("workout_export")
+    if workout_export and os.path.exists(workout_export["path"]):
+        st.caption(f"{workout_export['rows']:,} workouts exported")
+        with open(workout_export["path"], "rb") as f:
+            st.download_button("📥 Download Export", data=f, file_name=workout_export["file_name"])
+
+with col_import:
+    upload = st.file_uploader("Import workouts (CSV or Parquet)", type=["csv", "parquet"])
+    if upload is not None and st.button("Import"):
+        try:
+            with st.spinner("Importing..."), get_connections().connection() as conn:
+                imported = import_workouts(conn, upload, upload.name)
+            st.session_state.history_cursors = [None]
+            st.success(f"Imported {imported:,} workouts")
+        except (ValueError, sqlite3.Error) as e:
+            st.error(f"Import failed, nothing was added: {e}")
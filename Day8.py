@@ -1,4 +1,5 @@
 import streamlit as st
+from conversion_engine import currency_matrix
 
 # === Static Exchange Rates ===
 rates = {
@@ -9,6 +10,9 @@ rates = {
     "JPY": 0.56,     # 1 JPY = 0.56 INR
 }
 
+# Any pair is a single lookup in the shared conversion engine
+matrix = currency_matrix(rates, rates_per_base=False)
+
 # === UI ===
 st.title("💱 Currency Converter")
 
@@ -19,8 +23,7 @@ to_currency = st.selectbox("To", list(rates.keys()))
 # === Conversion Logic ===
 if st.button("Convert"):
     try:
-        inr_value = amount * rates[from_currency]
-        converted = inr_value / rates[to_currency]
+        converted = matrix.convert(amount, from_currency, to_currency)
         st.success(f"{amount:.2f} {from_currency} = {converted:.2f} {to_currency}")
     except Exception as e:
         st.error(f"Conversion failed: {e}")
\ No newline at end of file
@@ -1,160 +1,55 @@
 import streamlit as st
+import uuid
+from question_bank import connect, get_question, get_topics, sample_question_ids, DIFFICULTIES
+import quiz_analytics
+from sqlite_connections import ConnectionPool
+from adaptive_quiz import AdaptiveEngine
 
 # -----------------------------
-# Prompt Engineering Questions
+# Question Bank
 # -----------------------------
-questions = [
-    {
-        "question": "What does Prompt Engineering refer to?",
-        "options": [
-            "A method for training neural networks",
-            "A technique for generating content",
-            "A process of designing and crafting input prompts to optimize the output of AI models",
-            "A method for evaluating AI models"
-        ],
-        "answer": "A process of designing and crafting input prompts to optimize the output of AI models"
-    },
-    {
-        "question": "Why is prompt engineering important in AI?",
-        "options": [
-            "It helps reduce model size",
-            "It improves the quality and relevance of model outputs",
-            "It increases training speed",
-            "It eliminates the need for datasets"
-        ],
-        "answer": "It improves the quality and relevance of model outputs"
-    },
-    {
-        "question": "Which strategy best reduces hallucinations in LLM outputs?",
-        "options": [
-            "Use creative prompts with open-ended phrasing",
-            "Provide realistic constraints and context",
-            "Ignore rare user inputs",
-            "Increase temperature parameter"
-        ],
-        "answer": "Provide realistic constraints and context"
-    },
-    {
-        "question": "What does 'few-shot prompting' involve?",
-        "options": [
-            "Training the model with millions of examples",
-            "Providing a single example and expecting generalization",
-            "Giving a few examples to guide the model's behavior",
-            "Using reinforcement learning with feedback loops"
-        ],
-        "answer": "Giving a few examples to guide the model's behavior"
-    },
-    {
-        "question": "How can you shorten LLM responses without losing quality?",
-        "options": [
-            "Increase batch size during inference",
-            "Use more vague prompts",
-            "Set a max token limit and use specific prompts",
-            "Reduce model attention span"
-        ],
-        "answer": "Set a max token limit and use specific prompts"
-    },
-    {
-        "question": "What is 'bias amplification' in AI systems?",
-        "options": [
-            "Underperformance due to noisy data",
-            "Overfitting training data",
-            "Exaggeration of existing biases in outputs",
-            "Improved accuracy through repetition"
-        ],
-        "answer": "Exaggeration of existing biases in outputs"
-    },
-    {
-        "question": "Which method improves prompt relevance and clarity?",
-        "options": [
-            "Iteratively refine based on model output",
-            "Increase training epochs",
-            "Add random tokens to diversify output",
-            "Use vague instructions"
-        ],
-        "answer": "Iteratively refine based on model output"
-    },
-    {
-        "question": "What is chain-of-thought prompting?",
-        "options": [
-            "A way to chain multiple models together",
-            "A method to generate step-by-step reasoning",
-            "A technique for compressing prompts",
-            "A way to randomize model outputs"
-        ],
-        "answer": "A method to generate step-by-step reasoning"
-    },
-    {
-        "question": "Which prompt style is best for classification tasks?",
-        "options": [
-            "Open-ended narrative prompts",
-            "Multiple-choice format with clear labels",
-            "Creative writing prompts",
-            "Conversational prompts"
-        ],
-        "answer": "Multiple-choice format with clear labels"
-    },
-    {
-        "question": "What does temperature control in LLMs affect?",
-        "options": [
-            "Model size",
-            "Output randomness",
-            "Training speed",
-            "Token limit"
-        ],
-        "answer": "Output randomness"
-    },
-    {
-        "question": "Which of the following is a benefit of zero-shot prompting?",
-        "options": [
-            "Requires labeled data",
-            "Works without examples",
-            "Needs fine-tuning",
-            "Reduces inference time"
-        ],
-        "answer": "Works without examples"
-    },
-    {
-        "question": "How can developers ensure generative AI avoids spreading misinformation?",
-        "options": [
-            "Using current and reliable sources",
-            "Encouraging creativity over accuracy",
-            "Reducing model size",
-            "Using vague prompts"
-        ],
-        "answer": "Using current and reliable sources"
-    },
-    {
-        "question": "What is the role of context in prompt engineering?",
-        "options": [
-            "It limits model creativity",
-            "It helps guide the model toward relevant outputs",
-            "It increases training time",
-            "It reduces token usage"
-        ],
-        "answer": "It helps guide the model toward relevant outputs"
-    },
-    {
-        "question": "Which prompt format is most effective for multilingual tasks?",
-        "options": [
-            "Monolingual prompts only",
-            "Prompts with translation examples",
-            "Prompts with emojis",
-            "Prompts with random tokens"
-        ],
-        "answer": "Prompts with translation examples"
-    },
-    {
-        "question": "What is the main goal of prompt tuning?",
-        "options": [
-            "To train a new model",
-            "To adjust model architecture",
-            "To optimize prompt inputs for better performance",
-            "To reduce dataset size"
-        ],
-        "answer": "To optimize prompt inputs for better performance"
-    }
-]
+QUIZ_LENGTH = 20
+
+# Questions live in questions.jsonl, synced into an indexed SQLite bank once per process
+@st.cache_resource
+def get_bank():
+    return connect()
+
+# Attempts and per-question counters, kept across restarts; a run borrows a
+# connection while it records or reads them
+@st.cache_resource
+def get_analytics():
+    return ConnectionPool(quiz_analytics.connect)
+
+# Question ratings and difficulty-sorted indexes for adaptive mode, shared by all sessions
+@st.cache_resource
+def get_engine():
+    return AdaptiveEngine.from_bank(get_bank())
+
+bank = get_bank()
+engine = get_engine()
+
+def selected_topic():
+    topic = st.session_state.get("quiz_topic")
+    return topic if topic != "All" else None
+
+def new_quiz():
+    """Sample a fresh set of question IDs for the chosen topic and difficulty.
+
+    In adaptive mode only the first question is chosen up front; the rest are
+    picked one at a time from the learner's ability estimate.
+    """
+    st.session_state.quiz_id = uuid.uuid4().hex
+    st.session_state.ability = 0.0
+    if st.session_state.get("quiz_mode") == "Adaptive":
+        first = engine.pick(0.0, topic=selected_topic())
+        st.session_state.quiz_ids = [first] if first is not None else []
+        return
+    st.session_state.quiz_ids = sample_question_ids(
+        bank, QUIZ_LENGTH,
+        topic=selected_topic(),
+        difficulty=st.session_state.get("quiz_difficulty") if st.session_state.get("quiz_difficulty") != "All" else None
+    )
 
 # -----------------------------
 # Session State Initialization
@@ -167,6 +62,8 @@ if "answers" not in st.session_state:
     st.session_state.answers = []
 if "feedback" not in st.session_state:
     st.session_state.feedback = []
+if "quiz_ids" not in st.session_state:
+    new_quiz()
 
 # -----------------------------
 # Feedback Generator
@@ -182,18 +79,38 @@ def get_feedback(is_correct):
 # Quiz Logic
 # -----------------------------
 def next_question(selected_option):
-    q = questions[st.session_state.current_q]
+    q = get_question(bank, st.session_state.quiz_ids[st.session_state.current_q])
     is_correct = selected_option == q["answer"]
     if is_correct:
         st.session_state.score += 1
     st.session_state.answers.append(selected_option)
     st.session_state.feedback.append(get_feedback(is_correct))
+    with get_analytics().connection() as analytics:
+        quiz_analytics.record_attempt(analytics, st.session_state.quiz_id, q["id"], selected_option, is_correct)
+    if st.session_state.get("quiz_mode") == "Adaptive":
+        st.session_state.ability = engine.update(
+            st.session_state.ability, st.session_state.current_q, q["id"], is_correct
+        )
     st.session_state.current_q += 1
+    pick_next()
+
+def pick_next():
+    """In adaptive mode, add the question that best fits the current ability."""
+    quiz_ids = st.session_state.quiz_ids
+    if st.session_state.get("quiz_mode") != "Adaptive" or len(quiz_ids) >= QUIZ_LENGTH:
+        return
+    question_id = engine.pick(st.session_state.ability, set(quiz_ids), selected_topic())
+    if question_id is not None:
+        quiz_ids.append(question_id)
 
 def skip_question():
+    question_id = st.session_state.quiz_ids[st.session_state.current_q]
+    with get_analytics().connection() as analytics:
+        quiz_analytics.record_attempt(analytics, st.session_state.quiz_id, question_id, None, False)
     st.session_state.answers.append("Skipped")
     st.session_state.feedback.append("⏭️ Skipped")
     st.session_state.current_q += 1
+    pick_next()
 
 # -----------------------------
 # UI Rendering
@@ -201,10 +118,29 @@ def skip_question():
 st.title("🧠 Prompt Engineering Quiz")
 st.write("Test your knowledge of prompt engineering. Get instant feedback and a detailed review at the end!")
 
-if st.session_state.current_q < len(questions):
-    q = questions[st.session_state.current_q]
+def reset_quiz():
+    st.session_state.score = 0
+    st.session_state.current_q = 0
+    st.session_state.answers = []
+    st.session_state.feedback = []
+    new_quiz()
+
+# Changing the mode or a filter starts a new quiz
+st.sidebar.selectbox("Mode", ["Random", "Adaptive"], key="quiz_mode", on_change=reset_quiz)
+st.sidebar.selectbox("Topic", ["All"] + get_topics(bank), key="quiz_topic", on_change=reset_quiz)
+# Adaptive mode chooses the difficulty itself
+st.sidebar.selectbox("Difficulty", ["All"] + DIFFICULTIES, key="quiz_difficulty", on_change=reset_quiz,
+                     disabled=st.session_state.quiz_mode == "Adaptive")
+if st.session_state.quiz_mode == "Adaptive":
+    st.sidebar.caption(f"Ability estimate: {st.session_state.ability:+.2f}")
+
+quiz_ids = st.session_state.quiz_ids
+if not quiz_ids:
+    st.warning("No questions match these filters.")
+elif st.session_state.current_q < len(quiz_ids):
+    q = get_question(bank, quiz_ids[st.session_state.current_q])
     st.subheader(f"Question {st.session_state.current_q + 1}")
-    selected = st.radio(q["question"], q["options"], key=st.session_state.current_q)
+    selected = st.radio(q["question"], q["options"], key=f"q{st.session_state.current_q}_{q['id']}")
 
     col1, col2 = st.columns(2)
     with col1:
@@ -215,10 +151,13 @@ if st.session_state.current_q < len(questions):
             skip_question()
 else:
     st.success("🎉 Quiz Completed!")
-    st.write(f"✅ Final Score: {st.session_state.score} / {len(questions)}")
+    st.write(f"✅ Final Score: {st.session_state.score} / {len(quiz_ids)}")
+    if st.session_state.quiz_mode == "Adaptive":
+        st.write(f"📈 Ability estimate: {st.session_state.ability:+.2f} (0 is a typical learner)")
 
     st.subheader("📋 Detailed Review")
-    for i, q in enumerate(questions):
+    for i, question_id in enumerate(quiz_ids):
+        q = get_question(bank, question_id)
         st.markdown(f"**Q{i+1}: {q['question']}**")
         st.write(f"Your answer: `{st.session_state.answers[i]}`")
         st.write(f"Correct answer: `{q['answer']}`")
@@ -226,7 +165,36 @@ else:
         st.markdown("---")
 
     if st.button("Restart Quiz"):
-        st.session_state.score = 0
-        st.session_state.current_q = 0
-        st.session_state.answers = []
-        st.session_state.feedback = []
\ No newline at end of file
+        reset_quiz()
+
+# -----------------------------
+# Instructor View
+# -----------------------------
+with st.expander("📊 Item Difficulty (instructor view)"):
+    with get_analytics().connection() as analytics:
+        st.caption(f"{quiz_analytics.attempt_count(analytics):,} attempts recorded")
+        order = st.radio("Show", ["Hardest", "Easiest"], horizontal=True)
+        rows = quiz_analytics.item_difficulty(analytics, hardest=order == "Hardest")
+        if rows:
+            questions_by_id = {question_id: get_question(bank, question_id) for question_id, *_ in rows}
+            st.dataframe([
+                {
+                    "Question": questions_by_id[question_id]["question"] if questions_by_id[question_id] else f"#{question_id}",
+                    "Attempts": attempts,
+                    "Correct": f"{correct_rate:.0%}",
+                    "Skipped": f"{skip_rate:.0%}",
+                }
+                for question_id, attempts, correct_rate, skip_rate in rows
+            ], use_container_width=True)
+
+            picked_id = st.selectbox(
+                "Option distribution for",
+                [question_id for question_id, *_ in rows],
+                format_func=lambda question_id: questions_by_id[question_id]["question"] if questions_by_id[question_id] else f"#{question_id}"
+            )
+            picks = quiz_analytics.option_distribution(analytics, picked_id)
+            picked = questions_by_id[picked_id]
+            options = picked["options"] if picked else list(picks)
+            st.bar_chart({"Picks": {option: picks.get(option, 0) for option in options}})
+        else:
+            st.write(f"No question has {quiz_analytics.MIN_ATTEMPTS} attempts yet.")
@@ -0,0 +1,216 @@
+# Adaptive question selection for the prompt engineering quiz (Day9).
+#
+# Learners and questions share one Elo-style scale (in logits): a learner with
+# ability a answers a question with rating r correctly with probability
+# 1 / (1 + e^(r - a)). After every answer both numbers move towards what was
+# observed. The next question is the unasked one whose rating gives the target
+# chance of success, found by bisecting a difficulty-sorted index instead of
+# scanning the bank.
+#
+# Question ratings start from their difficulty label, are saved in the bank
+# database and the sorted index is rebuilt after every REBUILD_EVERY updates.
+#
+# Run `python adaptive_quiz.py [learners] [bank_size]` to simulate synthetic
+# learners and time each pick.
+import math
+import random
+import threading
+import time
+from bisect import bisect_left
+
+DIFFICULTY_PRIOR = {"easy": -1.0, "medium": 0.0, "hard": 1.0}
+TARGET_SUCCESS = 0.5
+LEARNER_K = 1.0
+LEARNER_K_MIN = 0.2
+QUESTION_K = 0.05
+REBUILD_EVERY = 500
+# Pick at random among this many nearest questions, so learners at the same
+# ability do not all get the same questions
+CANDIDATES = 5
+
+
+def expected_score(ability, rating):
+    """Chance that a learner with `ability` answers a question rated `rating` correctly."""
+    return 1 / (1 + math.exp(rating - ability))
+
+
+def learner_k(answered):
+    """Large steps for a new learner, smaller ones as evidence builds up."""
+    return max(LEARNER_K_MIN, LEARNER_K / (1 + 0.25 * answered))
+
+
+# -----------------------------
+# Difficulty-Sorted Index
+# -----------------------------
+class DifficultyIndex:
+    """Question IDs sorted by rating, for nearest-rating lookups."""
+
+    def __init__(self, ratings):
+        pairs = sorted((rating, question_id) for question_id, rating in ratings.items())
+        self.ratings = [rating for rating, _ in pairs]
+        self.ids = [question_id for _, question_id in pairs]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nearest(self, target, exclude=(), count=1):
+        """Up to `count` questions closest to `target` that are not in `exclude`.
+
+        O(log n) to find the position, then one step outward per question
+        returned or excluded.
+        """
+        right = bisect_left(self.ratings, target)
+        left = right - 1
+        n = len(self.ids)
+        found = []
+        while len(found) < count and (left >= 0 or right < n):
+            if right >= n or (left >= 0 and target - self.ratings[left] <= self.ratings[right] - target):
+                candidate, left = self.ids[left], left - 1
+            else:
+                candidate, right = self.ids[right], right + 1
+            if candidate not in exclude:
+                found.append(candidate)
+        return found
+
+
+# -----------------------------
+# Engine
+# -----------------------------
+class AdaptiveEngine:
+    def __init__(self, ratings, topics=None, conn=None, target_success=TARGET_SUCCESS,
+                 candidates=CANDIDATES, rng=None):
+        """`ratings` is {question_id: rating}; `topics` optionally {question_id: topic}."""
+        self.ratings = dict(ratings)
+        self.answers = {}
+        self.candidates = candidates
+        self.rng = rng or random.Random()
+        self.topics = dict(topics or {})
+        self.conn = conn
+        # Rating offset that gives the target chance of success
+        self.offset = math.log(1 / target_success - 1)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self._build()
+
+    @classmethod
+    def from_bank(cls, conn, **kwargs):
+        """Load ratings saved in the question bank, defaulting to the difficulty label."""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS question_ratings (
+                question_id INTEGER PRIMARY KEY,
+                rating REAL NOT NULL,
+                answers INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+        rows = conn.execute("""
+            SELECT q.id, q.topic, q.difficulty, r.rating, r.answers
+            FROM questions q LEFT JOIN question_ratings r ON r.question_id = q.id
+        """).fetchall()
+        ratings = {qid: rating if rating is not None else DIFFICULTY_PRIOR[difficulty]
+                   for qid, _, difficulty, rating, _ in rows}
+        engine = cls(ratings, {qid: topic for qid, topic, _, _, _ in rows}, conn, **kwargs)
+        engine.answers = {qid: answers for qid, _, _, _, answers in rows if answers}
+        return engine
+
+    def _build(self):
+        self.indexes = {None: DifficultyIndex(self.ratings)}
+        by_topic = {}
+        for question_id, topic in self.topics.items():
+            by_topic.setdefault(topic, {})[question_id] = self.ratings[question_id]
+        for topic, ratings in by_topic.items():
+            self.indexes[topic] = DifficultyIndex(ratings)
+        self.pending = 0
+
+    def pick(self, ability, asked=(), topic=None):
+        """Next question for a learner, or None when every question has been asked."""
+        index = self.indexes.get(topic)
+        if index is None:
+            return None
+        found = index.nearest(ability - self.offset, asked, self.candidates)
+        return self.rng.choice(found) if found else None
+
+    def update(self, ability, answered, question_id, correct):
+        """Apply one answer. Returns the learner's new ability."""
+        with self.lock:
+            rating = self.ratings[question_id]
+            surprise = (1 if correct else 0) - expected_score(ability, rating)
+            self.ratings[question_id] = rating - QUESTION_K * surprise
+            self.answers[question_id] = self.answers.get(question_id, 0) + 1
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute("""
+                        INSERT INTO question_ratings (question_id, rating, answers) VALUES (?, ?, 1)
+                        ON CONFLICT (question_id) DO UPDATE SET rating = excluded.rating, answers = answers + 1
+                    """, (question_id, self.ratings[question_id]))
+            self.pending += 1
+            if self.pending >= REBUILD_EVERY:
+                self._build()
+        return ability + learner_k(answered) * surprise
+
+
+# -----------------------------
+# Simulation
+# -----------------------------
+def simulate(learners=5000, bank_size=100_000, questions_each=20, seed=0):
+    """Run synthetic learners with known abilities against a bank with known difficulty.
+
+    Returns (pick_times, rmse_by_step, engine, true_difficulty): per-pick
+    latencies in seconds, the RMSE of the ability estimate after each question,
+    the engine and the difficulty each question was generated with.
+    """
+    rng = random.Random(seed)
+    true_difficulty = {qid: rng.gauss(0, 1.2) for qid in range(1, bank_size + 1)}
+    # Labels are a coarse, noisy prior, as a question author would give them
+    labels = {qid: "easy" if b < -0.6 else "hard" if b > 0.6 else "medium" for qid, b in true_difficulty.items()}
+    engine = AdaptiveEngine({qid: DIFFICULTY_PRIOR[label] for qid, label in labels.items()}, rng=rng)
+
+    pick_times = []
+    squared_errors = [0.0] * questions_each
+    for _ in range(learners):
+        true_ability = rng.gauss(0, 1)
+        ability, asked = 0.0, set()
+        for step in range(questions_each):
+            start = time.perf_counter()
+            question_id = engine.pick(ability, asked)
+            pick_times.append(time.perf_counter() - start)
+            asked.add(question_id)
+            correct = rng.random() < expected_score(true_ability, true_difficulty[question_id])
+            ability = engine.update(ability, step, question_id, correct)
+            squared_errors[step] += (ability - true_ability) ** 2
+    rmse = [math.sqrt(total / learners) for total in squared_errors]
+    return pick_times, rmse, engine, true_difficulty
+
+
+if __name__ == "__main__":
+    import sys
+
+    learners = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    bank_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    pick_times, rmse, engine, true_difficulty = simulate(learners, bank_size)
+    pick_times.sort()
+    print(f"{learners:,} learners × 20 questions on a {bank_size:,}-question bank")
+    print(f"  pick latency: median {pick_times[len(pick_times) // 2] * 1e6:.1f} µs, "
+          f"p99 {pick_times[int(len(pick_times) * 0.99)] * 1e6:.1f} µs")
+
+    # The same pick done by scanning every rating
+    ratings = engine.ratings
+    start = time.perf_counter()
+    for _ in range(100):
+        min(ratings, key=lambda qid: abs(ratings[qid]))
+    print(f"  linear scan of the bank: {(time.perf_counter() - start) / 100 * 1e3:.1f} ms per pick")
+
+    print("  ability RMSE after question: " + ", ".join(
+        f"{step + 1}: {value:.2f}" for step, value in enumerate(rmse) if step in (0, 4, 9, 14, 19)))
+    print("  (guessing the average ability for everyone gives RMSE 1.00)")
+
+    answered = [qid for qid, count in engine.answers.items() if count >= 20]
+    if len(answered) > 1:
+        xs = [true_difficulty[qid] for qid in answered]
+        ys = [ratings[qid] for qid in answered]
+        mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+        cov = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+        corr = cov / math.sqrt(sum((x - mx) ** 2 for x in xs) * sum((y - my) ** 2 for y in ys))
+        print(f"  {len(engine.answers):,} questions used; for the {len(answered):,} answered 20+ times, "
+              f"rating vs true difficulty correlation {corr:.2f}")
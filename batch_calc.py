@@ -0,0 +1,143 @@
+# Batch mode for the calculator (Day3).
+#
+# Applies one of the calculator operations to two numeric columns of a CSV or
+# Parquet file. Files are read in fixed-size chunks and each chunk is computed
+# with a single NumPy call, so memory stays bounded even for very large files.
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 500_000
+CSV_BLOCK_BYTES = 16 * 1024 * 1024
+
+# Button label -> (operation name, NumPy function)
+OPERATIONS = {
+    "➕": ("Addition", np.add),
+    "➖": ("Subtraction", np.subtract),
+    "✖": ("Multiplication", np.multiply),
+    "➗": ("Division", np.true_divide),
+    "%": ("Modulus", np.mod),
+    "^": ("Exponentiation", np.power),
+    "//": ("Floor Division", np.floor_divide),
+}
+
+# Operations that are undefined when the second number is zero
+DIVIDING_OPERATIONS = {"➗", "%", "//"}
+
+
+# -----------------------------
+# Vectorised Operations
+# -----------------------------
+def apply_operation(a, b, symbol):
+    """Apply an operation element-wise and return a masked array.
+
+    Division by zero, invalid inputs and overflow are masked instead of raising.
+    """
+    # Inputs that are already masked stay masked
+    input_mask = np.ma.getmaskarray(a) | np.ma.getmaskarray(b)
+    a = np.asarray(np.ma.getdata(a), dtype=np.float64)
+    b = np.asarray(np.ma.getdata(b), dtype=np.float64)
+    _, func = OPERATIONS[symbol]
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        result = func(a, b)
+    mask = input_mask | ~np.isfinite(result)
+    if symbol in DIVIDING_OPERATIONS:
+        mask |= b == 0
+    return np.ma.masked_array(result, mask=mask)
+
+
+# -----------------------------
+# Chunked File Reading
+# -----------------------------
+def _is_parquet(file_name):
+    return file_name.lower().endswith(".parquet")
+
+
+def numeric_columns(file, file_name):
+    """Return the numeric column names, reading only the schema or a small sample."""
+    if _is_parquet(file_name):
+        schema = pq.ParquetFile(file).schema_arrow
+        columns = [
+            field.name for field in schema
+            if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+        ]
+    else:
+        sample = pd.read_csv(file, nrows=1000)
+        columns = sample.select_dtypes("number").columns.tolist()
+    file.seek(0)
+    return columns
+
+
+def iter_chunks(file, file_name, columns, chunk_rows=CHUNK_ROWS):
+    """Yield pyarrow RecordBatches holding only the requested columns.
+
+    CSV columns are read as float64: Arrow would otherwise fix each type from
+    the first block, so an integer column with a 1.5 further down, or one that
+    starts empty, would fail mid-file.
+    """
+    if _is_parquet(file_name):
+        yield from pq.ParquetFile(file).iter_batches(batch_size=chunk_rows, columns=columns)
+    else:
+        reader = pa_csv.open_csv(
+            file,
+            read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns,
+                column_types={name: pa.float64() for name in columns}
+            )
+        )
+        yield from reader
+
+
+def _column(batch, name):
+    return batch.column(batch.schema.get_field_index(name)).to_numpy(zero_copy_only=False)
+
+
+# -----------------------------
+# Batch Processing
+# -----------------------------
+def write_results(file, file_name, columns, compute, result_name, out_path, chunk_rows=CHUNK_ROWS):
+    """Stream `columns` of a file through `compute` and write them plus the result to `out_path`.
+
+    `compute` receives {column: NumPy array} for one chunk and returns a masked
+    array. The output has the same format as the input and masked results are
+    written as nulls (empty cells in CSV). Returns (rows, masked_rows).
+    """
+    writer = None
+    rows = masked = 0
+    try:
+        for batch in iter_chunks(file, file_name, columns, chunk_rows):
+            result = compute({name: _column(batch, name) for name in columns})
+            # Constant expressions give a single value, so spread it over the chunk
+            values = np.broadcast_to(np.ma.getdata(result), (batch.num_rows,))
+            mask = np.broadcast_to(np.ma.getmaskarray(result), (batch.num_rows,))
+            data = {name: batch.column(batch.schema.get_field_index(name)) for name in columns}
+            data[result_name] = pa.array(values, mask=mask)
+            table = pa.table(data)
+            if writer is None:
+                if _is_parquet(file_name):
+                    writer = pq.ParquetWriter(out_path, table.schema)
+                else:
+                    writer = pa_csv.CSVWriter(out_path, table.schema)
+            writer.write_table(table)
+            rows += batch.num_rows
+            masked += int(mask.sum())
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows, masked
+
+
+def process_file(file, file_name, col_a, col_b, symbol, out_path, chunk_rows=CHUNK_ROWS):
+    """Compute `col_a <op> col_b` for every row and write the result to `out_path`."""
+    operation_name, _ = OPERATIONS[symbol]
+    return write_results(
+        file, file_name,
+        list(dict.fromkeys([col_a, col_b])),
+        lambda values: apply_operation(values[col_a], values[col_b], symbol),
+        f"{operation_name} Result",
+        out_path,
+        chunk_rows
+    )
@@ -0,0 +1,158 @@
+# Persistent BMI history for the BMI calculator (Day4).
+#
+# Measurements live in an SQLite table indexed by (person, ts). Daily and weekly
+# rollups are updated on every insert, so trend charts read a handful of
+# pre-aggregated rows instead of the whole history, and are then thinned with
+# Largest-Triangle-Three-Buckets (LTTB) so a chart never gets more than a few
+# hundred points.
+import sqlite3
+from datetime import datetime, timedelta
+
+DB_FILE = "bmi_history.db"
+MAX_CHART_POINTS = 300
+
+ROLLUP_TABLES = {"Day": "bmi_daily", "Week": "bmi_weekly"}
+
+
+# -----------------------------
+# DB Setup
+# -----------------------------
+def connect(path=DB_FILE):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS measurements (
+            id INTEGER PRIMARY KEY,
+            person TEXT NOT NULL,
+            ts TEXT NOT NULL,
+            age INTEGER,
+            height REAL,
+            weight REAL,
+            bmi REAL NOT NULL,
+            category TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_measurements_person_ts ON measurements (person, ts);
+
+        CREATE TABLE IF NOT EXISTS people (
+            person TEXT PRIMARY KEY,
+            last_ts TEXT NOT NULL,
+            measurements INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_people_last_ts ON people (last_ts);
+    """)
+    for table in ROLLUP_TABLES.values():
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                person TEXT NOT NULL,
+                period TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                bmi_sum REAL NOT NULL,
+                bmi_min REAL NOT NULL,
+                bmi_max REAL NOT NULL,
+                PRIMARY KEY (person, period)
+            ) WITHOUT ROWID
+        """)
+    conn.commit()
+    return conn
+
+
+def _periods(ts):
+    day = ts.date()
+    week_start = day - timedelta(days=day.weekday())
+    return {"bmi_daily": day.isoformat(), "bmi_weekly": week_start.isoformat()}
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+def add_measurement(conn, person, age, height, weight, bmi, category, ts=None):
+    """Store one measurement and fold it into the daily and weekly rollups."""
+    ts = ts or datetime.now()
+    ts_text = ts.isoformat(timespec="seconds")
+    with conn:
+        conn.execute(
+            "INSERT INTO measurements (person, ts, age, height, weight, bmi, category) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (person, ts_text, age, height, weight, bmi, category)
+        )
+        conn.execute("""
+            INSERT INTO people (person, last_ts, measurements) VALUES (?, ?, 1)
+            ON CONFLICT (person) DO UPDATE SET
+                last_ts = MAX(last_ts, excluded.last_ts),
+                measurements = measurements + 1
+        """, (person, ts_text))
+        for table, period in _periods(ts).items():
+            conn.execute(f"""
+                INSERT INTO {table} (person, period, n, bmi_sum, bmi_min, bmi_max) VALUES (?, ?, 1, ?, ?, ?)
+                ON CONFLICT (person, period) DO UPDATE SET
+                    n = n + 1,
+                    bmi_sum = bmi_sum + excluded.bmi_sum,
+                    bmi_min = MIN(bmi_min, excluded.bmi_min),
+                    bmi_max = MAX(bmi_max, excluded.bmi_max)
+            """, (person, period, bmi, bmi, bmi))
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def get_people(conn):
+    """People ordered by most recent measurement first."""
+    return [row[0] for row in conn.execute("SELECT person FROM people ORDER BY last_ts DESC")]
+
+
+def recent_measurements(conn, person, limit=10):
+    return conn.execute("""
+        SELECT ts, age, height, weight, bmi, category
+        FROM measurements
+        WHERE person = ?
+        ORDER BY ts DESC
+        LIMIT ?
+    """, (person, limit)).fetchall()
+
+
+def get_trend(conn, person, granularity="Day", max_points=MAX_CHART_POINTS):
+    """Return [(period, mean_bmi)] from the rollup, downsampled to at most `max_points`."""
+    table = ROLLUP_TABLES[granularity]
+    rows = conn.execute(
+        f"SELECT period, bmi_sum / n FROM {table} WHERE person = ? ORDER BY period",
+        (person,)
+    ).fetchall()
+    return lttb(rows, max_points)
+
+
+# -----------------------------
+# Downsampling
+# -----------------------------
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of [(x, y)] points.
+
+    Keeps the first and last point and, from every bucket in between, the point
+    that forms the largest triangle with its neighbours, which preserves peaks
+    and dips. x values may be ISO date strings.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    xs = [datetime.fromisoformat(x).toordinal() if isinstance(x, str) else x for x, _ in points]
+    ys = [y for _, y in points]
+    bucket_size = (n - 2) / (threshold - 2)
+
+    sampled = [points[0]]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket is the third corner of the triangle
+        next_start, next_end = end, min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        best_area, best = -1, start
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best_area, best = area, j
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
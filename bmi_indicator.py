@@ -0,0 +1,139 @@
+# Vertical BMI range indicator for the BMI calculator (Day4).
+#
+# The 26 rows of the indicator (BMI 35 down to 10) never change except for the
+# one row that is highlighted, so every row is built once at import time and an
+# indicator is just a join of those pieces. Results are cached per integer BMI.
+#
+# Run `python bmi_indicator.py` to benchmark against the old string-concatenation
+# version.
+import html
+import random
+import time
+from functools import lru_cache
+
+TOP, BOTTOM = 35, 10
+
+# Row templates as rendered in the Streamlit sidebar (inline styles)
+INLINE_ROWS = {
+    "highlight": "<div style='background-color:#4B8BBE;color:white;padding:2px;'>⬅️ {i}</div>",
+    "underweight": "<div style='background-color:#FFD1DC;padding:2px;'>{i}</div>",
+    "normal": "<div style='background-color:#C1F0C1;padding:2px;'>{i}</div>",
+    "overweight": "<div style='background-color:#FFDD99;padding:2px;'>{i}</div>",
+}
+
+# Row templates for reports, styled once by REPORT_CSS to keep large reports small
+CLASS_ROWS = {
+    "highlight": "<div class='h'>⬅️ {i}</div>",
+    "underweight": "<div class='u'>{i}</div>",
+    "normal": "<div class='n'>{i}</div>",
+    "overweight": "<div class='o'>{i}</div>",
+}
+REPORT_CSS = (
+    ".card{display:inline-block;width:120px;margin:6px;vertical-align:top;font-family:sans-serif;}"
+    ".card div{padding:2px;}"
+    ".h{background-color:#4B8BBE;color:white;}"
+    ".u{background-color:#FFD1DC;}"
+    ".n{background-color:#C1F0C1;}"
+    ".o{background-color:#FFDD99;}"
+)
+
+LEVELS = list(range(TOP, BOTTOM - 1, -1))
+
+
+def _band(i):
+    if i < 18.5:
+        return "underweight"
+    elif i < 25:
+        return "normal"
+    return "overweight"
+
+
+class RangeBar:
+    """Precomputed rows for one set of templates, with a cached bar per level."""
+
+    def __init__(self, templates):
+        self.plain_rows = [templates[_band(i)].format(i=i) for i in LEVELS]
+        self.highlight_rows = [templates["highlight"].format(i=i) for i in LEVELS]
+        self.plain_bar = "".join(self.plain_rows)
+        self.for_level = lru_cache(maxsize=None)(self._build)
+
+    def _build(self, level):
+        if not BOTTOM <= level <= TOP:
+            return self.plain_bar
+        pos = TOP - level
+        return "".join(self.plain_rows[:pos]) + self.highlight_rows[pos] + "".join(self.plain_rows[pos + 1:])
+
+    def render(self, bmi_val):
+        if bmi_val is None or bmi_val != bmi_val:  # None or NaN
+            return self.plain_bar
+        level = int(bmi_val)
+        # Every value outside the scale shares the un-highlighted bar
+        if not BOTTOM <= level <= TOP:
+            level = TOP + 1
+        return self.for_level(level)
+
+
+INLINE_BAR = RangeBar(INLINE_ROWS)
+REPORT_BAR = RangeBar(CLASS_ROWS)
+
+
+def render_range_bar(bmi_val):
+    """HTML for the indicator with the row for int(bmi_val) highlighted."""
+    return INLINE_BAR.render(bmi_val)
+
+
+def render_cohort_report(names, bmis, title="BMI Range Report"):
+    """One HTML document with an indicator card for every person."""
+    render = REPORT_BAR.render
+    cards = [
+        f"<div class='card'><b>{html.escape(str(name))}</b><div>BMI {bmi}</div>{render(bmi)}</div>"
+        for name, bmi in zip(names, bmis)
+    ]
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+        f"<style>{REPORT_CSS}</style></head>"
+        f"<body><h2>{html.escape(title)}</h2>{''.join(cards)}</body></html>"
+    )
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def _render_range_bar_concat(bmi_val):
+    # The original Day4 implementation, kept here only for comparison
+    bar = ""
+    for i in range(35, 9, -1):
+        if i == int(bmi_val):
+            bar += f"<div style='background-color:#4B8BBE;color:white;padding:2px;'>⬅️ {i}</div>"
+        elif i < 18.5:
+            bar += f"<div style='background-color:#FFD1DC;padding:2px;'>{i}</div>"
+        elif i < 25:
+            bar += f"<div style='background-color:#C1F0C1;padding:2px;'>{i}</div>"
+        else:
+            bar += f"<div style='background-color:#FFDD99;padding:2px;'>{i}</div>"
+    return bar
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    bmis = [round(rng.uniform(8, 40), 1) for _ in range(100_000)]
+    assert all(render_range_bar(b) == _render_range_bar_concat(b) for b in bmis[:1000])
+
+    start = time.perf_counter()
+    for b in bmis:
+        _render_range_bar_concat(b)
+    concat_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for b in bmis:
+        render_range_bar(b)
+    cached_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report = render_cohort_report([f"Person {i}" for i in range(len(bmis))], bmis)
+    report_time = time.perf_counter() - start
+
+    print(f"{len(bmis):,} indicators")
+    print(f"  string concatenation: {concat_time:.3f}s")
+    print(f"  cached template:      {cached_time:.3f}s ({concat_time / cached_time:.0f}x faster)")
+    print(f"  full cohort report:   {report_time:.3f}s, {len(report) / 1e6:.1f} MB of HTML")
@@ -0,0 +1,210 @@
+# BMI scoring for the BMI calculator (Day4).
+#
+# Holds the single-person functions used by the app and a vectorised version
+# for cohort files, which bins whole columns with np.select instead of
+# branching per person.
+#
+# Run `python bmi_scoring.py` to benchmark cohort scoring against the
+# single-person functions.
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 250_000
+CSV_BLOCK_BYTES = 16 * 1024 * 1024
+
+CATEGORIES = ["Underweight", "Normal", "Overweight"]
+TIPS = {
+    "Underweight": "🌱 You're in the Underweight range. Time to nourish your body with a nutrient-rich diet and expert guidance. You’ve got this! 🍲",
+    "Normal": "🎯 You're in the Normal range—awesome job! Keep up the balanced diet and regular movement. Your consistency is your superpower 👍",
+    "Overweight": "🔥 You're in the Overweight range. No worries—this is your moment to rise! Embrace physical activity and smart eating habits. Every step counts 🏃‍♂",
+}
+COHORT_COLUMNS = ["Name", "Age", "Height (cm)", "Weight (kg)"]
+# CSV types are fixed up front rather than inferred from the first block, which
+# fails mid-file when a later block disagrees; Name and Age pass through as text
+COHORT_CSV_TYPES = {"Name": pa.string(), "Age": pa.string(), "Height (cm)": pa.float64(), "Weight (kg)": pa.float64()}
+HEADER_BLOCK_BYTES = 64 * 1024
+
+
+# -----------------------------
+# Single Person
+# -----------------------------
+def calculate_bmi(h_cm, w_kg):
+    h_m = h_cm / 100
+    if h_m <= 0:
+        return None
+    return round(w_kg / (h_m ** 2), 1)
+
+
+def get_category_and_tip(bmi):
+    if bmi < 18.5:
+        return "Underweight", TIPS["Underweight"]
+    elif 18.5 <= bmi < 25:
+        return "Normal", TIPS["Normal"]
+    else:
+        return "Overweight", TIPS["Overweight"]
+
+
+# -----------------------------
+# Cohort (Vectorised)
+# -----------------------------
+def calculate_bmi_array(h_cm, w_kg):
+    """BMI for whole columns. Rows with a missing or non-positive height get NaN."""
+    h_m = np.asarray(h_cm, dtype=np.float64) / 100
+    w_kg = np.asarray(w_kg, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bmi = np.round(w_kg / (h_m ** 2), 1)
+    return np.where(h_m > 0, bmi, np.nan)
+
+
+def categorise_array(bmi):
+    """Same bins as get_category_and_tip. NaN BMIs get no category."""
+    bmi = np.asarray(bmi, dtype=np.float64)
+    codes = np.select([np.isnan(bmi), bmi < 18.5, bmi < 25], [-1, 0, 1], default=2)
+    return pd.Categorical.from_codes(codes, categories=CATEGORIES)
+
+
+def score_frame(df):
+    """Add BMI and Category columns to a frame with Height (cm) and Weight (kg)."""
+    df = df.copy()
+    df["BMI"] = calculate_bmi_array(df["Height (cm)"].to_numpy(), df["Weight (kg)"].to_numpy())
+    df["Category"] = categorise_array(df["BMI"].to_numpy())
+    return df
+
+
+def iter_cohort(file, file_name, chunk_rows=CHUNK_ROWS):
+    """Read a CSV or Parquet cohort file in chunks, so it never has to fit in memory.
+
+    Name and Age are optional; Height (cm) and Weight (kg) are required.
+    """
+    if file_name.lower().endswith(".parquet"):
+        parquet = pq.ParquetFile(file)
+        present = set(parquet.schema_arrow.names)
+        _check_required(present)
+        columns = [c for c in COHORT_COLUMNS if c in present]
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        # Only the header is needed to see which columns the file has
+        present = set(pa_csv.open_csv(file, read_options=pa_csv.ReadOptions(block_size=HEADER_BLOCK_BYTES)).schema.names)
+        file.seek(0)
+        _check_required(present)
+        columns = [c for c in COHORT_COLUMNS if c in present]
+        reader = pa_csv.open_csv(
+            file,
+            read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns,
+                column_types={c: COHORT_CSV_TYPES[c] for c in columns}
+            )
+        )
+        for batch in reader:
+            yield batch.to_pandas()
+
+
+def _check_required(columns):
+    missing = {"Height (cm)", "Weight (kg)"} - set(columns)
+    if missing:
+        raise ValueError(f"Cohort file is missing column(s): {', '.join(sorted(missing))}")
+
+
+# -----------------------------
+# Per-Category Summary
+# -----------------------------
+class CohortSummary:
+    """Running per-category statistics that can be updated one chunk at a time."""
+
+    def __init__(self):
+        self.count = np.zeros(len(CATEGORIES), dtype=np.int64)
+        self.total = np.zeros(len(CATEGORIES))
+        self.total_sq = np.zeros(len(CATEGORIES))
+        self.low = np.full(len(CATEGORIES), np.inf)
+        self.high = np.full(len(CATEGORIES), -np.inf)
+        self.invalid = 0
+
+    def update(self, scored):
+        codes = scored["Category"].cat.codes.to_numpy()
+        bmi = scored["BMI"].to_numpy()
+        valid = codes >= 0
+        self.invalid += int((~valid).sum())
+        codes, bmi = codes[valid], bmi[valid]
+
+        self.count += np.bincount(codes, minlength=len(CATEGORIES))
+        self.total += np.bincount(codes, weights=bmi, minlength=len(CATEGORIES))
+        self.total_sq += np.bincount(codes, weights=bmi * bmi, minlength=len(CATEGORIES))
+        np.minimum.at(self.low, codes, bmi)
+        np.maximum.at(self.high, codes, bmi)
+
+    def to_frame(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = self.total / self.count
+            std = np.sqrt(np.maximum(self.total_sq / self.count - mean ** 2, 0))
+        people = self.count.sum()
+        return pd.DataFrame({
+            "Category": CATEGORIES,
+            "People": self.count,
+            "Share (%)": np.round(100 * self.count / people, 1) if people else 0.0,
+            "Mean BMI": np.round(mean, 1),
+            "Std Dev": np.round(std, 2),
+            "Min BMI": np.where(self.count > 0, self.low, np.nan),
+            "Max BMI": np.where(self.count > 0, self.high, np.nan),
+        })
+
+
+def score_file(file, file_name, out_path=None, chunk_rows=CHUNK_ROWS):
+    """Score a whole cohort file chunk by chunk.
+
+    If `out_path` is given the scored rows are appended to it as CSV. Returns
+    (CohortSummary, rows_scored).
+    """
+    summary = CohortSummary()
+    rows = 0
+    for i, chunk in enumerate(iter_cohort(file, file_name, chunk_rows)):
+        scored = score_frame(chunk)
+        summary.update(scored)
+        rows += len(scored)
+        if out_path is not None:
+            scored.to_csv(out_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+    return summary, rows
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def _random_cohort(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Name": [f"Person {i}" for i in range(n)],
+        "Age": rng.integers(18, 90, n),
+        "Height (cm)": rng.normal(168, 10, n).round(1),
+        "Weight (kg)": rng.normal(72, 15, n).round(1),
+    })
+
+
+if __name__ == "__main__":
+    print(f"{'rows':>10} {'scalar rows/s':>15} {'vectorised rows/s':>18}")
+    for n in [10_000, 100_000, 1_000_000]:
+        cohort = _random_cohort(n)
+
+        start = time.perf_counter()
+        scored = score_frame(cohort)
+        summary = CohortSummary()
+        summary.update(scored)
+        vector_rate = n / (time.perf_counter() - start)
+
+        if n <= 100_000:
+            start = time.perf_counter()
+            for h, w in zip(cohort["Height (cm)"], cohort["Weight (kg)"]):
+                bmi = calculate_bmi(h, w)
+                if bmi is not None:
+                    get_category_and_tip(bmi)
+            scalar_text = f"{n / (time.perf_counter() - start):,.0f}"
+        else:
+            scalar_text = "skipped"
+        print(f"{n:>10,} {scalar_text:>15} {vector_rate:>18,.0f}")
+    print()
+    print(summary.to_frame().to_string(index=False))
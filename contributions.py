@@ -0,0 +1,92 @@
+# Bulk contribution handling for the expense splitter (Day2).
+#
+# Contributions are kept in one columnar DataFrame (Name, Paid) instead of one
+# pair of widgets per person, so large groups can be edited in a single grid
+# or loaded from a CSV/Parquet file.
+import pandas as pd
+
+BALANCE_COL = "Balance to Pay(-) and Get(+)"
+
+# Accepted header spellings for uploaded files
+NAME_ALIASES = ["name", "person", "participant"]
+PAID_ALIASES = ["paid", "contribution", "amount"]
+
+
+# -----------------------------
+# Building the Contributions Frame
+# -----------------------------
+def blank_contributions(num_people):
+    return normalise_contributions(pd.DataFrame({
+        "Name": [""] * num_people,
+        "Paid": [0.0] * num_people,
+    }))
+
+
+def normalise_contributions(df):
+    """Return a clean (Name, Paid) frame: default names, numeric non-negative amounts."""
+    df = df.reset_index(drop=True)
+    default_names = "Person " + pd.Series(range(1, len(df) + 1), dtype="int64").astype(str)
+    names = df["Name"].astype("string").str.strip()
+    names = names.mask(names.isna() | (names == ""), default_names)
+    paid = pd.to_numeric(df["Paid"], errors="coerce").fillna(0.0).clip(lower=0.0)
+    return pd.DataFrame({"Name": names.astype(str), "Paid": paid.astype(float)})
+
+
+def _pick_column(columns, aliases):
+    lookup = {str(c).strip().lower(): c for c in columns}
+    for alias in aliases:
+        if alias in lookup:
+            return lookup[alias]
+    return None
+
+
+def read_contributions(file, file_name):
+    """Parse an uploaded CSV or Parquet file into a contributions frame."""
+    if file_name.lower().endswith(".parquet"):
+        raw = pd.read_parquet(file)
+    else:
+        raw = pd.read_csv(file)
+
+    name_col = _pick_column(raw.columns, NAME_ALIASES)
+    paid_col = _pick_column(raw.columns, PAID_ALIASES)
+    if paid_col is None:
+        raise ValueError(f"Could not find a contribution column. Expected one of: {', '.join(PAID_ALIASES)}")
+
+    names = raw[name_col] if name_col is not None else pd.Series([""] * len(raw))
+    return normalise_contributions(pd.DataFrame({"Name": names, "Paid": raw[paid_col]}))
+
+
+# -----------------------------
+# Balances
+# -----------------------------
+def compute_balances(contributions, fair_share):
+    df = contributions.copy()
+    df[BALANCE_COL] = (df["Paid"] - fair_share).round(2)
+    return df
+
+
+def refresh_balances(previous, contributions, fair_share):
+    """Update a previously computed balances frame, touching only rows that changed.
+
+    Falls back to a full (still vectorised) recompute when the fair share or the
+    number of people changed, because then every balance moves anyway.
+    """
+    if (
+        previous is None
+        or previous.attrs.get("fair_share") != fair_share
+        or len(previous) != len(contributions)
+    ):
+        df = compute_balances(contributions, fair_share)
+    else:
+        changed = (
+            (previous["Paid"].to_numpy() != contributions["Paid"].to_numpy())
+            | (previous["Name"].to_numpy() != contributions["Name"].to_numpy())
+        )
+        if not changed.any():
+            return previous
+        df = previous.copy()
+        df.loc[changed, "Name"] = contributions.loc[changed, "Name"]
+        df.loc[changed, "Paid"] = contributions.loc[changed, "Paid"]
+        df.loc[changed, BALANCE_COL] = (contributions.loc[changed, "Paid"] - fair_share).round(2)
+    df.attrs["fair_share"] = fair_share
+    return df
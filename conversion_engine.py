@@ -0,0 +1,132 @@
+# Unit conversion engine shared by the unit converter (Day5) and the currency
+# converter (Day8).
+#
+# Every unit is described by how it maps onto one base unit of its category:
+#     base = scale * value + offset
+# (offset is only non-zero for temperatures). From that, an N×N matrix of
+# factors and offsets is built once, so converting between any two units is a
+# single lookup and a whole column converts with one NumPy expression.
+#
+# Run `python conversion_engine.py` to benchmark against per-value conversion.
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from batch_calc import write_results, CHUNK_ROWS
+
+LENGTH_UNITS = {"Meters": 1, "Kilometers": 1000, "Miles": 1609.34, "Feet": 0.3048}
+WEIGHT_UNITS = {"Kilograms": 1, "Grams": 0.001, "Pounds": 0.453592, "Ounces": 0.0283495}
+# Unit -> (scale, offset) onto Kelvin
+TEMPERATURE_UNITS = {
+    "Celsius": (1, 273.15),
+    "Fahrenheit": (5 / 9, 273.15 - 32 * 5 / 9),
+    "Kelvin": (1, 0),
+}
+
+
+class ConversionMatrix:
+    def __init__(self, units, scales, offsets=None):
+        self.units = list(units)
+        self.index = {unit: i for i, unit in enumerate(self.units)}
+        a = np.asarray(scales, dtype=np.float64)
+        b = np.zeros_like(a) if offsets is None else np.asarray(offsets, dtype=np.float64)
+        # value in unit i -> unit j:  value * factor[i, j] + shift[i, j]
+        self.factor = a[:, None] / a[None, :]
+        self.shift = (b[:, None] - b[None, :]) / a[None, :]
+
+    def pair(self, from_unit, to_unit):
+        i, j = self.index[from_unit], self.index[to_unit]
+        return self.factor[i, j], self.shift[i, j]
+
+    def convert(self, values, from_unit, to_unit):
+        """Convert a number or a whole array of numbers in one step."""
+        factor, shift = self.pair(from_unit, to_unit)
+        return values * factor + shift
+
+
+# -----------------------------
+# Building Matrices
+# -----------------------------
+def _linear(units):
+    return ConversionMatrix(units.keys(), list(units.values()))
+
+
+LENGTH = _linear(LENGTH_UNITS)
+WEIGHT = _linear(WEIGHT_UNITS)
+TEMPERATURE = ConversionMatrix(
+    TEMPERATURE_UNITS.keys(),
+    [scale for scale, _ in TEMPERATURE_UNITS.values()],
+    [offset for _, offset in TEMPERATURE_UNITS.values()]
+)
+MATRICES = {"Length": LENGTH, "Weight": WEIGHT, "Temperature": TEMPERATURE}
+
+
+@lru_cache(maxsize=32)
+def _currency_matrix(items, rates_per_base):
+    units = [unit for unit, _ in items]
+    values = np.array([value for _, value in items], dtype=np.float64)
+    return ConversionMatrix(units, 1 / values if rates_per_base else values)
+
+
+def currency_matrix(rates, rates_per_base=True):
+    """Matrix for one rate snapshot, built once and cached by the rates themselves.
+
+    With `rates_per_base` the rates say how much of each currency one base unit
+    buys (API style: with base USD, INR = 83.0). Otherwise they give the value of
+    one unit in the base currency (Day8 style: with base INR, USD = 83.0).
+    """
+    return _currency_matrix(tuple(sorted(rates.items())), rates_per_base)
+
+
+# -----------------------------
+# Batch Conversion
+# -----------------------------
+def convert_file(file, file_name, column, matrix, from_unit, to_unit, out_path, chunk_rows=CHUNK_ROWS):
+    """Convert one numeric column of a CSV/Parquet file, chunk by chunk.
+
+    The output keeps the original column and adds "<column> (<to_unit>)".
+    Returns (rows, masked_rows) like batch_calc.write_results.
+    """
+    factor, shift = matrix.pair(from_unit, to_unit)
+    return write_results(
+        file, file_name, [column],
+        lambda values: np.ma.masked_invalid(values[column].astype(np.float64) * factor + shift),
+        f"{column} ({to_unit})",
+        out_path,
+        chunk_rows
+    )
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def _convert_temp(val, from_u, to_u):
+    # The original Day5 function, kept here only for comparison
+    if from_u == "Celsius":
+        return val * 9/5 + 32 if to_u == "Fahrenheit" else val + 273.15
+    if from_u == "Fahrenheit":
+        return (val - 32) * 5/9 if to_u == "Celsius" else (val - 32) * 5/9 + 273.15
+    if from_u == "Kelvin":
+        return val - 273.15 if to_u == "Celsius" else (val - 273.15) * 9/5 + 32
+
+
+if __name__ == "__main__":
+    values = np.random.default_rng(0).uniform(-50, 150, 1_000_000)
+    checks = [
+        ("Temperature", "Fahrenheit", "Celsius", lambda v: _convert_temp(v, "Fahrenheit", "Celsius")),
+        ("Length", "Miles", "Kilometers", lambda v: v * LENGTH_UNITS["Miles"] / LENGTH_UNITS["Kilometers"]),
+    ]
+    print(f"{len(values):,} values")
+    for category, from_u, to_u, per_value in checks:
+        start = time.perf_counter()
+        expected = [per_value(v) for v in values.tolist()]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = MATRICES[category].convert(values, from_u, to_u)
+        matrix_time = time.perf_counter() - start
+
+        assert np.allclose(result, expected)
+        print(f"  {from_u} → {to_u}: per value {loop_time:.3f}s, matrix {matrix_time:.4f}s "
+              f"({loop_time / matrix_time:.0f}x faster)")
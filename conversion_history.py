@@ -0,0 +1,126 @@
+# Bounded conversion history for the unit converter (Day5).
+#
+# Streamlit reruns the whole script on every interaction, so the same conversion
+# gets "recorded" again and again. The history keeps compact records in a
+# fixed-size ring buffer, drops a record that repeats the previous one, and
+# evicts the oldest records whenever the session goes over its memory budget.
+# Records can optionally be written through to SQLite, on a connection borrowed
+# from a sqlite_connections.ConnectionPool.
+#
+# Run `python conversion_history.py` to compare with the old unbounded list.
+import sqlite3
+import sys
+import time
+from collections import deque, namedtuple
+
+DEFAULT_CAPACITY = 100
+DEFAULT_MAX_BYTES = 32 * 1024
+
+ConversionRecord = namedtuple("ConversionRecord", ["ts", "category", "from_unit", "to_unit", "value", "result"])
+
+
+def record_size(record):
+    """Approximate bytes held by one record (the tuple plus its fields)."""
+    return sys.getsizeof(record) + sum(sys.getsizeof(field) for field in record)
+
+
+class ConversionHistory:
+    def __init__(self, capacity=DEFAULT_CAPACITY, max_bytes=DEFAULT_MAX_BYTES, pool=None, session_id=None):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.pool = pool
+        self.session_id = session_id
+        self.records = deque()
+        self.bytes_used = 0
+        self.evicted = 0
+
+    def add(self, category, from_unit, to_unit, value, result):
+        """Record a conversion. Returns False if it repeats the previous record."""
+        if self.records:
+            last = self.records[-1]
+            if (last.category, last.from_unit, last.to_unit, last.value, last.result) == \
+                    (category, from_unit, to_unit, value, result):
+                return False
+
+        record = ConversionRecord(time.time(), category, from_unit, to_unit, float(value), float(result))
+        self.records.append(record)
+        self.bytes_used += record_size(record)
+        while len(self.records) > 1 and (len(self.records) > self.capacity or self.bytes_used > self.max_bytes):
+            self.bytes_used -= record_size(self.records.popleft())
+            self.evicted += 1
+
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                save_record(conn, self.session_id, record)
+        return True
+
+    def recent(self, limit=10):
+        """Newest records first."""
+        count = min(limit, len(self.records))
+        return [self.records[-i] for i in range(1, count + 1)]
+
+    def usage(self):
+        return {
+            "records": len(self.records),
+            "capacity": self.capacity,
+            "bytes_used": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "evicted": self.evicted,
+        }
+
+    def __len__(self):
+        return len(self.records)
+
+
+def format_record(record):
+    return f"{record.value} {record.from_unit} → {record.result:.2f} {record.to_unit}"
+
+
+# -----------------------------
+# Optional SQLite Persistence
+# -----------------------------
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS conversion_history (
+            id INTEGER PRIMARY KEY,
+            session_id TEXT,
+            ts REAL NOT NULL,
+            category TEXT NOT NULL,
+            from_unit TEXT NOT NULL,
+            to_unit TEXT NOT NULL,
+            value REAL NOT NULL,
+            result REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_conversion_history_session ON conversion_history (session_id, ts);
+    """)
+    return conn
+
+
+def save_record(conn, session_id, record):
+    with conn:
+        conn.execute(
+            "INSERT INTO conversion_history (session_id, ts, category, from_unit, to_unit, value, result) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session_id, *record)
+        )
+
+
+# -----------------------------
+# Demo
+# -----------------------------
+if __name__ == "__main__":
+    history = ConversionHistory()
+    unbounded = []
+    start = time.perf_counter()
+    for rerun in range(200_000):
+        # Most reruns repeat the last conversion; every 20th one changes the value
+        value = float(rerun // 20)
+        history.add("Length", "Miles", "Kilometers", value, value * 1.60934)
+        unbounded.append(f"{value} Miles → {value * 1.60934:.2f} Kilometers")
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(unbounded):,} reruns in {elapsed:.2f}s")
+    print(f"  old list of strings: {len(unbounded):,} entries, "
+          f"{sum(sys.getsizeof(s) for s in unbounded) / 1e6:.1f} MB")
+    print(f"  ring buffer:         {history.usage()}")
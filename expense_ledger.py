@@ -0,0 +1,174 @@
+# SQLite-backed expense ledger for the expense splitter (Day2).
+#
+# Every expense records who paid, how much, and which people share it. A running
+# per-person balance is updated in the same transaction as the insert, so reading
+# balances never needs to re-add every expense.
+#
+# Verify the running balances against a full rebuild from the raw expenses:
+#   python expense_ledger.py verify [expense_ledger.db]
+#   python expense_ledger.py rebuild [expense_ledger.db]
+import sqlite3
+import sys
+from datetime import datetime
+
+DB_FILE = "expense_ledger.db"
+
+
+# -----------------------------
+# DB Setup
+# -----------------------------
+def connect(path=DB_FILE):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS people (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            paid INTEGER NOT NULL DEFAULT 0,
+            balance INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY,
+            payer_id INTEGER NOT NULL REFERENCES people(id),
+            amount INTEGER NOT NULL,
+            description TEXT,
+            created_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS expense_shares (
+            expense_id INTEGER NOT NULL REFERENCES expenses(id),
+            person_id INTEGER NOT NULL REFERENCES people(id),
+            share INTEGER NOT NULL,
+            PRIMARY KEY (expense_id, person_id)
+        );
+    """)
+    return conn
+
+
+def _person_id(conn, name):
+    conn.execute("INSERT OR IGNORE INTO people (name) VALUES (?)", (name,))
+    return conn.execute("SELECT id FROM people WHERE name = ?", (name,)).fetchone()[0]
+
+
+# -----------------------------
+# Writing Expenses
+# -----------------------------
+def split_evenly(amount_minor, count):
+    # Leftover paise go to the first people so the shares add up exactly
+    share, extra = divmod(amount_minor, count)
+    return [share + (1 if i < extra else 0) for i in range(count)]
+
+
+def add_expense(conn, payer, amount, sharers, description=""):
+    """Record one expense and update the running balances of everyone involved.
+
+    Costs one row update per person touched, regardless of ledger size.
+    """
+    payer = payer.strip()
+    sharers = list(dict.fromkeys(s.strip() for s in sharers if s.strip()))
+    if not payer:
+        raise ValueError("Payer name is required.")
+    if not sharers:
+        raise ValueError("At least one person must share the expense.")
+    amount_minor = int(round(amount * 100))
+    if amount_minor <= 0:
+        raise ValueError("Amount must be greater than zero.")
+
+    with conn:
+        payer_id = _person_id(conn, payer)
+        sharer_ids = [_person_id(conn, name) for name in sharers]
+        shares = split_evenly(amount_minor, len(sharer_ids))
+
+        cur = conn.execute(
+            "INSERT INTO expenses (payer_id, amount, description, created_at) VALUES (?, ?, ?, ?)",
+            (payer_id, amount_minor, description, datetime.now().isoformat(timespec="seconds"))
+        )
+        expense_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO expense_shares (expense_id, person_id, share) VALUES (?, ?, ?)",
+            [(expense_id, pid, share) for pid, share in zip(sharer_ids, shares)]
+        )
+        conn.execute(
+            "UPDATE people SET paid = paid + ?, balance = balance + ? WHERE id = ?",
+            (amount_minor, amount_minor, payer_id)
+        )
+        conn.executemany(
+            "UPDATE people SET balance = balance - ? WHERE id = ?",
+            [(share, pid) for pid, share in zip(sharer_ids, shares)]
+        )
+    return expense_id
+
+
+# -----------------------------
+# Reading Balances
+# -----------------------------
+def get_balances(conn):
+    """Return [(name, paid, balance)] in rupees from the running totals."""
+    rows = conn.execute("SELECT name, paid, balance FROM people ORDER BY id").fetchall()
+    return [(name, paid / 100, balance / 100) for name, paid, balance in rows]
+
+
+def get_people(conn):
+    return [row[0] for row in conn.execute("SELECT name FROM people ORDER BY name")]
+
+
+def recent_expenses(conn, limit=20):
+    return conn.execute("""
+        SELECT e.created_at, p.name, e.amount / 100.0, e.description,
+               (SELECT COUNT(*) FROM expense_shares s WHERE s.expense_id = e.id)
+        FROM expenses e JOIN people p ON p.id = e.payer_id
+        ORDER BY e.id DESC
+        LIMIT ?
+    """, (limit,)).fetchall()
+
+
+def expense_count(conn):
+    return conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+
+
+# -----------------------------
+# Full Rebuild & Verification
+# -----------------------------
+def _rebuilt_totals(conn):
+    paid = dict(conn.execute("SELECT payer_id, SUM(amount) FROM expenses GROUP BY payer_id"))
+    owed = dict(conn.execute("SELECT person_id, SUM(share) FROM expense_shares GROUP BY person_id"))
+    totals = {}
+    for (pid,) in conn.execute("SELECT id FROM people"):
+        person_paid = paid.get(pid, 0)
+        totals[pid] = (person_paid, person_paid - owed.get(pid, 0))
+    return totals
+
+
+def verify(conn):
+    """Compare running balances with a rebuild from raw expenses.
+
+    Returns a list of (name, stored_balance, rebuilt_balance) for every mismatch.
+    """
+    rebuilt = _rebuilt_totals(conn)
+    mismatches = []
+    for pid, name, paid, balance in conn.execute("SELECT id, name, paid, balance FROM people"):
+        expected_paid, expected_balance = rebuilt[pid]
+        if (paid, balance) != (expected_paid, expected_balance):
+            mismatches.append((name, balance / 100, expected_balance / 100))
+    return mismatches
+
+
+def rebuild(conn):
+    rebuilt = _rebuilt_totals(conn)
+    with conn:
+        conn.executemany(
+            "UPDATE people SET paid = ?, balance = ? WHERE id = ?",
+            [(paid, balance, pid) for pid, (paid, balance) in rebuilt.items()]
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("verify", "rebuild"):
+        sys.exit("Usage: python expense_ledger.py verify|rebuild [db_file]")
+    conn = connect(sys.argv[2] if len(sys.argv) > 2 else DB_FILE)
+    if sys.argv[1] == "rebuild":
+        rebuild(conn)
+    mismatches = verify(conn)
+    for name, stored, expected in mismatches:
+        print(f"{name}: stored ₹{stored:.2f}, rebuilt ₹{expected:.2f}")
+    print(f"{expense_count(conn)} expenses checked, {len(mismatches)} mismatched balances")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,188 @@
+# Safe arithmetic expression engine for the calculator (Day3).
+#
+# Expressions such as "(a + b) * rate" are parsed once with `ast`, checked
+# against the operators the calculator supports, and compiled into a small tree
+# of Python closures. Compiled expressions are cached by their text, and the
+# same compiled expression works on plain numbers and on whole NumPy columns.
+import ast
+import io
+import tokenize
+from functools import lru_cache
+
+import numpy as np
+
+from batch_calc import apply_operation, numeric_columns, write_results, CHUNK_ROWS
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_NODES = 200
+# Largest allowed |exponent|; rows over it are masked. Everything is evaluated
+# as float64, so this keeps `**` from producing huge values rather than
+# guarding against slow big ints.
+MAX_EXPONENT = 1000
+CACHE_SIZE = 256
+
+# AST operator -> calculator button symbol from batch_calc.OPERATIONS
+BINARY_OPERATORS = {
+    ast.Add: "➕",
+    ast.Sub: "➖",
+    ast.Mult: "✖",
+    ast.Div: "➗",
+    ast.Mod: "%",
+    ast.Pow: "^",
+    ast.FloorDiv: "//",
+}
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+# -----------------------------
+# Compiled Expression
+# -----------------------------
+class CompiledExpression:
+    def __init__(self, text, evaluator, variables):
+        self.text = text
+        self.variables = variables
+        self._evaluator = evaluator
+
+    def __call__(self, **values):
+        """Evaluate with numbers or NumPy arrays. Returns a masked array.
+
+        Undefined results (division by zero, overflow) are masked.
+        """
+        missing = self.variables - values.keys()
+        if missing:
+            raise ExpressionError(f"Missing value for: {', '.join(sorted(missing))}")
+        return self._evaluator(values)
+
+    def __repr__(self):
+        return f"CompiledExpression({self.text!r})"
+
+
+def _power(base, exponent):
+    """`base ** exponent`, masking rows whose |exponent| is over MAX_EXPONENT.
+
+    Rows that are already masked (e.g. an exponent that divided by zero) are
+    left as they are, so they never count against the limit.
+    """
+    too_large = ~np.ma.getmaskarray(exponent) & (np.abs(np.ma.getdata(exponent)) > MAX_EXPONENT)
+    exponent = np.ma.masked_array(np.ma.getdata(exponent), mask=np.ma.getmaskarray(exponent) | too_large)
+    return apply_operation(base, exponent, "^")
+
+
+def _python_source(text):
+    """The expression with every `^` operator token replaced by `**`.
+
+    The calculator uses ^ for powers. Rewriting the tokens before parsing
+    gives it the precedence of `**`, so a^2 + b^2 means (a**2) + (b**2).
+    Text that does not tokenize is returned as is for ast.parse to report.
+    """
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(text).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return text
+    return tokenize.untokenize(
+        (token.type, "**" if token.type == tokenize.OP and token.string == "^" else token.string)
+        for token in tokens
+    )
+
+
+def _compile_node(node, variables):
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, variables)
+
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpressionError(f"Unsupported value: {node.value!r}")
+        value = np.ma.masked_array(float(node.value))
+        return lambda env: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        variables.add(name)
+        return lambda env: np.ma.masked_invalid(np.asarray(env[name], dtype=np.float64))
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _compile_node(node.operand, variables)
+        if isinstance(node.op, ast.USub):
+            return lambda env: -operand(env)
+        return operand
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        left = _compile_node(node.left, variables)
+        right = _compile_node(node.right, variables)
+        symbol = BINARY_OPERATORS[type(node.op)]
+        if symbol == "^":
+            return lambda env: _power(left(env), right(env))
+        return lambda env: apply_operation(left(env), right(env), symbol)
+
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(text):
+    """Parse, validate and compile an expression. Results are cached by text."""
+    text = text.strip()
+    if not text:
+        raise ExpressionError("Expression is empty")
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression is too long (limit is {MAX_EXPRESSION_LENGTH} characters)")
+    try:
+        tree = ast.parse(_python_source(text), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise ExpressionError("Expression is too complex")
+
+    variables = set()
+    evaluator = _compile_node(tree, variables)
+    return CompiledExpression(text, evaluator, frozenset(variables))
+
+
+def evaluate(text, **values):
+    return compile_expression(text)(**values)
+
+
+# -----------------------------
+# Helpers for the UI
+# -----------------------------
+def parse_variables(text):
+    """Parse "name = value" lines into a dict of floats."""
+    values = {}
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        name, sep, value = line.partition("=")
+        name = name.strip()
+        if not sep or not name.isidentifier():
+            raise ExpressionError(f"Line {line_no}: expected 'name = value'")
+        try:
+            values[name] = float(value)
+        except ValueError:
+            raise ExpressionError(f"Line {line_no}: '{value.strip()}' is not a number") from None
+    return values
+
+
+def process_expression_file(file, file_name, text, out_path, constants=None, chunk_rows=CHUNK_ROWS):
+    """Evaluate an expression over the columns of a file, chunk by chunk.
+
+    Variables that are not given in `constants` are read from columns of the
+    same name. Returns (rows, masked_rows).
+    """
+    constants = constants or {}
+    expression = compile_expression(text)
+    columns = sorted(expression.variables - constants.keys())
+    if not columns:
+        raise ExpressionError("The expression does not use any column")
+    unknown = set(columns) - set(numeric_columns(file, file_name))
+    if unknown:
+        raise ExpressionError(f"Not a numeric column in this file: {', '.join(sorted(unknown))}")
+    return write_results(
+        file, file_name, columns,
+        lambda values: expression(**values, **constants),
+        "Result",
+        out_path,
+        chunk_rows
+    )
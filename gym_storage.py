@@ -0,0 +1,496 @@
+# Storage layer for the gym workout log (Day7).
+#
+# - Workouts are indexed on date, so history pages are read newest first with
+#   keyset pagination over (date, rowid): every page costs the same, however
+#   deep it is
+# - Weekly volume (sets × reps × weight), per-session volume and personal records
+#   are kept in aggregate tables, updated by the write path with set-based
+#   statements per batch of new rows, so the weekly chart reads one row per
+#   week and a PR lookup is one primary-key read
+# - Estimated 1RM trends are computed with NumPy from the best weight per
+#   (date, reps), read through a covering index on (exercise, date, reps, weight)
+# - Queries name only the columns they need
+# - The workouts table streams to Parquet/CSV in fixed-size batches, and files are
+#   imported with executemany in one transaction, folding the whole batch of new
+#   rows into the aggregates at the end
+# - Day7 borrows connections from a pool (sqlite_connections), so one session's
+#   commit can never end another's import, and WAL lets readers carry on while
+#   it writes
+#
+# Run `python gym_storage.py [rows]` to load 5M sets and time a rerun, or
+# `python gym_storage.py import [rows]` to time a 10M-row import and export.
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from batch_calc import CHUNK_ROWS, CSV_BLOCK_BYTES
+
+DB_FILE = "gym_log.db"
+PAGE_SIZE = 50
+SCHEMA_VERSION = 2
+EXPORT_BATCH_ROWS = 100_000
+# How long a write waits for another connection's transaction (e.g. an import)
+BUSY_TIMEOUT_S = 30
+
+WORKOUT_SCHEMA = pa.schema([
+    ("date", pa.string()),
+    ("exercise", pa.string()),
+    ("sets", pa.int64()),
+    ("reps", pa.int64()),
+    ("weight", pa.float64()),
+])
+INSERT_WORKOUT = "INSERT INTO workouts (date, exercise, sets, reps, weight) VALUES (?, ?, ?, ?, ?)"
+
+# Monday of the week a workout date falls in (weeks run Monday to Sunday)
+WEEK_START = "date(date, '-' || ((CAST(strftime('%w', date) AS INTEGER) + 6) % 7) || ' days')"
+
+# Estimated one-rep max; a single rep is the lift itself, Brzycki is undefined from 37 reps
+EPLEY_SQL = "CASE WHEN reps = 1 THEN weight ELSE weight * (1 + reps / 30.0) END"
+BRZYCKI_SQL = "CASE WHEN reps < 37 THEN weight * 36.0 / (37 - reps) END"
+
+# Personal record -> query giving (exercise, value, date) for the best of a batch of rows
+PR_QUERIES = {
+    "max_weight": "SELECT exercise, MAX(weight), date FROM workouts WHERE rowid BETWEEN ? AND ? GROUP BY exercise",
+    "best_epley": f"SELECT exercise, MAX({EPLEY_SQL}), date FROM workouts WHERE rowid BETWEEN ? AND ? GROUP BY exercise",
+    "best_brzycki": f"SELECT exercise, MAX({BRZYCKI_SQL}), date FROM workouts WHERE rowid BETWEEN ? AND ? GROUP BY exercise",
+    # Sessions only grow, so the best of the sessions touched by the batch is enough
+    "best_session_volume": """
+        SELECT exercise, MAX(volume), date FROM session_volume
+        WHERE (exercise, date) IN (SELECT exercise, date FROM workouts WHERE rowid BETWEEN ? AND ?)
+        GROUP BY exercise
+    """,
+}
+
+
+# -----------------------------
+# DB Setup
+# -----------------------------
+def connect(path=DB_FILE):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_S, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS workouts (
+            date TEXT, exercise TEXT, sets INTEGER, reps INTEGER, weight REAL
+        )
+    """)
+    migrate(conn)
+    return conn
+
+
+def migrate(conn):
+    """Bring an existing database up to SCHEMA_VERSION."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1:
+        conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_workouts_date ON workouts (date);
+
+            CREATE TABLE IF NOT EXISTS weekly_volume (
+                week_start TEXT PRIMARY KEY,
+                volume REAL NOT NULL,
+                entries INTEGER NOT NULL
+            ) WITHOUT ROWID;
+        """)
+    if version < 2:
+        pr_columns = ", ".join(f"{name} REAL, {name}_date TEXT" for name in PR_QUERIES)
+        conn.executescript(f"""
+            CREATE INDEX IF NOT EXISTS idx_workouts_exercise ON workouts (exercise, date, reps, weight);
+
+            CREATE TABLE IF NOT EXISTS session_volume (
+                exercise TEXT NOT NULL,
+                date TEXT NOT NULL,
+                volume REAL NOT NULL,
+                PRIMARY KEY (exercise, date)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS personal_records (
+                exercise TEXT PRIMARY KEY,
+                {pr_columns}
+            ) WITHOUT ROWID;
+        """)
+    if version < SCHEMA_VERSION:
+        rebuild(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+def log_set(conn, day, exercise, sets, reps, weight):
+    """Store one logged exercise and fold it into the aggregates."""
+    with conn:
+        rowid = conn.execute(INSERT_WORKOUT, (day.isoformat(), exercise, sets, reps, weight)).lastrowid
+        _apply_aggregates(conn, rowid, rowid)
+
+
+def _apply_aggregates(conn, first_rowid, last_rowid):
+    """Add workouts first_rowid..last_rowid to the aggregates (inside the caller's transaction)."""
+    rows = (first_rowid, last_rowid)
+    conn.execute(f"""
+        INSERT INTO weekly_volume (week_start, volume, entries)
+        SELECT {WEEK_START}, SUM(sets * reps * weight), COUNT(*)
+        FROM workouts
+        WHERE rowid BETWEEN ? AND ?
+        GROUP BY 1
+        ON CONFLICT (week_start) DO UPDATE SET
+            volume = volume + excluded.volume,
+            entries = entries + excluded.entries
+    """, rows)
+    conn.execute("""
+        INSERT INTO session_volume (exercise, date, volume)
+        SELECT exercise, date, SUM(sets * reps * weight)
+        FROM workouts
+        WHERE rowid BETWEEN ? AND ?
+        GROUP BY exercise, date
+        ON CONFLICT (exercise, date) DO UPDATE SET volume = volume + excluded.volume
+    """, rows)
+    for name, query in PR_QUERIES.items():
+        # A record only moves when the batch beats it; its date moves with it
+        conn.execute(f"""
+            INSERT INTO personal_records (exercise, {name}, {name}_date)
+            SELECT * FROM ({query}) WHERE true
+            ON CONFLICT (exercise) DO UPDATE SET
+                {name}_date = CASE WHEN {name} IS NULL OR excluded.{name} > {name}
+                                   THEN excluded.{name}_date ELSE {name}_date END,
+                {name} = CASE WHEN {name} IS NULL OR excluded.{name} > {name}
+                              THEN excluded.{name} ELSE {name} END
+        """, rows)
+
+
+def rebuild(conn):
+    """Recompute every aggregate from the workouts table."""
+    with conn:
+        for table in ("weekly_volume", "session_volume", "personal_records"):
+            conn.execute(f"DELETE FROM {table}")
+        last_rowid = conn.execute("SELECT MAX(rowid) FROM workouts").fetchone()[0]
+        if last_rowid is not None:
+            _apply_aggregates(conn, 0, last_rowid)
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def weekly_volume(conn):
+    """[(week, volume)] with weeks labelled like pandas' "YYYY-MM-DD/YYYY-MM-DD"."""
+    return conn.execute("""
+        SELECT week_start || '/' || date(week_start, '+6 days'), volume
+        FROM weekly_volume
+        ORDER BY week_start
+    """).fetchall()
+
+
+def workout_count(conn):
+    return conn.execute("SELECT COALESCE(SUM(entries), 0) FROM weekly_volume").fetchone()[0]
+
+
+def history_page(conn, before=None, page_size=PAGE_SIZE):
+    """One page of workouts, newest first.
+
+    `before` is the cursor returned with the previous page (None for the first).
+    Returns (rows, next_cursor); rows are (date, exercise, sets, reps, weight) and
+    next_cursor is None on the last page.
+    """
+    if before is None:
+        rows = conn.execute("""
+            SELECT rowid, date, exercise, sets, reps, weight FROM workouts
+            ORDER BY date DESC, rowid DESC LIMIT ?
+        """, (page_size,)).fetchall()
+    else:
+        rows = conn.execute("""
+            SELECT rowid, date, exercise, sets, reps, weight FROM workouts
+            WHERE (date, rowid) < (?, ?)
+            ORDER BY date DESC, rowid DESC LIMIT ?
+        """, (*before, page_size)).fetchall()
+    next_cursor = (rows[-1][1], rows[-1][0]) if len(rows) == page_size else None
+    return [row[1:] for row in rows], next_cursor
+
+
+def personal_record(conn, exercise):
+    """{record: (value, date)} for one exercise, or None if it was never logged."""
+    row = conn.execute(
+        f"SELECT {', '.join(f'{name}, {name}_date' for name in PR_QUERIES)} FROM personal_records WHERE exercise = ?",
+        (exercise,)
+    ).fetchone()
+    if row is None:
+        return None
+    return {name: (row[2 * i], row[2 * i + 1]) for i, name in enumerate(PR_QUERIES)}
+
+
+# -----------------------------
+# Estimated 1RM Trend
+# -----------------------------
+def epley(weight, reps):
+    return np.where(reps == 1, weight, weight * (1 + reps / 30))
+
+
+def brzycki(weight, reps):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(reps < 37, weight * 36 / (37 - reps), np.nan)
+
+
+E1RM_FORMULAS = {"Epley": epley, "Brzycki": brzycki}
+
+
+def e1rm_trend(conn, exercise, formula="Epley"):
+    """Best estimated 1RM per day for one exercise, as (dates, values) arrays.
+
+    For a fixed number of reps the estimate grows with the weight, so SQLite only
+    returns the heaviest weight per (date, reps); the estimates and the best one
+    per day are then computed for every row at once.
+    """
+    rows = conn.execute("""
+        SELECT date, reps, MAX(weight) FROM workouts
+        WHERE exercise = ?
+        GROUP BY date, reps
+        ORDER BY date
+    """, (exercise,)).fetchall()
+    if not rows:
+        return np.array([], dtype="datetime64[D]"), np.array([])
+
+    dates, reps, weights = zip(*rows)
+    dates = np.array(dates, dtype="datetime64[D]")
+    estimates = E1RM_FORMULAS[formula](np.array(weights, dtype=np.float64), np.array(reps, dtype=np.float64))
+
+    # Rows are sorted by date: reduce each run of equal dates to its maximum
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+    return dates[starts], np.fmax.reduceat(estimates, starts)
+
+
+# -----------------------------
+# Export & Import
+# -----------------------------
+def _is_parquet(file_name):
+    return file_name.lower().endswith(".parquet")
+
+
+def export_workouts(conn, out_path, batch_rows=EXPORT_BATCH_ROWS):
+    """Write the workouts table to Parquet or CSV (by extension), `batch_rows` at a time.
+
+    Returns the number of rows written.
+    """
+    cursor = conn.execute("SELECT date, exercise, sets, reps, weight FROM workouts ORDER BY rowid")
+    if _is_parquet(out_path):
+        writer = pq.ParquetWriter(out_path, WORKOUT_SCHEMA)
+    else:
+        writer = pa_csv.CSVWriter(out_path, WORKOUT_SCHEMA)
+    rows = 0
+    try:
+        while True:
+            batch = cursor.fetchmany(batch_rows)
+            if not batch:
+                break
+            columns = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), WORKOUT_SCHEMA)]
+            writer.write_batch(pa.record_batch(columns, schema=WORKOUT_SCHEMA))
+            rows += len(batch)
+    finally:
+        writer.close()
+    return rows
+
+
+def _iter_import_batches(file, file_name, chunk_rows):
+    first_row = 1
+    if _is_parquet(file_name):
+        parquet = pq.ParquetFile(file)
+        _check_columns(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=WORKOUT_SCHEMA.names):
+            table = pa.Table.from_batches([batch]).cast(WORKOUT_SCHEMA)
+            _check_rows(table, first_row)
+            first_row += table.num_rows
+            yield table
+    else:
+        reader = pa_csv.open_csv(
+            file,
+            read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_BYTES),
+            convert_options=pa_csv.ConvertOptions(column_types=WORKOUT_SCHEMA)
+        )
+        _check_columns(reader.schema.names)
+        for batch in reader:
+            table = pa.Table.from_batches([batch.select(WORKOUT_SCHEMA.names)])
+            _check_rows(table, first_row)
+            first_row += table.num_rows
+            yield table
+
+
+def _check_columns(columns):
+    missing = set(WORKOUT_SCHEMA.names) - set(columns)
+    if missing:
+        raise ValueError(f"Workout file is missing column(s): {', '.join(sorted(missing))}")
+
+
+def _check_rows(table, first_row):
+    """Raise ValueError unless every row has all values and a YYYY-MM-DD date."""
+    for name in WORKOUT_SCHEMA.names:
+        nulls = pc.is_null(table[name], nan_is_null=True)
+        if pc.any(nulls).as_py():
+            row = first_row + pc.index(nulls, True).as_py()
+            raise ValueError(f"Row {row:,} has no {name}")
+    # SQLite's date functions only read zero-padded ISO dates; a real date
+    # formats back to the same text (2024-02-30 would come back as March)
+    dates = table["date"]
+    parsed = pc.strptime(dates, format="%Y-%m-%d", unit="s", error_is_null=True)
+    valid = pc.fill_null(pc.equal(pc.strftime(parsed, format="%Y-%m-%d"), dates), False)
+    if not pc.all(valid).as_py():
+        row = first_row + pc.index(valid, False).as_py()
+        raise ValueError(f"Row {row:,} has date {dates[row - first_row].as_py()!r}, expected YYYY-MM-DD")
+
+
+def import_workouts(conn, file, file_name, chunk_rows=CHUNK_ROWS):
+    """Append every row of a Parquet/CSV workout file in a single transaction.
+
+    Returns the number of rows imported. Nothing is imported if the file is
+    missing a column, has a row without a value or a YYYY-MM-DD date (ValueError)
+    or any row fails to insert.
+    """
+    rows = 0
+    with conn:
+        # Take the write lock first: no other connection can insert until the
+        # commit, so the rows added here are the next `rows` rowids
+        conn.execute("BEGIN IMMEDIATE")
+        first_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM workouts").fetchone()[0]
+        for table in _iter_import_batches(file, file_name, chunk_rows):
+            conn.executemany(INSERT_WORKOUT, zip(*(column.to_pylist() for column in table.columns)))
+            rows += table.num_rows
+        if rows:
+            _apply_aggregates(conn, first_rowid, first_rowid + rows - 1)
+    return rows
+
+
+# -----------------------------
+# Benchmarks
+# -----------------------------
+BENCH_DAYS = 3650
+BENCH_EXERCISES = ["Bench Press", "Squat", "Deadlift", "Overhead Press", "Barbell Row"]
+
+
+def _generate(rows, seed=0):
+    """Random workouts spread evenly over the last BENCH_DAYS days, in date order."""
+    rng = random.Random(seed)
+    first_day = date.today() - timedelta(days=BENCH_DAYS - 1)
+    for i in range(rows):
+        day = first_day + timedelta(days=i * BENCH_DAYS // rows)
+        yield day.isoformat(), rng.choice(BENCH_EXERCISES), rng.randint(1, 5), rng.randint(1, 12), rng.randint(8, 80) * 2.5
+
+
+def _rerun_benchmark(rows):
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, DB_FILE))
+
+        start = time.perf_counter()
+        with conn:
+            conn.executemany(INSERT_WORKOUT, _generate(rows))
+            _apply_aggregates(conn, 1, rows)
+        print(f"loaded {rows:,} sets over {BENCH_DAYS} days in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        df = pd.read_sql_query("SELECT * FROM workouts", conn)
+        df['volume'] = df['sets'] * df['reps'] * df['weight']
+        df['week'] = pd.to_datetime(df['date']).dt.to_period('W').astype(str)
+        expected = df.groupby('week')['volume'].sum()
+        old_time = time.perf_counter() - start
+        print(f"old rerun (read everything, group in pandas): {old_time:.2f}s")
+
+        weekly = dict(weekly_volume(conn))
+        assert list(weekly) == list(expected.index)
+        assert all(abs(weekly[week] - volume) < 1e-6 * volume for week, volume in expected.items())
+
+        # Records and trends checked against a full pandas pass over the same rows
+        bench = df[df['exercise'] == "Bench Press"]
+        start = time.perf_counter()
+        record = personal_record(conn, "Bench Press")
+        record_time = time.perf_counter() - start
+        assert record["max_weight"][0] == bench['weight'].max()
+        assert abs(record["best_epley"][0] - epley(bench['weight'], bench['reps']).max()) < 1e-9
+        assert abs(record["best_session_volume"][0] - bench.groupby('date')['volume'].sum().max()) < 1e-6
+
+        start = time.perf_counter()
+        trend_dates, trend = e1rm_trend(conn, "Bench Press")
+        trend_time = time.perf_counter() - start
+        pandas_trend = bench.assign(e1rm=epley(bench['weight'], bench['reps'])).groupby('date')['e1rm'].max()
+        assert np.allclose(trend, pandas_trend.to_numpy())
+        print(f"PR lookup: {record_time * 1000:.2f} ms, e1RM trend over {len(bench):,} sets: {trend_time * 1000:.0f} ms")
+        del df, expected, bench
+
+        # Walk 200 pages deep once to get a cursor far from the newest rows
+        cursor = None
+        for _ in range(200):
+            _, cursor = history_page(conn, cursor)
+
+        for label, page_cursor in [("first page", None), ("page 201", cursor)]:
+            timings = []
+            for _ in range(50):
+                # One rerun: the weekly chart, the row count and one history page
+                start = time.perf_counter()
+                weekly_volume(conn)
+                workout_count(conn)
+                history_page(conn, page_cursor)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            print(f"new rerun, {label}: median {timings[len(timings) // 2]:.2f} ms, worst {timings[-1]:.2f} ms")
+
+
+def _import_benchmark(rows, old_sample=20_000):
+    import resource
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The source file is written in batches too, so it never sits in memory whole
+        source = os.path.join(tmp, "workouts.parquet")
+        generated = _generate(rows)
+        with pq.ParquetWriter(source, WORKOUT_SCHEMA) as writer:
+            while True:
+                batch = [row for _, row in zip(range(EXPORT_BATCH_ROWS), generated)]
+                if not batch:
+                    break
+                columns = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), WORKOUT_SCHEMA)]
+                writer.write_batch(pa.record_batch(columns, schema=WORKOUT_SCHEMA))
+
+        # The Day7 form: one INSERT and one commit per row, on a plain connection
+        old_conn = sqlite3.connect(os.path.join(tmp, "old.db"))
+        old_conn.execute("CREATE TABLE workouts (date TEXT, exercise TEXT, sets INTEGER, reps INTEGER, weight REAL)")
+        start = time.perf_counter()
+        for row in _generate(old_sample, seed=1):
+            old_conn.execute("INSERT INTO workouts VALUES (?, ?, ?, ?, ?)", row)
+            old_conn.commit()
+        old_rate = old_sample / (time.perf_counter() - start)
+        print(f"row-by-row INSERT + commit: {old_rate:,.0f} rows/s over {old_sample:,} rows "
+              f"(~{rows / old_rate / 60:.0f} min for {rows:,})")
+
+        conn = connect(os.path.join(tmp, DB_FILE))
+        start = time.perf_counter()
+        with open(source, "rb") as f:
+            imported = import_workouts(conn, f, source)
+        elapsed = time.perf_counter() - start
+        print(f"import_workouts (Parquet): {imported:,} rows in {elapsed:.1f}s ({imported / elapsed:,.0f} rows/s)")
+
+        for out_name in ("export.parquet", "export.csv"):
+            out_path = os.path.join(tmp, out_name)
+            start = time.perf_counter()
+            exported = export_workouts(conn, out_path)
+            print(f"export_workouts ({out_name}): {exported:,} rows in {time.perf_counter() - start:.1f}s, "
+                  f"{os.path.getsize(out_path) / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        with open(os.path.join(tmp, "export.csv"), "rb") as f:
+            csv_conn = connect(os.path.join(tmp, "csv.db"))
+            imported = import_workouts(csv_conn, f, "export.csv")
+        print(f"import_workouts (CSV): {imported:,} rows in {time.perf_counter() - start:.1f}s")
+        print(f"peak memory: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "import":
+        _import_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 10_000_000)
+    else:
+        _rerun_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000)
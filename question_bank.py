@@ -0,0 +1,212 @@
+# Question bank for the prompt engineering quiz (Day9).
+#
+# Questions are edited in questions.jsonl (one JSON object per line, with a stable
+# "id") and synced into SQLite whenever the file changes. Sessions never load the
+# bank: a quiz is a reservoir sample of IDs taken from the topic/difficulty
+# indexes, and each question is fetched by ID only when it is shown.
+#
+# Run `python question_bank.py [bank_size]` to time quiz assembly on a 100k bank.
+import json
+import math
+import os
+import random
+import sqlite3
+import time
+
+DB_FILE = "question_bank.db"
+SOURCE_FILE = "questions.jsonl"
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+# -----------------------------
+# DB Setup
+# -----------------------------
+def connect(path=DB_FILE, source=SOURCE_FILE):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY,
+            topic TEXT NOT NULL,
+            difficulty TEXT NOT NULL,
+            question TEXT NOT NULL,
+            options TEXT NOT NULL,
+            answer TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_questions_topic_difficulty ON questions (topic, difficulty);
+        CREATE INDEX IF NOT EXISTS idx_questions_topic ON questions (topic);
+        CREATE INDEX IF NOT EXISTS idx_questions_difficulty ON questions (difficulty);
+
+        CREATE TABLE IF NOT EXISTS bank_source (
+            path TEXT PRIMARY KEY,
+            signature TEXT NOT NULL
+        );
+    """)
+    if source and os.path.exists(source):
+        sync_from_jsonl(conn, source)
+    return conn
+
+
+# -----------------------------
+# Importing
+# -----------------------------
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            q = json.loads(line)
+            if q["answer"] not in q["options"]:
+                raise ValueError(f"{path}:{line_no}: answer is not one of the options")
+            if q["difficulty"] not in DIFFICULTIES:
+                raise ValueError(f"{path}:{line_no}: difficulty must be one of {', '.join(DIFFICULTIES)}")
+            yield q["id"], q["topic"], q["difficulty"], q["question"], json.dumps(q["options"]), q["answer"]
+
+
+def sync_from_jsonl(conn, path=SOURCE_FILE, force=False):
+    """Upsert every question in `path` and drop the ones no longer in it.
+
+    Skipped when the file is unchanged since the last sync. Returns True if the
+    bank was updated.
+    """
+    stat = os.stat(path)
+    signature = f"{stat.st_mtime_ns}:{stat.st_size}"
+    key = os.path.abspath(path)
+    row = conn.execute("SELECT signature FROM bank_source WHERE path = ?", (key,)).fetchone()
+    if row and row[0] == signature and not force:
+        return False
+
+    with conn:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS synced_ids (id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.synced_ids")
+        for q in _read_jsonl(path):
+            conn.execute("INSERT INTO temp.synced_ids (id) VALUES (?)", (q[0],))
+            conn.execute("""
+                INSERT INTO questions (id, topic, difficulty, question, options, answer) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    topic = excluded.topic, difficulty = excluded.difficulty, question = excluded.question,
+                    options = excluded.options, answer = excluded.answer
+            """, q)
+        conn.execute("DELETE FROM questions WHERE id NOT IN (SELECT id FROM temp.synced_ids)")
+        conn.execute("""
+            INSERT INTO bank_source (path, signature) VALUES (?, ?)
+            ON CONFLICT (path) DO UPDATE SET signature = excluded.signature
+        """, (key, signature))
+    return True
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def get_question(conn, question_id):
+    """One question as {"id", "topic", "difficulty", "question", "options", "answer"}."""
+    row = conn.execute(
+        "SELECT id, topic, difficulty, question, options, answer FROM questions WHERE id = ?",
+        (question_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    qid, topic, difficulty, question, options, answer = row
+    return {"id": qid, "topic": topic, "difficulty": difficulty, "question": question,
+            "options": json.loads(options), "answer": answer}
+
+
+def get_topics(conn):
+    return [row[0] for row in conn.execute("SELECT DISTINCT topic FROM questions ORDER BY topic")]
+
+
+def _id_filter(topic=None, difficulty=None):
+    """WHERE clause and parameters for the filters.
+
+    Each combination has an index whose entries are in id order within the
+    filter, so "id > ? ORDER BY id" walks the index without sorting.
+    """
+    clauses, params = [], []
+    if topic:
+        clauses.append("topic = ?")
+        params.append(topic)
+    if difficulty:
+        clauses.append("difficulty = ?")
+        params.append(difficulty)
+    return " AND ".join(clauses + ["id > ?"]), params
+
+
+def sample_question_ids(conn, k, topic=None, difficulty=None, rng=random):
+    """Up to `k` random question IDs matching the filters, in random order.
+
+    Reservoir sampling (Algorithm L): after the first `k` IDs, it computes how
+    many IDs to skip before the next one enters the reservoir, and SQLite skips
+    them with OFFSET. SQLite still steps through every skipped entry, so a
+    sample reads all matching IDs once: from a covering index when filtered, or
+    from the table itself for the whole bank. What the skips save is the rest:
+    only about k * (1 + ln(n / k)) IDs come back to Python.
+    """
+    where, params = _id_filter(topic, difficulty)
+    reservoir = [row[0] for row in conn.execute(
+        f"SELECT id FROM questions WHERE {where} ORDER BY id LIMIT ?", (*params, -1, k))]
+    if len(reservoir) == k and k > 0:
+        last_id = reservoir[-1]
+        w = math.exp(math.log(rng.random()) / k)
+        while True:
+            skip = math.floor(math.log(rng.random()) / math.log(1 - w))
+            row = conn.execute(
+                f"SELECT id FROM questions WHERE {where} ORDER BY id LIMIT 1 OFFSET ?", (*params, last_id, skip)
+            ).fetchone()
+            if row is None:
+                break
+            last_id = row[0]
+            reservoir[rng.randrange(k)] = last_id
+            w *= math.exp(math.log(rng.random()) / k)
+    rng.shuffle(reservoir)
+    return reservoir
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    from collections import Counter
+
+    bank_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    topics = ["Basics", "Techniques", "Safety", "Parameters", "Evaluation"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, SOURCE_FILE)
+        rng = random.Random(0)
+        with open(source, "w", encoding="utf-8") as f:
+            for i in range(1, bank_size + 1):
+                options = [f"Option {j} for question {i}" for j in range(4)]
+                f.write(json.dumps({"id": i, "topic": rng.choice(topics), "difficulty": rng.choice(DIFFICULTIES),
+                                    "question": f"Synthetic question {i}?", "options": options,
+                                    "answer": rng.choice(options)}) + "\n")
+
+        start = time.perf_counter()
+        conn = connect(os.path.join(tmp, DB_FILE), source)
+        print(f"synced {bank_size:,} questions from JSONL in {time.perf_counter() - start:.2f}s (once per change)")
+
+        start = time.perf_counter()
+        with open(source, encoding="utf-8") as f:
+            [json.loads(line) for line in f]
+        print(f"loading the whole bank into a session: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        for label, filters in [("whole bank", {}), ("one topic", {"topic": "Safety"}),
+                               ("topic + difficulty", {"topic": "Safety", "difficulty": "hard"})]:
+            timings = []
+            for _ in range(20):
+                start = time.perf_counter()
+                quiz = [get_question(conn, qid) for qid in sample_question_ids(conn, 20, **filters)]
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            print(f"20-question quiz, {label}: median {timings[len(timings) // 2]:.1f} ms")
+
+        # Every question should be picked about equally often
+        counts = Counter()
+        for _ in range(2000):
+            counts.update(sample_question_ids(conn, 20, topic="Safety", difficulty="hard"))
+        population = conn.execute(
+            "SELECT COUNT(*) FROM questions WHERE topic = 'Safety' AND difficulty = 'hard'").fetchone()[0]
+        expected = 2000 * 20 / population
+        print(f"uniformity: picks per question {min(counts.values())}..{max(counts.values())} "
+              f"(expected ~{expected:.1f}, {len(counts)}/{population} questions seen)")
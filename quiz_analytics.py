@@ -0,0 +1,229 @@
+# Attempt analytics for the prompt engineering quiz (Day9).
+#
+# Every submitted or skipped question is stored in `attempts`, and in the same
+# transaction folded into per-question counters (attempts, correct, skipped) and
+# per-option pick counts. Item difficulty for the instructor view is read from
+# those counters, one row per question, however many attempts have been made.
+#
+# Run `python quiz_analytics.py [attempts]` to load 2M attempts and time the
+# dashboard, or `python quiz_analytics.py verify|rebuild [db_file]` to check
+# the counters.
+import sqlite3
+import sys
+import time
+
+DB_FILE = "quiz_analytics.db"
+MIN_ATTEMPTS = 5
+
+INSERT_ATTEMPT = "INSERT INTO attempts (quiz_id, question_id, answer, correct, ts) VALUES (?, ?, ?, ?, ?)"
+UPSERT_QUESTION = """
+    INSERT INTO question_stats (question_id, attempts, correct, skipped) VALUES (?, 1, ?, ?)
+    ON CONFLICT (question_id) DO UPDATE SET
+        attempts = attempts + 1,
+        correct = correct + excluded.correct,
+        skipped = skipped + excluded.skipped
+"""
+UPSERT_OPTION = """
+    INSERT INTO option_stats (question_id, option, picks) VALUES (?, ?, 1)
+    ON CONFLICT (question_id, option) DO UPDATE SET picks = picks + 1
+"""
+
+
+# -----------------------------
+# DB Setup
+# -----------------------------
+def connect(path=DB_FILE):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS attempts (
+            id INTEGER PRIMARY KEY,
+            quiz_id TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            answer TEXT,
+            correct INTEGER NOT NULL,
+            ts REAL NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS question_stats (
+            question_id INTEGER PRIMARY KEY,
+            attempts INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            skipped INTEGER NOT NULL
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS option_stats (
+            question_id INTEGER NOT NULL,
+            option TEXT NOT NULL,
+            picks INTEGER NOT NULL,
+            PRIMARY KEY (question_id, option)
+        ) WITHOUT ROWID;
+    """)
+    conn.commit()
+    return conn
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+def record_attempt(conn, quiz_id, question_id, answer, correct, ts=None):
+    """Store one answered (or skipped, answer=None) question and update its counters."""
+    record_attempts(conn, [(quiz_id, question_id, answer, correct, ts or time.time())])
+
+
+def record_attempts(conn, attempts):
+    """Store many (quiz_id, question_id, answer, correct, ts) rows in one transaction."""
+    attempts = [(quiz_id, question_id, answer, int(bool(correct)), ts)
+                for quiz_id, question_id, answer, correct, ts in attempts]
+    with conn:
+        conn.executemany(INSERT_ATTEMPT, attempts)
+        conn.executemany(UPSERT_QUESTION, [
+            (question_id, correct, int(answer is None))
+            for _, question_id, answer, correct, _ in attempts
+        ])
+        conn.executemany(UPSERT_OPTION, [
+            (question_id, answer)
+            for _, question_id, answer, _, _ in attempts if answer is not None
+        ])
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def item_difficulty(conn, limit=20, hardest=True, min_attempts=MIN_ATTEMPTS):
+    """[(question_id, attempts, correct_rate, skip_rate)] ordered by correct rate.
+
+    Questions with fewer than `min_attempts` attempts are left out, so a single
+    unlucky answer does not top the list.
+    """
+    return conn.execute(f"""
+        SELECT question_id, attempts, correct * 1.0 / attempts, skipped * 1.0 / attempts
+        FROM question_stats
+        WHERE attempts >= ?
+        ORDER BY 3 {"ASC" if hardest else "DESC"}, attempts DESC
+        LIMIT ?
+    """, (min_attempts, limit)).fetchall()
+
+
+def question_summary(conn, question_id):
+    """(attempts, correct, skipped) for one question, or None if never attempted."""
+    return conn.execute(
+        "SELECT attempts, correct, skipped FROM question_stats WHERE question_id = ?", (question_id,)
+    ).fetchone()
+
+
+def option_distribution(conn, question_id):
+    """{option: picks} for one question."""
+    return dict(conn.execute("SELECT option, picks FROM option_stats WHERE question_id = ?", (question_id,)))
+
+
+def attempt_count(conn):
+    return conn.execute("SELECT COALESCE(SUM(attempts), 0) FROM question_stats").fetchone()[0]
+
+
+# -----------------------------
+# Rebuild & Verify
+# -----------------------------
+REBUILT_QUESTIONS = """
+    SELECT question_id, COUNT(*), SUM(correct), SUM(answer IS NULL) FROM attempts GROUP BY question_id
+"""
+REBUILT_OPTIONS = """
+    SELECT question_id, answer, COUNT(*) FROM attempts WHERE answer IS NOT NULL GROUP BY question_id, answer
+"""
+
+
+def verify(conn):
+    """Compare the counters with a fresh aggregate of the attempts table.
+
+    Returns a list of (table, key, stored, rebuilt) for every mismatch.
+    """
+    mismatches = []
+    checks = [
+        ("question_stats", "SELECT question_id, attempts, correct, skipped FROM question_stats", REBUILT_QUESTIONS, 1),
+        ("option_stats", "SELECT question_id, option, picks FROM option_stats", REBUILT_OPTIONS, 2),
+    ]
+    for table, stored_sql, rebuilt_sql, key_len in checks:
+        stored = {row[:key_len]: row[key_len:] for row in conn.execute(stored_sql)}
+        rebuilt = {row[:key_len]: row[key_len:] for row in conn.execute(rebuilt_sql)}
+        for key in sorted(stored.keys() | rebuilt.keys()):
+            if stored.get(key) != rebuilt.get(key):
+                mismatches.append((table, key, stored.get(key), rebuilt.get(key)))
+    return mismatches
+
+
+def rebuild(conn):
+    with conn:
+        conn.execute("DELETE FROM question_stats")
+        conn.execute("DELETE FROM option_stats")
+        conn.execute(f"INSERT INTO question_stats (question_id, attempts, correct, skipped) {REBUILT_QUESTIONS}")
+        conn.execute(f"INSERT INTO option_stats (question_id, option, picks) {REBUILT_OPTIONS}")
+
+
+# -----------------------------
+# Commands & Benchmark
+# -----------------------------
+def _benchmark(total, questions=10_000):
+    import os
+    import random
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, DB_FILE))
+        rng = random.Random(0)
+        # Each question has its own chance of being answered correctly
+        p_correct = [rng.uniform(0.2, 0.95) for _ in range(questions + 1)]
+
+        start = time.perf_counter()
+        batch = []
+        for i in range(total):
+            question_id = rng.randint(1, questions)
+            if rng.random() < 0.05:
+                batch.append((f"quiz{i // 20}", question_id, None, False, i))
+            else:
+                correct = rng.random() < p_correct[question_id]
+                batch.append((f"quiz{i // 20}", question_id, "A" if correct else rng.choice("BCD"), correct, i))
+            if len(batch) == 100_000:
+                record_attempts(conn, batch)
+                batch = []
+        record_attempts(conn, batch)
+        print(f"recorded {total:,} attempts on {questions:,} questions in {time.perf_counter() - start:.1f}s")
+
+        timings = []
+        for i in range(200):
+            start = time.perf_counter()
+            record_attempt(conn, "live", rng.randint(1, questions), "B", False)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"one attempt (insert + counters): median {timings[len(timings) // 2]:.2f} ms")
+
+        start = time.perf_counter()
+        conn.execute(f"""
+            SELECT question_id, COUNT(*), AVG(correct), AVG(answer IS NULL) FROM attempts
+            GROUP BY question_id HAVING COUNT(*) >= {MIN_ATTEMPTS} ORDER BY 3 LIMIT 20
+        """).fetchall()
+        scan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        hardest = item_difficulty(conn)
+        option_distribution(conn, hardest[0][0])
+        counters_time = time.perf_counter() - start
+        print(f"dashboard from raw attempts: {scan_time * 1000:.0f} ms, from counters: {counters_time * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        mismatches = verify(conn)
+        print(f"verify: {len(mismatches)} mismatches in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("verify", "rebuild"):
+        conn = connect(sys.argv[2] if len(sys.argv) > 2 else DB_FILE)
+        if sys.argv[1] == "rebuild":
+            rebuild(conn)
+        mismatches = verify(conn)
+        for table, key, stored, rebuilt in mismatches:
+            print(f"{table} {key}: stored {stored}, rebuilt {rebuilt}")
+        print(f"{attempt_count(conn):,} attempts checked, {len(mismatches)} mismatched counters")
+        sys.exit(1 if mismatches else 0)
+
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,212 @@
+# Exchange-rate provider for the unit converter (Day5).
+#
+# - One shared requests.Session, so connections to the API are pooled and reused
+# - All supported currencies for a base are fetched in a single call
+# - Rates are cached in memory for `ttl` seconds; after that the cached rates are
+#   still served while a background thread refreshes them (stale-while-revalidate)
+# - Every successful fetch is saved to disk and used as a fallback when offline
+# - After a failed fetch the saved rates are served as "offline" without calling
+#   the API again for `retry_after` seconds; then it is retried in the
+#   background, so a rerun never waits on an API that is down
+#
+# Run `python rate_provider.py` to exercise it against a local stub HTTP server.
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_URL = "https://api.apilayer.com/exchangerates_data/latest"
+CURRENCIES = ["USD", "INR", "EUR", "GBP", "JPY"]
+
+# source is one of: "live", "cache", "stale" (refresh running), "offline" (disk snapshot)
+RateSnapshot = namedtuple("RateSnapshot", ["base", "rates", "fetched_at", "source"])
+
+
+class RatesUnavailable(Exception):
+    pass
+
+
+class RateProvider:
+    def __init__(self, api_key=None, base_url=DEFAULT_URL, currencies=CURRENCIES,
+                 ttl=3600, stale_ttl=24 * 3600, snapshot_dir=".rates", timeout=10, retry_after=300):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.currencies = list(currencies)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.snapshot_dir = snapshot_dir
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if api_key:
+            self.session.headers["apikey"] = api_key
+
+        self._cache = {}
+        self._refreshing = set()
+        self._failed_at = {}  # base -> time of the last failed fetch, until one succeeds
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def get_rates(self, base):
+        """Return a RateSnapshot for `base`, hitting the network only when needed."""
+        with self._lock:
+            cached = self._cache.get(base)
+            failed_at = self._failed_at.get(base)
+        age = time.time() - cached.fetched_at if cached else None
+
+        if cached and age < self.ttl:
+            return cached._replace(source="cache")
+        if cached and age < self.ttl + self.stale_ttl:
+            self._refresh_in_background(base)
+            return cached._replace(source="stale")
+
+        if failed_at is not None:
+            # The API failed before: don't wait on it again, retry in the background
+            snapshot = cached or self._load_snapshot(base)
+            self._refresh_in_background(base)
+            if snapshot is None:
+                raise RatesUnavailable(f"Could not fetch rates for {base} and no saved rates exist")
+            with self._lock:
+                self._cache[base] = snapshot
+            return snapshot._replace(source="offline")
+
+        try:
+            return self._fetch(base)
+        except (requests.RequestException, ValueError) as e:
+            snapshot = cached or self._load_snapshot(base)
+            if snapshot is None:
+                raise RatesUnavailable(f"Could not fetch rates for {base} and no saved rates exist: {e}") from e
+            with self._lock:
+                self._cache[base] = snapshot
+            return snapshot._replace(source="offline")
+
+    # -----------------------------
+    # Fetching & Refreshing
+    # -----------------------------
+    def _fetch(self, base):
+        """Fetch live rates for `base`, remembering when an attempt fails."""
+        symbols = ",".join(c for c in self.currencies if c != base)
+        try:
+            response = self.session.get(self.base_url, params={"base": base, "symbols": symbols}, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            if "rates" not in data:
+                raise ValueError(f"Unexpected response: {data}")
+        except (requests.RequestException, ValueError):
+            with self._lock:
+                self._failed_at[base] = time.time()
+            raise
+
+        rates = dict(data["rates"])
+        rates[base] = 1.0
+        snapshot = RateSnapshot(base, rates, time.time(), "live")
+        with self._lock:
+            self._cache[base] = snapshot
+            self._failed_at.pop(base, None)
+        self._save_snapshot(snapshot)
+        return snapshot
+
+    def _refresh_in_background(self, base):
+        with self._lock:
+            failed_at = self._failed_at.get(base)
+            if base in self._refreshing or (failed_at is not None and time.time() - failed_at < self.retry_after):
+                return
+            self._refreshing.add(base)
+
+        def refresh():
+            try:
+                self._fetch(base)
+            except (requests.RequestException, ValueError):
+                pass  # keep serving the saved rates; _fetch noted the failure for the backoff
+            finally:
+                with self._lock:
+                    self._refreshing.discard(base)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    # -----------------------------
+    # Disk Snapshots
+    # -----------------------------
+    def _snapshot_path(self, base):
+        return os.path.join(self.snapshot_dir, f"rates_{base}.json")
+
+    def _save_snapshot(self, snapshot):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = self._snapshot_path(snapshot.base)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"base": snapshot.base, "rates": snapshot.rates, "fetched_at": snapshot.fetched_at}, f)
+        os.replace(tmp_path, path)
+
+    def _load_snapshot(self, base):
+        try:
+            with open(self._snapshot_path(base)) as f:
+                data = json.load(f)
+            return RateSnapshot(data["base"], data["rates"], data["fetched_at"], "offline")
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+# -----------------------------
+# Local Stub Server Demo
+# -----------------------------
+if __name__ == "__main__":
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    calls = []
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            calls.append(self.path)
+            body = json.dumps({"base": "USD", "rates": {"INR": 83.0, "EUR": 0.92, "GBP": 0.79, "JPY": 150.0}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/latest"
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        provider = RateProvider(base_url=url, ttl=0.2, stale_ttl=60, snapshot_dir=snapshot_dir)
+        print("first call:   ", provider.get_rates("USD").source, f"({len(calls)} request)")
+        for _ in range(100):
+            provider.get_rates("USD")
+        print("100 more calls:", provider.get_rates("USD").source, f"({len(calls)} request)")
+
+        time.sleep(0.3)
+        print("after ttl:    ", provider.get_rates("USD").source)
+        time.sleep(0.1)
+        print("refreshed:    ", provider.get_rates("USD").source, f"({len(calls)} requests)")
+
+        server.shutdown()
+        server.server_close()
+        # ttl and stale_ttl of 0: the saved rates count as expired, as after a long outage
+        offline = RateProvider(base_url=url, ttl=0, stale_ttl=0, snapshot_dir=snapshot_dir, timeout=1)
+        snapshot = offline.get_rates("USD")
+        print("server down:  ", snapshot.source, f"USD→INR = {snapshot.rates['INR']}")
+
+        # Within retry_after the API is not called at all
+        attempts = []
+        offline.session.get = lambda *args, **kwargs: attempts.append(args) or time.sleep(offline.timeout)
+        start = time.perf_counter()
+        for _ in range(100):
+            snapshot = offline.get_rates("USD")
+        print("100 reruns:   ", snapshot.source, f"in {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"{len(attempts)} API calls")
@@ -0,0 +1,243 @@
+# Load test for the event registration store (Day10).
+#
+# Drives RegistrationStore the way Day10.py does: every visitor checks the seats
+# left in a slot, registers if there is room and now and then looks up their
+# email and cancels one of their registrations. Visitors are threads, optionally
+# spread over several processes sharing one log, and all start at the same
+# moment, as when a popular event opens. A share of them go for the same hot
+# slot.
+#
+# Afterwards it reports throughput and p50/p95/p99 latency per action, then
+# checks the log from a fresh store:
+# - capacity violations: replaying the log, no slot may ever hold more than
+#   the capacity (exact unless --compact-min lets compaction drop history)
+# - lost writes: every accepted, uncancelled registration must be there
+# - resurrected cancels: no cancelled registration may be there
+# - duplicate IDs: no two registrations may have been given the same ID
+# - verify(): the replayed log must match the store's index
+# and exits with status 1 if any of them fails, so it can gate storage changes.
+#
+# Run `python registration_loadtest.py [--visitors N] [--processes P] ...`;
+# see --help for the options.
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from registration_store import LOG_FILE, RegistrationStore, verify
+
+EVENTS = ["Keynote", "Workshop A", "Workshop B", "Networking"]
+DATES = ["2025-09-22", "2025-09-23", "2025-09-24", "2025-09-25", "2025-09-26"]
+# Slots each event can be booked in, as offered by Day10.py
+VALID_SLOTS = {
+    "Keynote": ["08:00–10:00"],
+    "Workshop A": ["08:00–10:00", "10:00–12:00", "12:00–14:00", "14:00–16:00", "16:00–18:00"],
+    "Workshop B": ["08:00–10:00", "10:00–12:00", "12:00–14:00", "14:00–16:00", "16:00–18:00"],
+    "Networking": ["16:00–18:00"],
+}
+HOT_SLOT = ("Keynote", DATES[0], "08:00–10:00")
+ACTIONS = ["seat check", "register", "lookup", "cancel"]
+
+
+# -----------------------------
+# Visitors
+# -----------------------------
+def _open_store(path, compact_min):
+    return RegistrationStore(path, csv_file=None, legacy_db=None, compact_min=compact_min)
+
+
+def run_visitors(path, first_visitor, visitors, options, seed):
+    """Run `visitors` threads against the log at `path` and merge their results.
+
+    Returns a dict with per-action timings in seconds, the IDs accepted and
+    cancelled, the number of registrations refused as full, and the wall-clock
+    start and end of the run.
+    """
+    store = _open_store(path, options["compact_min"])
+    barrier = threading.Barrier(visitors)
+    results = [None] * visitors
+
+    def visit(v):
+        rng = random.Random(seed * 1_000_003 + v)
+        email = f"visitor{first_visitor + v}@example.com"
+        timings = {action: [] for action in ACTIONS}
+        accepted, cancelled, full = [], [], 0
+
+        def timed(action, fn, *args):
+            start = time.perf_counter()
+            result = fn(*args)
+            timings[action].append(time.perf_counter() - start)
+            return result
+
+        barrier.wait()
+        for _ in range(options["actions"]):
+            if accepted and rng.random() < options["cancel_rate"]:
+                # Day10's cancel flow: look up by email, cancel one by ID
+                matches = timed("lookup", store.by_email, email)
+                registration_id = rng.choice(matches)["id"]
+                if timed("cancel", store.cancel, registration_id):
+                    cancelled.append(registration_id)
+                    accepted.remove(registration_id)
+                continue
+            if rng.random() < options["hot_share"]:
+                event, date, slot = HOT_SLOT
+            else:
+                event = rng.choice(EVENTS)
+                date, slot = rng.choice(DATES), rng.choice(VALID_SLOTS[event])
+            taken = timed("seat check", store.seats_taken, event, date, slot)
+            if taken >= options["capacity"]:
+                full += 1
+                continue
+            registration_id = timed("register", store.register, f"Visitor {first_visitor + v}", email,
+                                    event, date, slot, options["capacity"])
+            if registration_id is None:
+                full += 1
+            else:
+                accepted.append(registration_id)
+        results[v] = (timings, accepted, cancelled, full)
+
+    threads = [threading.Thread(target=visit, args=(v,)) for v in range(visitors)]
+    for thread in threads:
+        thread.start()
+    started = time.time()
+    for thread in threads:
+        thread.join()
+    ended = time.time()
+    while store.compacting:
+        time.sleep(0.01)
+
+    merged = {"timings": {action: [] for action in ACTIONS}, "accepted": [], "cancelled": [], "full": 0,
+              "started": started, "ended": ended}
+    for timings, accepted, cancelled, full in results:
+        for action, values in timings.items():
+            merged["timings"][action].extend(values)
+        # Registrations cancelled during the run are reported separately
+        merged["accepted"].extend(accepted)
+        merged["cancelled"].extend(cancelled)
+        merged["full"] += full
+    return merged
+
+
+# -----------------------------
+# Checks
+# -----------------------------
+def peak_occupancy(path):
+    """{(event, date, slot): most seats ever taken at once}, replaying the log in order."""
+    counts, peaks, slots = {}, {}, {}
+    with open(path, "rb") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["op"] == "add":
+                key = (record["event"], record["date"], record["slot"])
+                slots[record["id"]] = key
+                counts[key] = counts.get(key, 0) + 1
+                peaks[key] = max(peaks.get(key, 0), counts[key])
+            elif record["op"] == "cancel" and record["id"] in slots:
+                counts[slots.pop(record["id"])] -= 1
+    return peaks
+
+
+def check(path, result, capacity, compact_min):
+    """Print the consistency checks. Returns the number of failures."""
+    failures = 0
+    store = _open_store(path, compact_min)
+    live = set(store.index.registrations)
+    accepted, cancelled = set(result["accepted"]), set(result["cancelled"])
+
+    peaks = peak_occupancy(path)
+    over = {key: peak for key, peak in peaks.items() if peak > capacity}
+    hottest = max(peaks.items(), key=lambda item: item[1], default=(None, 0))
+    print(f"capacity violations: {len(over)} slots "
+          f"(peak {hottest[1]}/{capacity}{' on ' + ' / '.join(hottest[0]) if hottest[0] else ''})")
+    for key, peak in sorted(over.items()):
+        print(f"  {' / '.join(key)}: {peak} seats taken")
+    failures += len(over)
+
+    given = result["accepted"] + result["cancelled"]
+    duplicates = len(given) - len(set(given))
+    lost = accepted - live
+    resurrected = cancelled & live
+    unexpected = live - accepted
+    print(f"lost writes: {len(lost)}, resurrected cancels: {len(resurrected)}, "
+          f"unexpected registrations: {len(unexpected)}, duplicate IDs: {duplicates}")
+    failures += len(lost) + len(resurrected) + len(unexpected) + duplicates
+
+    mismatches = verify(store)
+    print(f"verify: {len(mismatches)} mismatches")
+    failures += len(mismatches)
+    return failures
+
+
+# -----------------------------
+# Report
+# -----------------------------
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def report(results, elapsed):
+    total = 0
+    for action in ACTIONS:
+        timings = sorted(t for result in results for t in result["timings"][action])
+        total += len(timings)
+        if timings:
+            print(f"{action:>10}: {len(timings):>8,} × p50 {_percentile(timings, 0.50) * 1000:7.2f} ms  "
+                  f"p95 {_percentile(timings, 0.95) * 1000:7.2f} ms  p99 {_percentile(timings, 0.99) * 1000:7.2f} ms")
+    accepted = sum(len(result["accepted"]) + len(result["cancelled"]) for result in results)
+    cancelled = sum(len(result["cancelled"]) for result in results)
+    full = sum(result["full"] for result in results)
+    print(f"{accepted:,} registrations accepted, {full:,} refused as full, {cancelled:,} cancelled")
+    print(f"throughput: {total / elapsed:,.0f} actions/s over {elapsed:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load test for the Day10 registration store.")
+    parser.add_argument("--visitors", type=int, default=1000, help="simultaneous visitors (default 1000)")
+    parser.add_argument("--processes", type=int, default=4, help="server processes sharing the log (default 4)")
+    parser.add_argument("--actions", type=int, default=10, help="actions per visitor (default 10)")
+    parser.add_argument("--capacity", type=int, default=24, help="seats per slot (default 24, as in Day10)")
+    parser.add_argument("--hot-share", type=float, default=0.5,
+                        help="share of registrations aimed at the hot slot (default 0.5)")
+    parser.add_argument("--cancel-rate", type=float, default=0.1,
+                        help="chance an action is a cancellation, once a visitor has registered (default 0.1)")
+    parser.add_argument("--compact-min", type=float, default=float("inf"),
+                        help="dead lines before compacting (default: never, so the capacity replay is exact)")
+    parser.add_argument("--log", help="log file to use (default: a fresh one in a temporary directory)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    options = {"actions": args.actions, "capacity": args.capacity, "hot_share": args.hot_share,
+               "cancel_rate": args.cancel_rate, "compact_min": args.compact_min}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.log or os.path.join(tmp, LOG_FILE)
+        if os.path.exists(path):
+            parser.error(f"{path} already exists; the checks need a fresh log")
+        _open_store(path, args.compact_min)
+
+        processes = max(1, min(args.processes, args.visitors))
+        share = [args.visitors // processes + (i < args.visitors % processes) for i in range(processes)]
+        firsts = [sum(share[:i]) for i in range(processes)]
+        print(f"{args.visitors:,} visitors × {args.actions} actions over {processes} process(es), "
+              f"capacity {args.capacity}, {args.hot_share:.0%} aimed at {' / '.join(HOT_SLOT)}")
+        if processes == 1:
+            results = [run_visitors(path, 0, args.visitors, options, args.seed)]
+        else:
+            with ProcessPoolExecutor(processes) as pool:
+                results = list(pool.map(run_visitors, [path] * processes, firsts, share,
+                                        [options] * processes, [args.seed + i for i in range(processes)]))
+        elapsed = max(result["ended"] for result in results) - min(result["started"] for result in results)
+
+        report(results, elapsed)
+        merged = {"accepted": [i for r in results for i in r["accepted"]],
+                  "cancelled": [i for r in results for i in r["cancelled"]]}
+        failures = check(path, merged, args.capacity, args.compact_min)
+    print("PASS" if not failures else f"FAIL ({failures} problems)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
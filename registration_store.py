@@ -0,0 +1,849 @@
+# Shared registration store for the event registration app (Day10).
+#
+# - Registrations are kept in an append-only log (one JSON record per line):
+#   registering appends an "add" record and cancelling appends a "cancel"
+#   tombstone, so a cancel costs a few dozen bytes however large the log is and
+#   a crash can at worst leave one torn line at the end, which is dropped
+# - At startup the log is replayed into an in-memory index: registrations by ID,
+#   the number of seats taken per (event, date, slot), so a seat check is one
+#   dict lookup, and registration IDs per lower-cased email, so finding and
+#   cancelling someone's registrations never scans the others
+# - The organizer dashboard reads pages: live registration IDs, overall and per
+#   slot, and emails are kept in sorted block lists, so a page is a bisect to
+#   the cursor followed by reading one page of rows; occupancy
+#   comes from the seat counters and the CSV export is written a chunk at a time
+# - Writers take an exclusive flock on registrations.log.lock and read any
+#   records other processes appended before deciding, so reserving a seat is an
+#   atomic check-and-append that can never exceed capacity
+# - Once tombstones and the records they cancel pass a threshold, a background
+#   thread rewrites the live set to a temporary file and renames it over the
+#   log; writers are only held up while the records appended in the meantime
+#   are copied across. The new file starts with a header giving its length at
+#   the rename, so other processes finish the old file they still have open and
+#   carry on from there instead of replaying the whole log
+# - The first time the store opens, registrations are imported from the earlier
+#   SQLite store (registrations.db) or, failing that, from registrations.csv
+#
+# Run `python registration_store.py [visitors]` to race visitors for one slot and
+# time seat checks, cancels and compaction at 1M registrations,
+# `python registration_store.py email` to time email lookups from 10k to 1M,
+# `python registration_store.py dashboard` to time organizer dashboard reruns, or
+# `python registration_store.py verify|compact [log_file]` to check or compact a log.
+import csv
+import fcntl
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from heapq import merge
+
+LOG_FILE = "registrations.log"
+CSV_FILE = "registrations.csv"
+LEGACY_DB = "registrations.db"
+# Compact once dead lines (tombstones plus the records they cancel) number at
+# least COMPACT_MIN and COMPACT_RATIO times the live registrations
+COMPACT_MIN = 1000
+COMPACT_RATIO = 0.5
+READ_CHUNK = 16 * 1024 * 1024
+PAGE_SIZE = 50
+EXPORT_CHUNK = 10_000
+# A compacted log starts with a meta line padded to this many bytes, so its
+# length can be filled in once the records appended meanwhile are copied over
+HEADER_BYTES = 160
+
+# Column names shown to organizers and used in the legacy CSV
+COLUMNS = ["Name", "Email", "Event", "Date", "Time Slot"]
+
+
+def normalize_email(email):
+    """Key for the email index: surrounding spaces and letter case don't matter."""
+    return email.strip().lower()
+
+
+def _add_line(registration_id, row):
+    name, email, event, date, slot, ts = row
+    return json.dumps({"op": "add", "id": registration_id, "name": name, "email": email, "event": event,
+                       "date": date, "slot": slot, "ts": ts}, ensure_ascii=False) + "\n"
+
+
+def _cancel_line(registration_id):
+    return json.dumps({"op": "cancel", "id": registration_id}) + "\n"
+
+
+def _meta_line(next_id):
+    return json.dumps({"op": "meta", "next_id": next_id}) + "\n"
+
+
+def _header_line(next_id, epoch, base=0, dead=0):
+    """First line of a compacted log: the `epoch`-th compaction, `base` bytes
+    long when renamed into place, `dead` of its lines dead."""
+    line = json.dumps({"op": "meta", "next_id": next_id, "epoch": epoch, "base": base, "dead": dead})
+    return line.ljust(HEADER_BYTES - 1) + "\n"
+
+
+def _read_header(fd):
+    """The header of a compacted log, or {} for one that was never compacted."""
+    line = os.pread(fd, HEADER_BYTES, 0).split(b"\n", 1)[0]
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return {}
+    return record if record.get("op") == "meta" and "epoch" in record else {}
+
+
+# -----------------------------
+# Index
+# -----------------------------
+class SortedKeys:
+    """Sorted keys (emails or registration IDs) kept in blocks of up to
+    2 * BLOCK, so an insert or a removal shifts one short list instead of the
+    whole sequence."""
+
+    BLOCK = 1000
+
+    def __init__(self, keys=()):
+        keys = sorted(keys)
+        self.blocks = [keys[i:i + self.BLOCK] for i in range(0, len(keys), self.BLOCK)]
+        self.maxes = [block[-1] for block in self.blocks]
+
+    def add(self, key):
+        if not self.blocks:
+            self.blocks, self.maxes = [[key]], [key]
+            return
+        if key > self.maxes[-1]:
+            # New registration IDs always land here
+            i = len(self.blocks) - 1
+            block = self.blocks[i]
+            block.append(key)
+        else:
+            i = bisect_left(self.maxes, key)
+            block = self.blocks[i]
+            insort(block, key)
+        self.maxes[i] = block[-1]
+        if len(block) > 2 * self.BLOCK:
+            self.blocks[i:i + 1] = [block[:self.BLOCK], block[self.BLOCK:]]
+            self.maxes[i:i + 1] = [block[self.BLOCK - 1], block[-1]]
+
+    def remove(self, key):
+        i = bisect_left(self.maxes, key)
+        block = self.blocks[i]
+        del block[bisect_left(block, key)]
+        if block:
+            self.maxes[i] = block[-1]
+        else:
+            del self.blocks[i], self.maxes[i]
+
+    def iter_from(self, key):
+        """Keys >= `key`, in order."""
+        i = bisect_left(self.maxes, key)
+        if i < len(self.blocks):
+            block = self.blocks[i]
+            yield from block[bisect_left(block, key):]
+            for block in self.blocks[i + 1:]:
+                yield from block
+
+
+class RegistrationIndex:
+    """The live registrations rebuilt from log records."""
+
+    def __init__(self):
+        self.registrations = {}  # id -> (name, email, event, date, slot, ts), in id order
+        self.slot_counts = {}    # (event, date, slot) -> seats taken
+        self.emails = {}         # normalised email -> {registration ID: None}, in id order
+        # For pages: live IDs, overall and per slot (SortedKeys), built on the first page
+        self.ids = None
+        self.slot_ids = None
+        self.email_keys = None   # SortedKeys of self.emails, built on the first email search
+        self.next_id = 1
+        self.dead_lines = 0
+
+    def apply(self, record):
+        op = record["op"]
+        if op == "add":
+            # Event, date and slot repeat across registrations; share one string each
+            key = (sys.intern(record["event"]), sys.intern(record["date"]), sys.intern(record["slot"]))
+            self.registrations[record["id"]] = (record["name"], record["email"], *key, record["ts"])
+            self.slot_counts[key] = self.slot_counts.get(key, 0) + 1
+            email = normalize_email(record["email"])
+            if email not in self.emails:
+                self.emails[email] = {}
+                if self.email_keys is not None:
+                    self.email_keys.add(email)
+            self.emails[email][record["id"]] = None
+            if self.ids is not None:
+                self.ids.add(record["id"])
+                if key not in self.slot_ids:
+                    self.slot_ids[key] = SortedKeys()
+                self.slot_ids[key].add(record["id"])
+            self.next_id = max(self.next_id, record["id"] + 1)
+        elif op == "cancel":
+            row = self.registrations.pop(record["id"], None)
+            if row is None:
+                self.dead_lines += 1
+            else:
+                self.dead_lines += 2
+                key = row[2:5]
+                self.slot_counts[key] -= 1
+                if not self.slot_counts[key]:
+                    del self.slot_counts[key]
+                email = normalize_email(row[1])
+                del self.emails[email][record["id"]]
+                if not self.emails[email]:
+                    del self.emails[email]
+                    if self.email_keys is not None:
+                        self.email_keys.remove(email)
+                if self.ids is not None:
+                    self.ids.remove(record["id"])
+                    self.slot_ids[key].remove(record["id"])
+                    if not self.slot_ids[key].blocks:
+                        del self.slot_ids[key]
+        elif op == "meta":
+            self.next_id = max(self.next_id, record["next_id"])
+
+    def page(self, event=None, date=None, slot=None, email_prefix=None, after=None, limit=PAGE_SIZE):
+        """Up to `limit` (id, row) pairs matching the filters, and the cursor of
+        the next page (None on the last).
+
+        Without an email prefix, rows are in ID order and the cursor is the last
+        ID; with one, they are in (email, ID) order and so is the cursor.
+        """
+        def wanted(row):
+            return ((event is None or row[2] == event) and (date is None or row[3] == date)
+                    and (slot is None or row[4] == slot))
+
+        rows = []
+        if email_prefix:
+            if self.email_keys is None:
+                self.email_keys = SortedKeys(self.emails)
+            prefix = normalize_email(email_prefix)
+            after_email, after_id = after or (prefix, 0)
+            for email in self.email_keys.iter_from(after_email):
+                if not email.startswith(prefix):
+                    break
+                for registration_id in self.emails[email]:
+                    if email == after_email and registration_id <= after_id:
+                        continue
+                    row = self.registrations[registration_id]
+                    if wanted(row):
+                        rows.append((registration_id, row))
+                        if len(rows) > limit:
+                            last_id, last_row = rows[limit - 1]
+                            return rows[:limit], (normalize_email(last_row[1]), last_id)
+            return rows, None
+
+        if self.ids is None:
+            self._build_page_ids()
+        if event is None and date is None and slot is None:
+            lists = [self.ids]
+        else:
+            lists = [ids for key, ids in self.slot_ids.items()
+                     if (event is None or key[0] == event) and (date is None or key[1] == date)
+                     and (slot is None or key[2] == slot)]
+        streams = [ids.iter_from((after or 0) + 1) for ids in lists]
+        for registration_id in merge(*streams):
+            rows.append((registration_id, self.registrations[registration_id]))
+            if len(rows) > limit:
+                return rows[:limit], rows[limit - 1][0]
+        return rows, None
+
+    def _build_page_ids(self):
+        by_slot = {}
+        for registration_id, row in self.registrations.items():
+            by_slot.setdefault(row[2:5], []).append(registration_id)
+        self.ids = SortedKeys(self.registrations)
+        self.slot_ids = {key: SortedKeys(ids) for key, ids in by_slot.items()}
+
+    def apply_lines(self, data):
+        """Apply complete log lines. Parsed as one JSON array, which is about
+        twice as fast as a json.loads call per line."""
+        if data:
+            for record in json.loads(b"[" + b",".join(data.splitlines()) + b"]"):
+                self.apply(record)
+
+
+# -----------------------------
+# Migration
+# -----------------------------
+def _legacy_rows(csv_file, legacy_db):
+    """(id, row) pairs from the SQLite store, or from the CSV if there is none."""
+    if legacy_db and os.path.exists(legacy_db):
+        conn = sqlite3.connect(legacy_db)
+        try:
+            yield from ((row[0], row[1:]) for row in conn.execute(
+                "SELECT id, name, email, event, date, slot, ts FROM registrations ORDER BY id"))
+        finally:
+            conn.close()
+    elif csv_file and os.path.exists(csv_file):
+        now = time.time()
+        with open(csv_file, newline="", encoding="utf-8") as f:
+            for registration_id, row in enumerate(csv.DictReader(f), 1):
+                yield registration_id, (row["Name"], row["Email"], row["Event"], row["Date"], row["Time Slot"], now)
+
+
+def migrate(path, csv_file=CSV_FILE, legacy_db=LEGACY_DB):
+    """Create the log, importing earlier registrations. The old files are left in place."""
+    next_id = 1
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for registration_id, row in _legacy_rows(csv_file, legacy_db):
+            f.write(_add_line(registration_id, row))
+            next_id = registration_id + 1
+        f.write(_meta_line(next_id))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Store
+# -----------------------------
+class RegistrationStore:
+    def __init__(self, path=LOG_FILE, csv_file=CSV_FILE, legacy_db=LEGACY_DB, durable=False,
+                 compact_min=COMPACT_MIN, compact_ratio=COMPACT_RATIO):
+        """`durable` fsyncs every append; without it a record survives a crash of
+        the app but not of the machine."""
+        self.path = path
+        self.durable = durable
+        self.compact_min = compact_min
+        self.compact_ratio = compact_ratio
+        self.lock = threading.RLock()
+        self.lock_file = open(path + ".lock", "a")
+        self.compacting = False
+        self.fd = None
+        # Bumped whenever self.fd is reopened. Compaction compares this rather
+        # than inode numbers, which the filesystem reuses once a file is gone.
+        self.generation = 0
+        with self._exclusive():
+            if not os.path.exists(path):
+                migrate(path, csv_file, legacy_db)
+            self._load(repair=True)
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the log against other threads and other processes."""
+        with self.lock:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def _load(self, repair=False):
+        if self.fd is not None:
+            os.close(self.fd)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+        self.inode = os.fstat(self.fd).st_ino
+        self.epoch = _read_header(self.fd).get("epoch", 0)
+        self.generation += 1
+        self.offset = 0
+        self.index = RegistrationIndex()
+        self._read_new(repair)
+
+    def _read_new(self, repair=False):
+        """Apply the complete lines appended since the last read.
+
+        With `repair` (only while holding the flock, when no writer can be
+        midway through a line) an incomplete last line is cut off.
+        """
+        size = os.fstat(self.fd).st_size
+        while self.offset < size:
+            data = os.pread(self.fd, min(READ_CHUNK, size - self.offset), self.offset)
+            end = data.rfind(b"\n") + 1
+            if not end:
+                break
+            self.index.apply_lines(data[:end])
+            self.offset += end
+        if repair and self.offset < size:
+            os.ftruncate(self.fd, self.offset)
+
+    def _catch_up(self, repair=False):
+        """Pick up records written by other processes, switching files if the log was compacted."""
+        if os.stat(self.path).st_ino == self.inode:
+            self._read_new(repair)
+            return
+        # Another process compacted the log. Nothing is appended to the old file
+        # after that, so finishing it brings the index up to the rename; the new
+        # file's records from `base` on are the ones that came after.
+        self._read_new()
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+        header = _read_header(fd)
+        if header.get("epoch") != self.epoch + 1:
+            # Compacted more than once since; the file in between is gone
+            os.close(fd)
+            self._load(repair)
+            return
+        os.close(self.fd)
+        self.fd = fd
+        self.inode = os.fstat(fd).st_ino
+        self.epoch = header["epoch"]
+        self.generation += 1
+        self.offset = header["base"]
+        self.index.dead_lines = header["dead"]
+        self._read_new(repair)
+
+    def _append(self, line):
+        data = line.encode("utf-8")
+        os.write(self.fd, data)
+        if self.durable:
+            os.fsync(self.fd)
+        self.offset += len(data)
+        self.index.apply_lines(data)
+
+    # -- reads --
+
+    def seats_taken(self, event, date, slot):
+        with self.lock:
+            self._catch_up()
+            return self.index.slot_counts.get((event, date, slot), 0)
+
+    def count(self, event=None, date=None, slot=None):
+        """Registrations in total, or in the slots matching the filters."""
+        with self.lock:
+            self._catch_up()
+            if event is None and date is None and slot is None:
+                return len(self.index.registrations)
+        return sum(taken for *_, taken in self.occupancy(event, date, slot))
+
+    def by_email(self, email):
+        """[{"id", "Name", "Email", "Event", "Date", "Time Slot"}] registered under
+        `email`, ignoring case and surrounding spaces."""
+        with self.lock:
+            self._catch_up()
+            registrations = self.index.registrations
+            return [_as_dict(registration_id, registrations[registration_id])
+                    for registration_id in self.index.emails.get(normalize_email(email), ())]
+
+    def query(self, event=None, date=None, slot=None, email_prefix=None, after=None, limit=PAGE_SIZE):
+        """One page of registrations matching the filters, as
+        ([{"id", "Name", "Email", "Event", "Date", "Time Slot"}], next_cursor).
+
+        Pass next_cursor back as `after` for the following page; it is None on
+        the last one. The email prefix ignores case and surrounding spaces.
+        """
+        with self.lock:
+            self._catch_up()
+            rows, cursor = self.index.page(event, date, slot, email_prefix, after, limit)
+        return [_as_dict(registration_id, row) for registration_id, row in rows], cursor
+
+    def occupancy(self, event=None, date=None, slot=None):
+        """[(event, date, slot, seats taken)] for every booked slot matching the filters."""
+        with self.lock:
+            self._catch_up()
+            return sorted(key + (taken,) for key, taken in self.index.slot_counts.items()
+                          if (event is None or key[0] == event) and (date is None or key[1] == date)
+                          and (slot is None or key[2] == slot))
+
+    def export_csv(self, f, chunk_rows=EXPORT_CHUNK, **filters):
+        """Write the registrations matching `filters` to the text file `f` as CSV.
+
+        Rows are read one chunk at a time, holding the lock only per chunk, so
+        visitors keep registering during a large export. Returns the row count.
+        """
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        written, cursor = 0, None
+        while True:
+            rows, cursor = self.query(after=cursor, limit=chunk_rows, **filters)
+            writer.writerows([row[column] for column in COLUMNS] for row in rows)
+            written += len(rows)
+            if cursor is None:
+                return written
+
+    def all_registrations(self):
+        with self.lock:
+            self._catch_up()
+            return [_as_dict(registration_id, row) for registration_id, row in self.index.registrations.items()]
+
+    # -- writes --
+
+    def register(self, name, email, event, date, slot, capacity):
+        """Reserve a seat and store the registration.
+
+        Returns the new registration ID, or None if the slot is already full.
+        """
+        with self._exclusive():
+            self._catch_up(repair=True)
+            if self.index.slot_counts.get((event, date, slot), 0) >= capacity:
+                return None
+            registration_id = self.index.next_id
+            self._append(_add_line(registration_id, (name, email, event, date, slot, time.time())))
+        return registration_id
+
+    def cancel(self, registration_id):
+        """Append a tombstone for a registration. Returns False if it was already gone."""
+        with self._exclusive():
+            self._catch_up(repair=True)
+            if registration_id not in self.index.registrations:
+                return False
+            self._append(_cancel_line(registration_id))
+            if not self.compacting and self.index.dead_lines >= max(
+                    self.compact_min, self.compact_ratio * len(self.index.registrations)):
+                self.compacting = True
+                threading.Thread(target=self.compact, daemon=True).start()
+        return True
+
+    # -- compaction --
+
+    def compact(self):
+        """Rewrite the log with only the live registrations.
+
+        The live set is written out without holding the lock; then, under the
+        lock, whatever was appended meanwhile is copied after it, the header is
+        filled in and the new file is renamed over the log.
+        """
+        try:
+            with self._exclusive():
+                self._catch_up(repair=True)
+                snapshot = list(self.index.registrations.items())
+                next_id, offset, generation, epoch = self.index.next_id, self.offset, self.generation, self.epoch + 1
+
+            # Named per process and thread: another process may be compacting too
+            tmp = f"{self.path}.compact.{os.getpid()}.{threading.get_ident()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(_header_line(next_id, epoch))
+                f.writelines(_add_line(registration_id, row) for registration_id, row in snapshot)
+                f.flush()
+                os.fsync(f.fileno())
+
+            with self._exclusive():
+                self._catch_up(repair=True)
+                if self.generation != generation:
+                    # Another process compacted first
+                    os.remove(tmp)
+                    return
+                tail = os.pread(self.fd, self.offset - offset, offset)
+                dead = 2 * tail.count(b'"op": "cancel"')
+                with open(tmp, "r+b") as f:
+                    f.seek(0, os.SEEK_END)
+                    f.write(tail)
+                    base = f.tell()
+                    f.seek(0)
+                    f.write(_header_line(next_id, epoch, base, dead).encode())
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+                dir_fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+                os.close(self.fd)
+                self.fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+                self.inode = os.fstat(self.fd).st_ino
+                self.epoch = epoch
+                self.generation += 1
+                self.offset = base
+                self.index.dead_lines = dead
+        finally:
+            self.compacting = False
+
+    def log_size(self):
+        """(bytes, dead lines) of the current log."""
+        with self.lock:
+            return self.offset, self.index.dead_lines
+
+
+def _as_dict(registration_id, row):
+    return {"id": registration_id, **dict(zip(COLUMNS, row[:5]))}
+
+
+# -----------------------------
+# Verify
+# -----------------------------
+def verify(store):
+    """Replay the log from scratch and compare it with the store's index.
+
+    Also recounts the seats per slot and reindexes the emails from the
+    registrations. Returns a list of
+    (what, key, stored, replayed) for every mismatch.
+    """
+    with store._exclusive():
+        store._catch_up(repair=True)
+        replayed = RegistrationIndex()
+        with open(store.path, "rb") as f:
+            for line in f:
+                replayed.apply(json.loads(line))
+        index = store.index
+        mismatches = []
+        for registration_id in sorted(index.registrations.keys() | replayed.registrations.keys()):
+            stored, fresh = index.registrations.get(registration_id), replayed.registrations.get(registration_id)
+            if stored != fresh:
+                mismatches.append(("registration", registration_id, stored, fresh))
+        recounted = {}
+        for row in index.registrations.values():
+            recounted[row[2:5]] = recounted.get(row[2:5], 0) + 1
+        for key in sorted(index.slot_counts.keys() | recounted.keys()):
+            if index.slot_counts.get(key, 0) != recounted.get(key, 0):
+                mismatches.append(("slot_count", key, index.slot_counts.get(key, 0), recounted.get(key, 0)))
+        if index.ids is not None:
+            by_slot = {None: list(index.registrations)}
+            for registration_id, row in index.registrations.items():
+                by_slot.setdefault(row[2:5], []).append(registration_id)
+            for key in by_slot.keys() | index.slot_ids.keys():
+                ids = index.ids if key is None else index.slot_ids.get(key, SortedKeys())
+                listed = list(ids.iter_from(0))
+                expected = by_slot.get(key, [])
+                if listed != expected:
+                    mismatches.append(("page_ids", key, len(listed), len(expected)))
+        reindexed = {}
+        for registration_id, row in index.registrations.items():
+            reindexed.setdefault(normalize_email(row[1]), []).append(registration_id)
+        for email in sorted(index.emails.keys() | reindexed.keys()):
+            stored = list(index.emails.get(email, ()))
+            if stored != reindexed.get(email, []):
+                mismatches.append(("email", email, stored, reindexed.get(email, [])))
+    return mismatches
+
+
+# -----------------------------
+# Commands & Benchmark
+# -----------------------------
+EVENTS = ["Keynote", "Workshop A", "Workshop B", "Networking"]
+SLOTS = ["08:00–10:00", "10:00–12:00", "12:00–14:00", "14:00–16:00", "16:00–18:00"]
+DATES = ["2025-09-22", "2025-09-23", "2025-09-24", "2025-09-25", "2025-09-26"]
+
+
+def _race(store, visitors, capacity=24):
+    """`visitors` threads try to register for the same slot at the same moment."""
+    barrier = threading.Barrier(visitors)
+    results = [None] * visitors
+
+    def visit(i):
+        barrier.wait()
+        results[i] = store.register(f"Visitor {i}", f"visitor{i}@example.com",
+                                    "Keynote", DATES[0], SLOTS[0], capacity)
+
+    threads = [threading.Thread(target=visit, args=(i,)) for i in range(visitors)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    accepted = sum(result is not None for result in results)
+    print(f"{visitors} simultaneous registrations for a {capacity}-seat slot: "
+          f"{accepted} accepted, counter {store.seats_taken('Keynote', DATES[0], SLOTS[0])}, "
+          f"{elapsed * 1000:.0f} ms")
+
+
+def _process_visitor(path, i, capacity):
+    store = RegistrationStore(path, csv_file=None, legacy_db=None)
+    return sum(store.register(f"P{i}-{j}", f"p{i}-{j}@example.com", "Networking", DATES[0], SLOTS[4], capacity)
+               is not None for j in range(50))
+
+
+def _write_synthetic(path, first, total, rng):
+    """Append `total` registrations straight to a log, as if made over months."""
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(first, first + total):
+            f.write(_add_line(i, (f"Person {i}", f"person{i}@example.com", rng.choice(EVENTS),
+                                  rng.choice(DATES), rng.choice(SLOTS), float(i))))
+
+
+def _benchmark(visitors, total=1_000_000):
+    import random
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, LOG_FILE)
+        store = RegistrationStore(path, csv_file=None, legacy_db=None)
+        _race(store, visitors)
+
+        with ProcessPoolExecutor(8) as pool:
+            accepted = sum(pool.map(_process_visitor, [path] * 8, range(8), [100] * 8))
+        print(f"8 processes x 50 registrations for a 100-seat slot: {accepted} accepted, "
+              f"counter {store.seats_taken('Networking', DATES[0], SLOTS[4])}")
+
+        rng = random.Random(0)
+        _write_synthetic(path, store.index.next_id, total, rng)
+        start = time.perf_counter()
+        store = RegistrationStore(path, csv_file=None, legacy_db=None)
+        print(f"startup: replayed {store.count():,} registrations "
+              f"({store.log_size()[0] / 1e6:.0f} MB) in {time.perf_counter() - start:.1f}s")
+
+        timings = []
+        for _ in range(1000):
+            key = (rng.choice(EVENTS), rng.choice(DATES), rng.choice(SLOTS))
+            start = time.perf_counter()
+            store.seats_taken(*key)
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        print(f"seat check: median {timings[len(timings) // 2]:.1f} µs")
+
+        ids = list(store.index.registrations)
+        rng.shuffle(ids)
+        timings = []
+        size_before = store.log_size()[0]
+        for registration_id in ids[:500]:
+            start = time.perf_counter()
+            store.cancel(registration_id)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"cancel: median {timings[len(timings) // 2]:.3f} ms, "
+              f"{(store.log_size()[0] - size_before) / 500:.0f} bytes appended each")
+
+        # What every cancel used to do
+        df = pd.DataFrame(store.all_registrations())
+        start = time.perf_counter()
+        df.to_csv(os.path.join(tmp, CSV_FILE), index=False)
+        print(f"rewriting the CSV on cancel: {time.perf_counter() - start:.1f}s")
+
+        # A second store stands in for another server process sharing the log
+        other = RegistrationStore(path, csv_file=None, legacy_db=None)
+
+        # Cancel 30% of the registrations, then compact while registering alongside to time the stall
+        store.compact_ratio = float("inf")
+        for registration_id in ids[500:300_000]:
+            store.cancel(registration_id)
+        other.seats_taken(*key)
+        store.compacting = True
+        threading.Thread(target=store.compact, daemon=True).start()
+        timings = []
+        start = time.perf_counter()
+        while store.compacting:
+            t = time.perf_counter()
+            store.register("Bench", "bench@example.com", "Workshop A", DATES[1], SLOTS[1], 10**9)
+            timings.append((time.perf_counter() - t) * 1000)
+            if len(timings) % 100 == 0:
+                other.seats_taken(*key)
+        elapsed = time.perf_counter() - start
+        timings.sort()
+        size, dead = store.log_size()
+        print(f"compaction: {elapsed:.1f}s in the background, {len(timings):,} registrations meanwhile, "
+              f"slowest {timings[-1]:.0f} ms; log now {size / 1e6:.0f} MB, {dead} dead lines")
+
+        start = time.perf_counter()
+        other.seats_taken(*key)
+        print(f"other process, first seat check after the compaction: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        for label, checked in [("", store), (" (other process)", other)]:
+            start = time.perf_counter()
+            mismatches = verify(checked)
+            print(f"verify{label}: {len(mismatches)} mismatches in {time.perf_counter() - start:.1f}s")
+
+
+def _benchmark_email(sizes=(10_000, 100_000, 1_000_000)):
+    """Email lookup and cancel latency as the number of registrations grows."""
+    import random
+    import tempfile
+
+    import pandas as pd
+
+    for total in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, LOG_FILE)
+            rng = random.Random(0)
+            _write_synthetic(path, 1, total, rng)
+            store = RegistrationStore(path, csv_file=None, legacy_db=None)
+            # Some people register more than once
+            for i in range(1, 1001):
+                store.register(f"Person {i}", f"  PERSON{i}@Example.com", "Networking", DATES[2], SLOTS[4], 10**9)
+
+            lookups, cancels = [], []
+            for i in rng.sample(range(1, total + 1), 1000):
+                start = time.perf_counter()
+                matches = store.by_email(f"Person{i}@example.com")
+                lookups.append((time.perf_counter() - start) * 1e6)
+                start = time.perf_counter()
+                store.cancel(matches[0]["id"])
+                cancels.append((time.perf_counter() - start) * 1e6)
+            lookups.sort()
+            cancels.sort()
+
+            # What both cancel flows used to do with the session copy
+            records = store.all_registrations()
+            start = time.perf_counter()
+            df = pd.DataFrame(records)
+            matches = df[df["Email"] == "person1@example.com"]
+            matches.apply(lambda row: f"{row['Event']} on {row['Date']} at {row['Time Slot']}", axis=1)
+            scan = (time.perf_counter() - start) * 1000
+
+            print(f"{total:>9,} registrations: lookup median {lookups[500]:.1f} µs (p99 {lookups[990]:.1f}), "
+                  f"cancel median {cancels[500]:.1f} µs (p99 {cancels[990]:.1f}); DataFrame scan {scan:.0f} ms; "
+                  f"verify {len(verify(store))} mismatches")
+
+
+def _benchmark_dashboard(sizes=(10, 10_000, 1_000_000)):
+    """Store calls behind one organizer dashboard rerun, as the registrations grow."""
+    import io
+    import random
+    import tempfile
+
+    import pandas as pd
+
+    for total in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, LOG_FILE)
+            _write_synthetic(path, 1, total, random.Random(0))
+            store = RegistrationStore(path, csv_file=None, legacy_db=None)
+            filter_sets = [{}, {"event": "Workshop A"}, {"event": "Keynote", "date": DATES[2], "slot": SLOTS[0]},
+                           {"email_prefix": "person12"}]
+            timings = {}
+            for filters in filter_sets:
+                slot_filters = {key: value for key, value in filters.items() if key != "email_prefix"}
+                runs = []
+                for _ in range(50):
+                    start = time.perf_counter()
+                    store.count()
+                    store.occupancy(**slot_filters)
+                    rows, cursor = store.query(**filters)
+                    # and the next page
+                    store.query(**filters, after=cursor)
+                    store.count(**slot_filters)
+                    runs.append((time.perf_counter() - start) * 1000)
+                runs.sort()
+                timings[", ".join(f"{value}" for value in filters.values()) or "no filter"] = runs[25]
+
+            start = time.perf_counter()
+            exported = store.export_csv(io.StringIO())
+            export_time = time.perf_counter() - start
+
+            # What every rerun used to do: the whole table, serialised up front
+            records = store.all_registrations()
+            start = time.perf_counter()
+            df = pd.DataFrame(records)
+            df.to_csv(index=False).encode("utf-8")
+            old_time = time.perf_counter() - start
+
+            print(f"{total:>9,} registrations: rerun " + ", ".join(
+                f"{label} {ms:.2f} ms" for label, ms in timings.items()))
+            print(f"{'':>25} export of {exported:,} rows on request {export_time:.2f}s; "
+                  f"old rerun (DataFrame + CSV) {old_time:.2f}s")
+
+            # Cancelling the oldest registrations must not slow the first page down
+            store.compact_min = float("inf")
+            for registration_id in list(store.index.registrations)[:total * 45 // 100]:
+                store.cancel(registration_id)
+            first_pages = []
+            for filters in filter_sets[:2]:
+                start = time.perf_counter()
+                store.query(**filters)
+                first_pages.append(f"{', '.join(filters.values()) or 'no filter'} "
+                                   f"{(time.perf_counter() - start) * 1000:.2f} ms")
+            print(f"{'':>25} first page after cancelling the oldest 45%: {', '.join(first_pages)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("verify", "compact"):
+        store = RegistrationStore(sys.argv[2] if len(sys.argv) > 2 else LOG_FILE)
+        if sys.argv[1] == "compact":
+            store.compact()
+        mismatches = verify(store)
+        for what, key, stored, replayed in mismatches:
+            print(f"{what} {key}: stored {stored}, replayed {replayed}")
+        print(f"{store.count():,} registrations checked, {len(mismatches)} mismatches")
+        sys.exit(1 if mismatches else 0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "email":
+        _benchmark_email()
+    elif len(sys.argv) > 1 and sys.argv[1] == "dashboard":
+        _benchmark_dashboard()
+    else:
+        _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
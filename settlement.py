@@ -0,0 +1,189 @@
+# Settlement engine for the expense splitter (Day2).
+#
+# Turns a list of balances (positive = gets money back, negative = has to pay)
+# into a list of transfers. All maths is done in integer minor units (paise)
+# so amounts never drift because of float rounding.
+#
+# Run `python settlement.py` to benchmark against the old nested-loop logic.
+import heapq
+import time
+import random
+
+# Exact mode is exponential in the number of people with a non-zero balance
+EXACT_MAX_PEOPLE = 15
+
+
+# -----------------------------
+# Helpers: Rupees <-> Paise
+# -----------------------------
+def to_minor_units(balances):
+    return [int(round(b * 100)) for b in balances]
+
+
+def from_minor_units(amount):
+    return amount / 100
+
+
+# -----------------------------
+# Greedy: Two-Heap Matcher
+# -----------------------------
+def settle_greedy(names, balances_minor):
+    """Match the biggest debtor with the biggest creditor until one side runs out.
+
+    Returns a list of (payer, payee, amount_minor) tuples. Runs in O(n log n).
+    """
+    # heapq is a min-heap, so amounts are stored negated
+    debtors = [(b, i) for i, b in enumerate(balances_minor) if b < 0]
+    creditors = [(-b, i) for i, b in enumerate(balances_minor) if b > 0]
+    heapq.heapify(debtors)
+    heapq.heapify(creditors)
+
+    transfers = []
+    while debtors and creditors:
+        debt, d = heapq.heappop(debtors)
+        credit, c = heapq.heappop(creditors)
+        amount = min(-debt, -credit)
+        transfers.append((names[d], names[c], amount))
+
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, d))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, c))
+    return transfers
+
+
+# -----------------------------
+# Exact: Minimum Number of Transfers
+# -----------------------------
+def settle_exact(names, balances_minor):
+    """Settle with the fewest possible transfers (small groups only).
+
+    A group of k people whose balances sum to zero can always be settled with
+    k - 1 transfers, so the best plan splits everyone into as many zero-sum
+    groups as possible. That split is found with a DP over subsets.
+    """
+    people = [i for i, b in enumerate(balances_minor) if b != 0]
+    if len(people) > EXACT_MAX_PEOPLE:
+        raise ValueError(f"Exact mode supports at most {EXACT_MAX_PEOPLE} people with a non-zero balance")
+    if sum(balances_minor[i] for i in people) != 0:
+        raise ValueError("Exact mode needs balances that add up to zero")
+
+    k = len(people)
+    full = (1 << k) - 1
+    subset_sum = [0] * (full + 1)
+    groups = [0] * (full + 1)  # most zero-sum groups a subset can be split into
+    for mask in range(1, full + 1):
+        low = mask & -mask
+        i = low.bit_length() - 1
+        subset_sum[mask] = subset_sum[mask ^ low] + balances_minor[people[i]]
+        best = 0
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            best = max(best, groups[mask ^ bit])
+            rest ^= bit
+        groups[mask] = best + (subset_sum[mask] == 0)
+
+    # Walk back to an ordering whose prefix sums hit zero once per group
+    order = []
+    mask = full
+    while mask:
+        target = groups[mask] - (subset_sum[mask] == 0)
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            if groups[mask ^ bit] == target:
+                break
+            rest ^= bit
+        order.append(bit.bit_length() - 1)
+        mask ^= bit
+    order.reverse()
+
+    transfers = []
+    group, running = [], 0
+    for i in order:
+        group.append(people[i])
+        running += balances_minor[people[i]]
+        if running == 0:
+            transfers += settle_greedy([names[p] for p in group], [balances_minor[p] for p in group])
+            group = []
+    return transfers
+
+
+def settle(names, balances, exact=False):
+    """Settle a list of rupee balances and return (payer, payee, rupees) tuples.
+
+    Exact mode is used only when it is possible; otherwise the greedy matcher runs.
+    """
+    balances_minor = to_minor_units(balances)
+    transfers = None
+    if exact:
+        try:
+            transfers = settle_exact(names, balances_minor)
+        except ValueError:
+            transfers = None
+    if transfers is None:
+        transfers = settle_greedy(names, balances_minor)
+    return [(payer, payee, from_minor_units(amount)) for payer, payee, amount in transfers]
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def _nested_loop_settle(names, balances):
+    # The original Day2 logic, kept here only for comparison
+    import pandas as pd
+
+    col = "Balance to Pay(-) and Get(+)"
+    df = pd.DataFrame({"Name": names, col: balances})
+    debtors = df[df[col] < 0].copy()
+    creditors = df[df[col] > 0].copy()
+    debtors[col] = debtors[col].abs()
+
+    transfers = []
+    for i, debtor in debtors.iterrows():
+        for j, creditor in creditors.iterrows():
+            if debtor[col] == 0:
+                break
+            if creditors.at[j, col] == 0:
+                continue
+            amount = min(debtor[col], creditors.at[j, col])
+            transfers.append((debtor["Name"], creditor["Name"], amount))
+            debtor[col] -= amount
+            creditors.at[j, col] -= amount
+    return transfers
+
+
+def _random_group(n, seed=0):
+    rng = random.Random(seed)
+    paid = [rng.randint(0, 500000) for _ in range(n)]
+    total = sum(paid)
+    share, extra = divmod(total, n)
+    # Spread the leftover paise so balances add up to exactly zero
+    balances = [p - share - (1 if i < extra else 0) for i, p in enumerate(paid)]
+    return [f"Person {i+1}" for i in range(n)], balances
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    print(f"{'people':>8} {'nested loop':>12} {'two-heap':>10} {'transfers':>10}")
+    for n in [100, 1000, 10000, 100000]:
+        names, balances_minor = _random_group(n)
+        heap_time, transfers = _time(settle_greedy, names, balances_minor)
+        if n <= 1000:
+            balances = [from_minor_units(b) for b in balances_minor]
+            loop_time, _ = _time(_nested_loop_settle, names, balances)
+            loop_text = f"{loop_time:.3f}s"
+        else:
+            loop_text = "skipped"
+        print(f"{n:>8} {loop_text:>12} {heap_time:>9.3f}s {len(transfers):>10}")
+
+    names, balances_minor = _random_group(12, seed=1)
+    exact_time, exact = _time(settle_exact, names, balances_minor)
+    print(f"\nExact mode, 12 people: {len(exact)} transfers in {exact_time:.3f}s "
+          f"(greedy needs {len(settle_greedy(names, balances_minor))})")
@@ -0,0 +1,35 @@
+# Pooled SQLite connections for the Streamlit apps.
+#
+# A sqlite3 connection runs one transaction at a time, so a connection cached
+# with st.cache_resource and shared by every session lets one session's commit
+# end another's half-done transaction, and their statements interleave.
+# ConnectionPool is cached instead. Every connection is opened when the pool is
+# built, so the schema is created and migrated there and never again on a
+# rerun. A script run borrows one with `with pool.connection() as conn:` and
+# hands it back at the end of the block; SQLite's file locking then serialises
+# the writers.
+import queue
+from contextlib import contextmanager
+
+POOL_SIZE = 4
+
+
+class ConnectionPool:
+    """`size` connections opened with `connect(*args)`, lent out one block at a time."""
+
+    def __init__(self, connect, *args, size=POOL_SIZE):
+        self.idle = queue.LifoQueue()
+        for _ in range(size):
+            self.idle.put(connect(*args))
+
+    @contextmanager
+    def connection(self):
+        """Borrow an idle connection, waiting for one if every connection is lent out."""
+        conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            # Never hand the next borrower a transaction left open by an error
+            if conn.in_transaction:
+                conn.rollback()
+            self.idle.put(conn)
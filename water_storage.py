@@ -0,0 +1,461 @@
+# Storage layer for the water intake tracker (Day6).
+#
+# - One SQLite connection per server process, shared by every session behind a lock
+# - WAL journal, so readers never wait for a writer
+# - Every row belongs to a user; raw intake rows are indexed on (user_id, date),
+#   and daily, monthly and yearly totals per user are kept in rollup tables by
+#   triggers, so today's total is one row and the weekly chart is at most seven
+# - Writes are buffered and committed together with executemany; the buffer is
+#   flushed before every read, so a session always sees its own writes
+# - Queries are fixed SQL strings, so SQLite's statement cache reuses them
+# - Raw rows older than the retention period are compacted into one row per user
+#   and day, and ANALYZE / incremental vacuum run on a schedule kept in the
+#   database; maintenance uses its own connection and short transactions (one
+#   user and week at a time), lets any session waiting to write go between them
+#   and does the WAL checkpoints itself, so sessions never wait on it for long
+#
+# Run `python water_storage.py [rows]` to load 10M rows and time a rerun, or
+# `python water_storage.py verify|rebuild|maintain [db_file]` to check the
+# rollups or run maintenance now.
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+DB_FILE = "water_tracker.db"
+FLUSH_SIZE = 50
+SCHEMA_VERSION = 3
+LEGACY_USER = "shared"  # owner of rows logged before intake had a user column
+RETENTION_DAYS = 90
+# How long a write waits for another connection's transaction before failing
+BUSY_TIMEOUT_S = 30
+
+# Task -> run at most once every N days, in this order
+MAINTENANCE_EVERY = {"compact": 1, "analyze": 7, "vacuum": 30}
+# Compaction commits every user's rows this many days at a time
+COMPACT_BATCH_DAYS = 7
+# Rows ANALYZE samples per index, and free pages returned per vacuum step
+ANALYSIS_LIMIT = 1000
+VACUUM_PAGES = 2000
+
+# Rollup table -> (period column, length of the date prefix that names a period)
+ROLLUPS = {
+    "daily_totals": ("date", 10),
+    "monthly_totals": ("month", 7),
+    "yearly_totals": ("year", 4),
+}
+
+INSERT_INTAKE = "INSERT INTO intake (user_id, date, amount) VALUES (?, ?, ?)"
+DAY_TOTAL = "SELECT total_ml FROM daily_totals WHERE user_id = ? AND date = ?"
+DAILY_TOTALS = """
+    SELECT date, total_ml / 1000.0 FROM daily_totals
+    WHERE user_id = ? AND date BETWEEN ? AND ? ORDER BY date
+"""
+MONTHLY_TOTALS = """
+    SELECT month, total_ml / 1000.0 FROM monthly_totals
+    WHERE user_id = ? AND month BETWEEN ? AND ? ORDER BY month
+"""
+YEARLY_TOTALS = "SELECT year, total_ml / 1000.0 FROM yearly_totals WHERE user_id = ? ORDER BY year"
+DELETE_DAY = "DELETE FROM intake WHERE user_id = ? AND date = ?"
+
+# Totals are kept in whole millilitres so adding and removing rows never drifts
+ML = "CAST(ROUND({}.amount * 1000) AS INTEGER)"
+
+
+# -----------------------------
+# DB Setup
+# -----------------------------
+def connect(path=DB_FILE):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_S, check_same_thread=False, cached_statements=32)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(f"""
+        CREATE TABLE IF NOT EXISTS intake (
+            date TEXT,
+            amount REAL,
+            user_id TEXT NOT NULL DEFAULT '{LEGACY_USER}',
+            entries INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE TABLE IF NOT EXISTS maintenance (
+            task TEXT PRIMARY KEY,
+            last_run TEXT NOT NULL
+        );
+    """)
+    migrate(conn)
+    return conn
+
+
+def migrate(conn):
+    """Bring an existing database up to SCHEMA_VERSION."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 2:
+        # Version 1 had no users: add the columns, then rebuild the rollups per user
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(intake)")}
+        if "user_id" not in columns:
+            conn.execute(f"ALTER TABLE intake ADD COLUMN user_id TEXT NOT NULL DEFAULT '{LEGACY_USER}'")
+        if "entries" not in columns:
+            conn.execute("ALTER TABLE intake ADD COLUMN entries INTEGER NOT NULL DEFAULT 1")
+        conn.execute("DROP INDEX IF EXISTS idx_intake_date")
+        for table in ROLLUPS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {table}_insert")
+            conn.execute(f"DROP TRIGGER IF EXISTS {table}_delete")
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_intake_user_date ON intake (user_id, date, amount)")
+        _create_rollups(conn)
+        rebuild(conn)
+    if version < 3:
+        # Free pages are handed back by incremental_vacuum during maintenance;
+        # switching an existing file over takes one full VACUUM
+        conn.commit()
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    if version < SCHEMA_VERSION:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+
+
+def _create_rollups(conn):
+    # `entries` is how many logged drinks a row stands for (more than 1 once compacted)
+    for table, (column, length) in ROLLUPS.items():
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                user_id TEXT NOT NULL,
+                {column} TEXT NOT NULL,
+                total_ml INTEGER NOT NULL,
+                entries INTEGER NOT NULL,
+                PRIMARY KEY (user_id, {column})
+            ) WITHOUT ROWID;
+
+            CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON intake BEGIN
+                INSERT INTO {table} (user_id, {column}, total_ml, entries)
+                VALUES (NEW.user_id, substr(NEW.date, 1, {length}), {ML.format("NEW")}, NEW.entries)
+                ON CONFLICT (user_id, {column}) DO UPDATE SET
+                    total_ml = total_ml + excluded.total_ml,
+                    entries = entries + excluded.entries;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON intake BEGIN
+                UPDATE {table}
+                SET total_ml = total_ml - {ML.format("OLD")}, entries = entries - OLD.entries
+                WHERE user_id = OLD.user_id AND {column} = substr(OLD.date, 1, {length});
+                DELETE FROM {table}
+                WHERE user_id = OLD.user_id AND {column} = substr(OLD.date, 1, {length}) AND entries = 0;
+            END;
+        """)
+
+
+class WaterStore:
+    def __init__(self, path=DB_FILE, flush_size=FLUSH_SIZE, retention_days=RETENTION_DAYS):
+        self.path = path
+        self.conn = connect(path)
+        self.flush_size = flush_size
+        self.retention_days = retention_days
+        self.lock = threading.Lock()
+        self.pending = []
+        self.maintained_on = None
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+    def log_intake(self, user_id, day, amount_l):
+        """Queue one intake; it is committed with the next flush."""
+        with self.lock:
+            self.pending.append((user_id, day.isoformat(), amount_l))
+            if len(self.pending) >= self.flush_size:
+                self._flush()
+
+    def clear_day(self, user_id, day):
+        with self.lock:
+            self._flush()
+            with self.conn:
+                self.conn.execute(DELETE_DAY, (user_id, day.isoformat()))
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        with self.conn:
+            self.conn.executemany(INSERT_INTAKE, self.pending)
+        self.pending.clear()
+
+    # -----------------------------
+    # Reading
+    # -----------------------------
+    def _read(self, sql, params):
+        with self.lock:
+            self._flush()
+            return self.conn.execute(sql, params).fetchall()
+
+    def day_total(self, user_id, day):
+        """Litres logged by `user_id` on `day`."""
+        rows = self._read(DAY_TOTAL, (user_id, day.isoformat()))
+        return rows[0][0] / 1000 if rows else 0
+
+    def daily_totals(self, user_id, start, end):
+        """[(date, litres)] for every day with intake from `start` to `end`."""
+        return self._read(DAILY_TOTALS, (user_id, start.isoformat(), end.isoformat()))
+
+    def monthly_totals(self, user_id, start, end):
+        """[(YYYY-MM, litres)] for the months from `start` to `end`."""
+        return self._read(MONTHLY_TOTALS, (user_id, start.isoformat()[:7], end.isoformat()[:7]))
+
+    def yearly_totals(self, user_id):
+        return self._read(YEARLY_TOTALS, (user_id,))
+
+    # -----------------------------
+    # Maintenance
+    # -----------------------------
+    def maybe_maintain(self, today=None):
+        """Run any due maintenance in the background, checking at most once a day.
+
+        Maintenance opens its own connection, takes the store's lock only
+        between batches and does the WAL checkpoints itself, so sessions only
+        wait for whichever short batch is committing.
+        """
+        today = today or date.today()
+        with self.lock:
+            if self.maintained_on == today:
+                return
+            self.maintained_on = today
+        threading.Thread(target=self.maintain, args=(today,), daemon=True).start()
+
+    def maintain(self, today):
+        """Run any due maintenance now. Returns the names of the tasks that ran."""
+        self.flush()
+        conn = connect(self.path)
+        # Maintenance writes most of the WAL, so its own commits copy it back
+        # into the database; a session's commit would otherwise stall doing it
+        with self.lock:
+            checkpoint_pages = self.conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0]
+            self.conn.execute("PRAGMA wal_autocheckpoint = 0")
+        try:
+            return run_maintenance(conn, today, self.retention_days, between_batches=self._let_writers_in)
+        finally:
+            conn.close()
+            with self.lock:
+                self.conn.execute(f"PRAGMA wal_autocheckpoint = {checkpoint_pages}")
+
+    def _let_writers_in(self):
+        # A session flushing holds the lock while it waits for SQLite's write
+        # lock. SQLite does not queue waiters, so without this the next batch
+        # usually takes the write lock first and the session waits for many.
+        with self.lock:
+            pass
+
+
+# -----------------------------
+# Retention & Maintenance
+# -----------------------------
+def compact(conn, before, since=None, batch_days=COMPACT_BATCH_DAYS, between_batches=None):
+    """Merge each user's raw rows for every day before `before` into one row.
+
+    The merged row carries the day's total and how many entries it replaces, so
+    the rollups come out unchanged. Days before `since` are taken to be
+    compacted already. Each user's rows are committed `batch_days` days at a
+    time, so no transaction holds the write lock for long, and
+    `between_batches` is called after each commit. Returns the number of rows
+    removed.
+    """
+    removed = 0
+    users = [row[0] for row in conn.execute("SELECT user_id FROM yearly_totals GROUP BY user_id")]
+    for user_id in users:
+        first = conn.execute("SELECT MIN(date) FROM daily_totals WHERE user_id = ?", (user_id,)).fetchone()[0]
+        day = max(date.fromisoformat(first), since) if since else date.fromisoformat(first)
+        while day < before:
+            end = min(day + timedelta(days=batch_days), before)
+            removed += _compact_batch(conn, user_id, day, end)
+            if between_batches:
+                between_batches()
+            day = end
+    return removed
+
+
+def _compact_batch(conn, user_id, start, end):
+    """Compact one user's rows from `start` up to (not including) `end`."""
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        merged = conn.execute(f"""
+            SELECT date, SUM({ML.format("intake")}) / 1000.0, SUM(entries), COUNT(*)
+            FROM intake
+            WHERE user_id = ? AND date >= ? AND date < ?
+            GROUP BY date
+            HAVING COUNT(*) > 1
+        """, (user_id, start.isoformat(), end.isoformat())).fetchall()
+        conn.executemany(DELETE_DAY, [(user_id, day) for day, _, _, _ in merged])
+        conn.executemany(
+            "INSERT INTO intake (user_id, date, amount, entries) VALUES (?, ?, ?, ?)",
+            [(user_id, day, amount, entries) for day, amount, entries, _ in merged]
+        )
+    return sum(raw_rows - 1 for _, _, _, raw_rows in merged)
+
+
+def incremental_vacuum(conn, pages=VACUUM_PAGES, between_batches=None):
+    """Hand free pages back to the file system, `pages` per transaction."""
+    while conn.execute("PRAGMA freelist_count").fetchone()[0]:
+        with conn:
+            conn.execute(f"PRAGMA incremental_vacuum({pages})").fetchall()
+        if between_batches:
+            between_batches()
+
+
+def run_maintenance(conn, today, retention_days=RETENTION_DAYS, force=False, between_batches=None):
+    """Run every task in MAINTENANCE_EVERY that is due (or all with `force`).
+
+    `between_batches` is called after each compaction and vacuum transaction.
+    Returns the names of the tasks that ran.
+    """
+    last_runs = dict(conn.execute("SELECT task, last_run FROM maintenance"))
+    ran = []
+    for task, every_days in MAINTENANCE_EVERY.items():
+        last_run = last_runs.get(task)
+        if not force and last_run and date.fromisoformat(last_run) + timedelta(days=every_days) > today:
+            continue
+        if task == "compact":
+            # The last run compacted everything before its own cutoff; `force` starts over
+            since = None if force or not last_run else date.fromisoformat(last_run) - timedelta(days=retention_days)
+            compact(conn, today - timedelta(days=retention_days), since, between_batches=between_batches)
+        elif task == "analyze":
+            # A sampled ANALYZE is enough for the planner and keeps the write lock brief
+            conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            with conn:
+                conn.execute("ANALYZE")
+        elif task == "vacuum":
+            incremental_vacuum(conn, between_batches=between_batches)
+        with conn:
+            conn.execute("""
+                INSERT INTO maintenance (task, last_run) VALUES (?, ?)
+                ON CONFLICT (task) DO UPDATE SET last_run = excluded.last_run
+            """, (task, today.isoformat()))
+        ran.append(task)
+    return ran
+
+
+# -----------------------------
+# Rebuild & Verify
+# -----------------------------
+def _rebuilt_rollup(conn, table):
+    column, length = ROLLUPS[table]
+    return conn.execute(f"""
+        SELECT user_id, substr(date, 1, {length}) AS {column}, SUM({ML.format("intake")}), SUM(entries)
+        FROM intake
+        GROUP BY 1, 2
+    """).fetchall()
+
+
+def verify(conn):
+    """Compare every rollup with a fresh aggregate of the raw intake rows.
+
+    Returns a list of (table, user_id, period, stored, rebuilt) for every
+    mismatch, where stored and rebuilt are (total_ml, entries) or None for a
+    missing row.
+    """
+    mismatches = []
+    for table, (column, _) in ROLLUPS.items():
+        stored = {(user, period): (total, entries) for user, period, total, entries
+                  in conn.execute(f"SELECT user_id, {column}, total_ml, entries FROM {table}")}
+        rebuilt = {(user, period): (total, entries) for user, period, total, entries
+                   in _rebuilt_rollup(conn, table)}
+        for key in sorted(stored.keys() | rebuilt.keys()):
+            if stored.get(key) != rebuilt.get(key):
+                mismatches.append((table, *key, stored.get(key), rebuilt.get(key)))
+    return mismatches
+
+
+def rebuild(conn):
+    with conn:
+        for table, (column, _) in ROLLUPS.items():
+            conn.execute(f"DELETE FROM {table}")
+            conn.executemany(
+                f"INSERT INTO {table} (user_id, {column}, total_ml, entries) VALUES (?, ?, ?, ?)",
+                _rebuilt_rollup(conn, table)
+            )
+
+
+# -----------------------------
+# Commands & Benchmark
+# -----------------------------
+def _benchmark(rows, users=1000):
+    import random
+    import tempfile
+
+    days = 3650
+    first_day = date.today() - timedelta(days=days - 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, DB_FILE)
+        store = WaterStore(path)
+
+        # Rows arrive in date order, as they would from daily logging
+        def generate():
+            rng = random.Random(0)
+            for i in range(rows):
+                day = first_day + timedelta(days=i * days // rows)
+                yield f"user{rng.randrange(users)}", day.isoformat(), rng.choice((0.1, 0.2, 0.3, 0.5))
+
+        start = time.perf_counter()
+        with store.conn:
+            store.conn.executemany(INSERT_INTAKE, generate())
+        print(f"loaded {rows:,} rows for {users:,} users over {days} days in {time.perf_counter() - start:.1f}s")
+
+        today = date.today()
+        timings = []
+        for i in range(50):
+            # One rerun: a quick-add click, then the metric and the weekly chart
+            user_id = f"user{i}"
+            start = time.perf_counter()
+            store.log_intake(user_id, today, 0.2)
+            store.day_total(user_id, today)
+            store.daily_totals(user_id, today - timedelta(days=6), today)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"per rerun: median {timings[len(timings) // 2]:.2f} ms, worst {timings[-1]:.2f} ms")
+
+        start = time.perf_counter()
+        store.monthly_totals("user0", first_day, today)
+        store.yearly_totals("user0")
+        print(f"ten years of monthly and yearly totals: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        # Maintenance runs in the background, as maybe_maintain does, while sessions keep rerunning
+        size_before = os.path.getsize(path)
+        ran = []
+        worker = threading.Thread(target=lambda: ran.extend(store.maintain(today)))
+        start = time.perf_counter()
+        worker.start()
+        timings = []
+        while worker.is_alive():
+            rerun_start = time.perf_counter()
+            store.log_intake("user0", today, 0.2)
+            store.day_total("user0", today)
+            store.daily_totals("user0", today - timedelta(days=6), today)
+            timings.append((time.perf_counter() - rerun_start) * 1000)
+        elapsed = time.perf_counter() - start
+        remaining = store.conn.execute("SELECT COUNT(*) FROM intake").fetchone()[0]
+        print(f"maintenance ({', '.join(ran)}) in {elapsed:.1f}s: "
+              f"{remaining:,} rows left, {size_before / 1e6:.0f} MB -> {os.path.getsize(path) / 1e6:.0f} MB")
+        timings.sort()
+        print(f"{len(timings):,} reruns meanwhile: median {timings[len(timings) // 2]:.2f} ms, worst {timings[-1]:.2f} ms")
+
+        start = time.perf_counter()
+        mismatches = verify(store.conn)
+        print(f"verify: {len(mismatches)} mismatches in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("verify", "rebuild", "maintain"):
+        conn = connect(sys.argv[2] if len(sys.argv) > 2 else DB_FILE)
+        if sys.argv[1] == "rebuild":
+            rebuild(conn)
+        elif sys.argv[1] == "maintain":
+            print("ran:", ", ".join(run_maintenance(conn, date.today(), force=True)))
+        mismatches = verify(conn)
+        for table, user_id, period, stored, rebuilt in mismatches:
+            print(f"{table} {user_id} {period}: stored {stored}, rebuilt {rebuilt}")
+        print(f"{len(mismatches)} mismatched rollup rows")
+        sys.exit(1 if mismatches else 0)
+
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)